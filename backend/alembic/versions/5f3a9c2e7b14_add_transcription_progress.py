@@ -0,0 +1,30 @@
+"""add_transcription_progress
+
+Revision ID: 5f3a9c2e7b14
+Revises: 77bb656dc40c
+Create Date: 2026-10-19 09:12:31.402215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3a9c2e7b14'
+down_revision: Union[str, None] = '77bb656dc40c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('recordings', sa.Column('transcription_status', sa.String(), server_default='pending', nullable=True))
+    op.add_column('recordings', sa.Column('transcribed_seconds', sa.Float(), nullable=True))
+    # Recordings that already have a transcript are done
+    op.execute("UPDATE recordings SET transcription_status = 'completed' WHERE transcription IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('recordings', 'transcribed_seconds')
+    op.drop_column('recordings', 'transcription_status')
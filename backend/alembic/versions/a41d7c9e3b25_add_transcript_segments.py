@@ -0,0 +1,38 @@
+"""add_transcript_segments
+
+Revision ID: a41d7c9e3b25
+Revises: 5f3a9c2e7b14
+Create Date: 2026-10-19 11:40:05.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41d7c9e3b25'
+down_revision: Union[str, None] = '5f3a9c2e7b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transcript_segments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('start_ms', sa.Integer(), nullable=False),
+    sa.Column('end_ms', sa.Integer(), nullable=False),
+    sa.Column('speaker', sa.SmallInteger(), nullable=True),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('recording_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['recording_id'], ['recordings.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transcript_segments_recording_start', 'transcript_segments', ['recording_id', 'start_ms'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transcript_segments_recording_start', table_name='transcript_segments')
+    op.drop_table('transcript_segments')
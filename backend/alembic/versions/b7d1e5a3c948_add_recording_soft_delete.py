@@ -0,0 +1,32 @@
+"""add_recording_soft_delete
+
+Revision ID: b7d1e5a3c948
+Revises: f4b8d2c6a917
+Create Date: 2026-10-19 18:05:52.730166
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d1e5a3c948'
+down_revision: Union[str, None] = 'f4b8d2c6a917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('recordings', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_recordings_deleted_at', 'recordings', ['deleted_at'], unique=False,
+        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+        sqlite_where=sa.text('deleted_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recordings_deleted_at', table_name='recordings')
+    op.drop_column('recordings', 'deleted_at')
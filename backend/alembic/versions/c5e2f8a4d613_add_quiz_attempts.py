@@ -0,0 +1,55 @@
+"""add_quiz_attempts
+
+Revision ID: c5e2f8a4d613
+Revises: b7d1e5a3c948
+Create Date: 2026-10-19 19:12:37.604381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2f8a4d613'
+down_revision: Union[str, None] = 'b7d1e5a3c948'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('quiz_attempts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('correct_answers', sa.Integer(), nullable=True),
+    sa.Column('total_questions', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_quiz_attempts_user_created', 'quiz_attempts', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_quiz_attempts_quiz_user', 'quiz_attempts', ['quiz_id', 'user_id'], unique=False)
+    op.create_table('question_answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('attempt_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('selected_option', sa.Integer(), nullable=False),
+    sa.Column('is_correct', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['attempt_id'], ['quiz_attempts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['question_id'], ['quiz_questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('attempt_id', 'question_id', name='uq_question_answers_attempt_question')
+    )
+    op.create_index('ix_question_answers_question_correct', 'question_answers', ['question_id', 'is_correct'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_question_answers_question_correct', table_name='question_answers')
+    op.drop_table('question_answers')
+    op.drop_index('ix_quiz_attempts_quiz_user', table_name='quiz_attempts')
+    op.drop_index('ix_quiz_attempts_user_created', table_name='quiz_attempts')
+    op.drop_table('quiz_attempts')
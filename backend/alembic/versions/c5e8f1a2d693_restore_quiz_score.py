@@ -0,0 +1,27 @@
+"""restore_quiz_score
+
+Revision ID: c5e8f1a2d693
+Revises: a41d7c9e3b25
+Create Date: 2026-10-19 13:05:47.260914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8f1a2d693'
+down_revision: Union[str, None] = 'a41d7c9e3b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Quiz submission writes a score and recording progress averages it
+    op.add_column('quizzes', sa.Column('score', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('quizzes', 'score')
@@ -0,0 +1,51 @@
+"""add_access_path_indexes
+
+Revision ID: d7a2b4f91c36
+Revises: c5e8f1a2d693
+Create Date: 2026-10-19 14:20:31.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a2b4f91c36'
+down_revision: Union[str, None] = 'c5e8f1a2d693'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Listings and keyset cursors filter on the owner and order by creation time
+    op.create_index('ix_recordings_user_created', 'recordings', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_quizzes_recording_created', 'quizzes', ['recording_id', 'created_at', 'id'], unique=False,
+        postgresql_include=['score'],
+    )
+    op.create_index('ix_quiz_questions_quiz_id', 'quiz_questions', ['quiz_id'], unique=False)
+    op.create_index(
+        'ix_research_recommendations_recording_created', 'research_recommendations',
+        ['recording_id', 'created_at', 'id'], unique=False,
+    )
+    op.create_index('ix_saved_papers_user_created', 'saved_papers', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_study_sessions_recording_user', 'study_sessions', ['recording_id', 'user_id'], unique=False)
+    # Study statistics only aggregate finished sessions
+    op.create_index(
+        'ix_study_sessions_user_finished', 'study_sessions', ['user_id', 'recording_id'], unique=False,
+        postgresql_include=['duration', 'end_time'],
+        postgresql_where=sa.text('duration IS NOT NULL'),
+        sqlite_where=sa.text('duration IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_study_sessions_user_finished', table_name='study_sessions')
+    op.drop_index('ix_study_sessions_recording_user', table_name='study_sessions')
+    op.drop_index('ix_saved_papers_user_created', table_name='saved_papers')
+    op.drop_index('ix_research_recommendations_recording_created', table_name='research_recommendations')
+    op.drop_index('ix_quiz_questions_quiz_id', table_name='quiz_questions')
+    op.drop_index('ix_quizzes_recording_created', table_name='quizzes')
+    op.drop_index('ix_recordings_user_created', table_name='recordings')
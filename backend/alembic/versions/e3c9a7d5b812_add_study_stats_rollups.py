@@ -0,0 +1,56 @@
+"""add_study_stats_rollups
+
+Revision ID: e3c9a7d5b812
+Revises: d7a2b4f91c36
+Create Date: 2026-10-19 15:02:18.447391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3c9a7d5b812'
+down_revision: Union[str, None] = 'd7a2b4f91c36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_study_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_sessions', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_duration', sa.Float(), server_default='0', nullable=False),
+    sa.Column('last_session', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('recording_study_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('recording_id', sa.Integer(), nullable=False),
+    sa.Column('total_sessions', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_duration', sa.Float(), server_default='0', nullable=False),
+    sa.Column('last_session', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['recording_id'], ['recordings.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'recording_id')
+    )
+    # Backfill from existing finished sessions; `python -m app.db.rollups` does the same later
+    op.execute(
+        "INSERT INTO user_study_stats (user_id, total_sessions, total_duration, last_session) "
+        "SELECT user_id, count(id), sum(duration), max(end_time) FROM study_sessions "
+        "WHERE duration IS NOT NULL AND user_id IS NOT NULL GROUP BY user_id"
+    )
+    op.execute(
+        "INSERT INTO recording_study_stats (user_id, recording_id, total_sessions, total_duration, last_session) "
+        "SELECT user_id, recording_id, count(id), sum(duration), max(end_time) FROM study_sessions "
+        "WHERE duration IS NOT NULL AND user_id IS NOT NULL AND recording_id IS NOT NULL "
+        "GROUP BY user_id, recording_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('recording_study_stats')
+    op.drop_table('user_study_stats')
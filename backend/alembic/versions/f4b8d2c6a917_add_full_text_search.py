@@ -0,0 +1,90 @@
+"""add_full_text_search
+
+Revision ID: f4b8d2c6a917
+Revises: e3c9a7d5b812
+Create Date: 2026-10-19 16:41:09.318254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8d2c6a917'
+down_revision: Union[str, None] = 'e3c9a7d5b812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, searched columns, PostgreSQL weight per column)
+SOURCES = [
+    ('recordings', ['title', 'summary', 'transcription'], ['A', 'B', 'C']),
+    ('study_sessions', ['notes'], ['B']),
+    ('saved_papers', ['notes'], ['B']),
+]
+
+
+def _vector(columns, weights, row=''):
+    return " || ".join(
+        f"setweight(to_tsvector('english', coalesce({row}{column}, '')), '{weight}')"
+        for column, weight in zip(columns, weights)
+    )
+
+
+def _upgrade_postgresql() -> None:
+    for table, columns, weights in SOURCES:
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(
+            f"CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$ "
+            f"BEGIN NEW.search_vector := {_vector(columns, weights, 'NEW.')}; RETURN NEW; END "
+            f"$$ LANGUAGE plpgsql"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {', '.join(columns)} "
+            f"ON {table} FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()"
+        )
+        op.execute(f"UPDATE {table} SET search_vector = {_vector(columns, weights)}")
+        op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def _upgrade_sqlite() -> None:
+    for table, columns, _ in SOURCES:
+        fts = f"{table}_fts"
+        names = ", ".join(columns)
+        remove = (
+            f"INSERT INTO {fts}({fts}, rowid, {names}) "
+            f"VALUES ('delete', old.id, {', '.join('old.' + column for column in columns)});"
+        )
+        add = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {', '.join('new.' + column for column in columns)});"
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', "
+            f"content_rowid='id', tokenize='porter unicode61')"
+        )
+        op.execute(f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN {add} END")
+        op.execute(f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN {remove} END")
+        op.execute(f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN {remove} {add} END")
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        _upgrade_postgresql()
+    elif dialect == 'sqlite':
+        _upgrade_sqlite()
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table, _, _ in reversed(SOURCES):
+        if dialect == 'postgresql':
+            op.drop_index(f'ix_{table}_search_vector', table_name=table)
+            op.execute(f"DROP TRIGGER {table}_search_vector ON {table}")
+            op.execute(f"DROP FUNCTION {table}_search_vector_update()")
+            op.drop_column(table, 'search_vector')
+        elif dialect == 'sqlite':
+            for action in ('insert', 'delete', 'update'):
+                op.execute(f"DROP TRIGGER {table}_fts_{action}")
+            op.execute(f"DROP TABLE {table}_fts")
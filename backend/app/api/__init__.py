@@ -9,6 +9,7 @@ from app.routers import (
     recordings,
     quizzes,
     research,
+    search,
     study
 )
 
@@ -24,10 +25,14 @@ from .responses import (
     create_success_response,
     create_error_response,
 )
+from .fields import FieldSelection, loaded_columns
 from .pagination import (
     PaginationParams,
+    paginate,
+    paginate_keyset,
     paginate_query,
 )
+from .streaming import RangeFileResponse
 
 # Create API router
 api_router = APIRouter()
@@ -39,6 +44,7 @@ api_router.include_router(recordings.router, prefix="/recordings", tags=["record
 api_router.include_router(quizzes.router, prefix="/quizzes", tags=["quizzes"])
 api_router.include_router(research.router, prefix="/research", tags=["research"])
 api_router.include_router(study.router, prefix="/study", tags=["study"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
 
 __all__ = [
     "api_router",
@@ -50,6 +56,11 @@ __all__ = [
     "create_response",
     "create_success_response",
     "create_error_response",
+    "FieldSelection",
+    "loaded_columns",
     "PaginationParams",
+    "paginate",
+    "paginate_keyset",
     "paginate_query",
+    "RangeFileResponse",
 ]
@@ -1,25 +1,31 @@
 """
 API dependencies and utilities.
 """
-from typing import Generator, Optional
+from typing import AsyncGenerator, Optional
 
-from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.database import get_session
+from app.db.replicas import get_read_session, last_write_from
 from app.core.auth import get_current_user
 from app.models.user import User
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Get database session.
+    Get an async database session.
     """
-    try:
-        db = SessionLocal()
+    async with get_session() as db:
+        yield db
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get an async database session for read-only endpoints. It is on a
+    replica unless the client wrote recently or the replicas lag behind.
+    """
+    async with get_read_session(last_write=last_write_from(request.cookies)) as db:
         yield db
-    finally:
-        db.close()
 
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
@@ -0,0 +1,56 @@
+"""
+Field selection for list endpoints.
+"""
+from typing import Any, Dict, Iterable, Optional, Set
+
+from fastapi import Query
+from sqlalchemy import inspect
+
+from app.api.errors import ValidationError
+
+
+class FieldSelection:
+    """
+    Large fields a list endpoint should include.
+
+    List queries leave heavy columns (transcriptions, summaries, abstracts)
+    out of the SELECT; clients that need them name them in `fields`.
+    """
+    def __init__(
+        self,
+        fields: Optional[str] = Query(
+            None,
+            description="Comma-separated large fields to include in list items, "
+                        "e.g. transcription,summary. Omitted by default.",
+        ),
+    ):
+        self.names: Set[str] = (
+            {name.strip() for name in fields.split(",") if name.strip()} if fields else set()
+        )
+
+    def include(self, available: Iterable[str]) -> Set[str]:
+        """The requested fields, checked against those the listing can add"""
+        available = tuple(available)
+        unknown = self.names - set(available)
+        if unknown:
+            raise ValidationError(
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+                code="INVALID_FIELDS",
+                params={"available": sorted(available)},
+            )
+        return self.names
+
+
+def loaded_columns(obj: Any, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    An ORM object's column values as response data. Only columns already
+    loaded are included, so those a list query deferred are left out
+    rather than loaded (or raised on) row by row.
+    """
+    state = inspect(obj)
+    exclude = set(exclude)
+    return {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict and attr.key not in exclude
+    }
@@ -1,15 +1,30 @@
 """
 API pagination utilities.
 """
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar, Union
 
 from fastapi import Query
+from pydantic import BaseModel
 from pydantic.generics import GenericModel
-from sqlalchemy.orm import Query as SQLAQuery
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.utils.count_cache import CountKey, count_cache
+
+from .errors import ValidationError
 
 DataT = TypeVar("DataT")
 
 
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+
+
 class PaginationParams:
     """
     Pagination parameters.
@@ -18,9 +33,27 @@ class PaginationParams:
         self,
         page: int = Query(1, ge=1, description="Page number"),
         per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+        cursor: Optional[str] = Query(
+            None,
+            description="Keyset pagination cursor from page_info.next_cursor; "
+                        "pass an empty cursor for the first page. Replaces page.",
+        ),
+        count: Optional[str] = Query(
+            None,
+            pattern="^(exact|cached|estimated|none)$",
+            description="How to compute the total: exact, cached, estimated "
+                        "(planner statistics) or none. Defaults to exact for "
+                        "page numbers and none for cursors.",
+        ),
     ):
         self.page = page
         self.per_page = per_page
+        self.cursor = cursor
+        self.count = count or (COUNT_NONE if cursor is not None else COUNT_EXACT)
+
+    @property
+    def use_cursor(self) -> bool:
+        return self.cursor is not None
 
     @property
     def offset(self) -> int:
@@ -31,40 +64,122 @@ class PageInfo(BaseModel):
     """
     Pagination information.
     """
-    total: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
     page: int
     per_page: int
-    pages: int
+    pages: Optional[int] = None
     has_next: bool
     has_prev: bool
 
 
+class CursorPageInfo(BaseModel):
+    """
+    Keyset pagination information.
+    """
+    per_page: int
+    has_next: bool
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+
 class PaginatedResponse(GenericModel, Generic[DataT]):
     """
     Paginated response model.
     """
     items: List[DataT]
-    page_info: PageInfo
+    page_info: Union[PageInfo, CursorPageInfo]
+
+
+async def estimate_count(db: AsyncSession, stmt: Select) -> Optional[int]:
+    """
+    Row estimate for a statement from the PostgreSQL planner's statistics.
+    Costs a plan, not a scan; returns None on other databases.
+    """
+    connection = await db.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+    compiled = stmt.order_by(None).compile(dialect=connection.dialect)
+    # Driver-level execution takes the parameters in the dialect's own style
+    if compiled.positional:
+        parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        parameters = compiled.params
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", parameters)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
 
+async def _exact_count(db: AsyncSession, stmt: Select) -> int:
+    return await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
 
-def paginate_query(
-    query: SQLAQuery,
+
+async def count_total(
+    db: AsyncSession,
+    stmt: Select,
+    strategy: str,
+    cache_key: Optional[CountKey] = None,
+) -> Tuple[Optional[int], bool]:
+    """
+    Total for a listing using the requested strategy.
+    Returns (total, is_estimate); total is None for the "none" strategy.
+    """
+    if strategy == COUNT_NONE:
+        return None, False
+    if strategy == COUNT_ESTIMATED:
+        estimate = await estimate_count(db, stmt)
+        if estimate is not None:
+            return estimate, True
+    elif strategy == COUNT_CACHED and cache_key is not None:
+        total = count_cache.get(cache_key)
+        if total is None:
+            total = await _exact_count(db, stmt)
+            count_cache.set(cache_key, total)
+        return total, False
+    return await _exact_count(db, stmt), False
+
+
+async def _fetch(db: AsyncSession, stmt: Select) -> List[Any]:
+    result = await db.execute(stmt)
+    # Single-entity statements yield instances, others yield rows
+    if len(stmt.column_descriptions) == 1:
+        return list(result.scalars().all())
+    return list(result.all())
+
+
+async def paginate_query(
+    db: AsyncSession,
+    stmt: Select,
     params: PaginationParams,
+    cache_key: Optional[CountKey] = None,
 ) -> Dict[str, Any]:
     """
-    Paginate a SQLAlchemy query.
+    Paginate a SQLAlchemy select statement.
+
+    The total is computed per `params.count`; `cache_key` is the
+    (user id, resource) the cached strategy stores it under. Without an
+    exact total, has_next comes from fetching one extra row.
     """
-    total = query.count()
-    items = query.offset(params.offset).limit(params.per_page).all()
-    
-    pages = (total + params.per_page - 1) // params.per_page
-    has_next = params.page < pages
+    total, is_estimate = await count_total(db, stmt, params.count, cache_key)
+    rows = await _fetch(db, stmt.offset(params.offset).limit(params.per_page + 1))
+    items = rows[:params.per_page]
+
+    if total is not None and not is_estimate:
+        pages = (total + params.per_page - 1) // params.per_page
+        has_next = params.page < pages
+    else:
+        pages = (total + params.per_page - 1) // params.per_page if total is not None else None
+        has_next = len(rows) > params.per_page
     has_prev = params.page > 1
 
     return {
         "items": items,
         "page_info": PageInfo(
             total=total,
+            total_is_estimate=is_estimate,
             page=params.page,
             per_page=params.per_page,
             pages=pages,
@@ -72,3 +187,111 @@ def paginate_query(
             has_prev=has_prev,
         ),
     }
+
+
+def _encode_position(values: List[Any]) -> str:
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_position(cursor: str) -> List[Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Opaque cursor for the position after a row in (created_at, id) order.
+    """
+    return _encode_position([created_at.isoformat(), id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+    """
+    try:
+        created_at, id = _decode_position(cursor)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise ValidationError(detail="Invalid pagination cursor", code="INVALID_CURSOR")
+
+
+def encode_rank_cursor(rank: float, kind: str, id: int) -> str:
+    """
+    Opaque cursor for the position after a ranked result, in
+    (rank descending, kind, id) order.
+    """
+    return _encode_position([rank, kind, id])
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, str, int]:
+    """
+    Decode a cursor produced by `encode_rank_cursor`.
+    """
+    try:
+        rank, kind, id = _decode_position(cursor)
+        return float(rank), str(kind), int(id)
+    except (ValueError, TypeError):
+        raise ValidationError(detail="Invalid pagination cursor", code="INVALID_CURSOR")
+
+
+def _entity(item: Any, model: Any) -> Any:
+    # Rows from multi-entity queries carry the model under its class name
+    return item if isinstance(item, model) else getattr(item, model.__name__)
+
+
+async def paginate_keyset(
+    db: AsyncSession,
+    stmt: Select,
+    params: PaginationParams,
+    model: Any,
+    cache_key: Optional[CountKey] = None,
+) -> Dict[str, Any]:
+    """
+    Paginate a SQLAlchemy select statement by keyset on (model.created_at, model.id),
+    newest first. Each page costs the same however deep it is, and no count
+    is needed: one extra row is fetched to tell whether there is a next page.
+    """
+    total, is_estimate = await count_total(db, stmt, params.count, cache_key)
+
+    order = (model.created_at.desc(), model.id.desc())
+    stmt = stmt.order_by(None).order_by(*order)
+    if params.cursor:
+        created_at, last_id = decode_cursor(params.cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, last_id))
+
+    rows = await _fetch(db, stmt.limit(params.per_page + 1))
+    has_next = len(rows) > params.per_page
+    items = rows[:params.per_page]
+
+    next_cursor = None
+    if has_next:
+        last = _entity(items[-1], model)
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return {
+        "items": items,
+        "page_info": CursorPageInfo(
+            per_page=params.per_page,
+            has_next=has_next,
+            next_cursor=next_cursor,
+            total=total,
+            total_is_estimate=is_estimate,
+        ),
+    }
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    params: PaginationParams,
+    model: Any,
+    cache_key: Optional[CountKey] = None,
+) -> Dict[str, Any]:
+    """
+    Paginate by cursor when the client sent one, otherwise by page number.
+    """
+    if params.use_cursor:
+        return await paginate_keyset(db, stmt, params, model, cache_key)
+    return await paginate_query(db, stmt, params, cache_key)
@@ -0,0 +1,181 @@
+"""
+API streaming utilities.
+"""
+import hashlib
+import json
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.utils.storage import FileStorage, storage as default_storage
+
+ZERO_COPY_SEND = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    """
+    Raised when a Range header cannot be satisfied for the file size.
+    """
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``bytes=`` header into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored (malformed, not bytes, or
+    multiple ranges), in which case the full file is served.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return max(file_size - suffix, 0), file_size - 1
+        start = int(first)
+        end = int(last) if last else file_size - 1
+    except ValueError:
+        return None
+
+    if start >= file_size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, file_size - 1)
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Events message.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def make_etag(size: int, mtime: float) -> str:
+    """
+    Build a strong validator from the file size and modification time.
+    """
+    digest = hashlib.md5(f"{mtime}-{size}".encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+class RangeFileResponse(Response):
+    """
+    File response with Range, ETag and Last-Modified support.
+
+    Bytes are handed to the server with the ASGI zero-copy send extension
+    (sendfile) when it is advertised, and read in chunks otherwise.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        request: Request,
+        media_type: Optional[str] = None,
+        file_storage: FileStorage = default_storage,
+    ) -> None:
+        self.path = path
+        self.file_storage = file_storage
+        self.range: Optional[Tuple[int, int]] = None
+
+        stat_result = file_storage.stat(path)
+        if stat_result is None:
+            raise FileNotFoundError(path)
+        self.file_size = stat_result.st_size
+
+        etag = make_etag(stat_result.st_size, stat_result.st_mtime)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+            "cache-control": "private, max-age=0, must-revalidate",
+        }
+        status_code = 200
+
+        range_header = request.headers.get("range")
+        if self._not_modified(request, etag, stat_result.st_mtime):
+            status_code = 304
+        elif range_header and self._if_range_matches(request, etag, last_modified):
+            try:
+                self.range = parse_range_header(range_header, self.file_size)
+            except RangeNotSatisfiable:
+                status_code = 416
+                headers["content-range"] = f"bytes */{self.file_size}"
+                headers["content-length"] = "0"
+
+        if self.range is not None:
+            start, end = self.range
+            status_code = 206
+            headers["content-range"] = f"bytes {start}-{end}/{self.file_size}"
+            headers["content-length"] = str(end - start + 1)
+        elif status_code == 200:
+            headers["content-length"] = str(self.file_size)
+
+        super().__init__(
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type or mimetypes.guess_type(path)[0] or "application/octet-stream",
+        )
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    @staticmethod
+    def _if_range_matches(request: Request, etag: str, last_modified: str) -> bool:
+        if_range = request.headers.get("if-range")
+        return if_range is None or if_range in (etag, last_modified)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if self.status_code in (304, 416) or scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        start, end = self.range if self.range is not None else (0, self.file_size - 1)
+        count = end - start + 1
+
+        if ZERO_COPY_SEND in scope.get("extensions", {}):
+            with self.file_storage.open_for_send(self.path) as file:
+                await send({
+                    "type": ZERO_COPY_SEND,
+                    "file": file.fileno(),
+                    "offset": start,
+                    "count": count,
+                    "more_body": False,
+                })
+            return
+
+        async for chunk in self.file_storage.read_range(self.path, start, end, self.chunk_size):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -1,11 +1,8 @@
-import os
-import io
 import tempfile
 from typing import Tuple, Union
-import soundfile as sf
-import librosa
-import numpy as np
 from pydub import AudioSegment
+from app.core.features import compute_features
+from app.utils.storage import ANALYSIS_SAMPLE_RATE, storage
 
 def process_audio_file(file_input: Union[str, bytes]) -> Tuple[str, float]:
     """
@@ -57,22 +54,20 @@ def convert_to_wav(file_path: str) -> str:
     except Exception as e:
         raise Exception(f"Error converting audio to WAV: {str(e)}")
 
-def get_audio_features(file_path: str) -> dict:
+def get_audio_features(file_path: str, segment_seconds: float = 10.0) -> dict:
     """
-    Extract audio features using librosa
+    Extract audio features from a single STFT at speech sample rate.
+    Includes global means and a per-segment `timeline` (loudness, speech rate)
     """
     try:
-        # Load the audio file
-        y, sr = librosa.load(file_path)
-        
-        # Extract features
-        features = {
-            'tempo': librosa.beat.tempo(y=y, sr=sr)[0],
-            'rms': float(np.mean(librosa.feature.rms(y=y))),
-            'zero_crossing_rate': float(np.mean(librosa.feature.zero_crossing_rate(y=y))),
-            'spectral_centroid': float(np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)))
-        }
-        
-        return features
+        # Read the recording's 16 kHz mono analysis samples, decoding them
+        # just for this call (and discarding them after) if no job has them
+        built = not storage.analysis_path(file_path).exists()
+        try:
+            y = storage.load_analysis(file_path)
+            return compute_features(y, ANALYSIS_SAMPLE_RATE, segment_seconds=segment_seconds)
+        finally:
+            if built:
+                storage.delete_analysis(file_path)
     except Exception as e:
         raise Exception(f"Error extracting audio features: {str(e)}")
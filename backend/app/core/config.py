@@ -10,10 +10,20 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
-    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "20"))
-    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # Connections all workers together may hold on each database server;
+    # every worker's pools split an equal share of it
+    DB_CONNECTION_BUDGET: int = int(os.getenv("DB_CONNECTION_BUDGET", "40"))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))  # Worker processes (read by uvicorn too)
     DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Recycle connections after 30 minutes
     DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+    # Read replicas (comma-separated URLs) for read-only endpoints
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_LAG_CHECK_SECONDS: float = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "1"))
+    REPLICA_LAG_PROBE_TIMEOUT: float = float(os.getenv("REPLICA_LAG_PROBE_TIMEOUT", "0.5"))
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    METRICS_TOKEN: Optional[str] = os.getenv("METRICS_TOKEN") or None  # bearer token for /metrics; unset disables it
     
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
@@ -55,7 +65,13 @@ class Settings(BaseSettings):
     # Storage
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploads")
     MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", str(50 * 1024 * 1024)))  # 50MB
-    ALLOWED_UPLOAD_EXTENSIONS: List[str] = [".mp3", ".wav", ".m4a", ".ogg"]
+    ALLOWED_UPLOAD_EXTENSIONS: List[str] = [".mp3", ".wav", ".m4a", ".ogg", ".opus"]
+    AUDIO_STORAGE_PROFILE: str = os.getenv("AUDIO_STORAGE_PROFILE", "opus")  # opus, aac or wav
+    AUDIO_STORAGE_BITRATE: Optional[str] = os.getenv("AUDIO_STORAGE_BITRATE")  # e.g. 32k; overrides the profile's
+    NOISE_REDUCTION_PRESET: str = os.getenv("NOISE_REDUCTION_PRESET", "fast")  # off, fast or quality
+    PIPELINED_INGEST: bool = os.getenv("PIPELINED_INGEST", "true").lower() == "true"
+    TRANSCRIPT_STALL_TIMEOUT: int = int(os.getenv("TRANSCRIPT_STALL_TIMEOUT", "600"))  # seconds without progress before a transcript stream gives up
+    LIVE_AUTH_TIMEOUT: int = int(os.getenv("LIVE_AUTH_TIMEOUT", "10"))  # seconds a live recording socket may wait for its token
     
     # Redis Cache (for rate limiting and session storage)
     REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
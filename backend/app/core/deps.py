@@ -1,13 +1,13 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.security import verify_password
-from app.db.session import SessionLocal
+from app.db.database import get_session
 from app.models.user import User
 from app.schemas.token import TokenPayload
 
@@ -15,15 +15,27 @@ oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
-def get_db() -> Generator:
-    try:
-        db = SessionLocal()
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_session() as db:
         yield db
-    finally:
-        db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_user_from_token(db: AsyncSession, token: str) -> Optional[User]:
+    """
+    Resolve an access token to a user without raising, for transports
+    (like WebSockets) that can't carry HTTP error responses.
+    """
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=["HS256"]
+        )
+        token_data = TokenPayload(**payload)
+        user_id = int(token_data.sub)
+    except (JWTError, ValidationError, TypeError, ValueError):
+        return None
+    return await db.get(User, user_id)
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     try:
@@ -31,12 +43,13 @@ def get_current_user(
             token, settings.SECRET_KEY, algorithms=["HS256"]
         )
         token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
+        user_id = int(token_data.sub)
+    except (JWTError, ValidationError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == token_data.sub).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,158 @@
+"""Single-STFT audio feature extraction for NoteWyze AI."""
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Analysis parameters tuned for speech at 16 kHz: 32 ms windows, 10 ms hop
+FEATURE_SAMPLE_RATE = 16000
+N_FFT = 512
+HOP_LENGTH = 160
+STFT_BLOCK_FRAMES = 4096
+
+# Band holding most syllable energy, used for the speech-rate estimate
+SPEECH_BAND_HZ = (300.0, 3000.0)
+
+
+def frame_signal(y: np.ndarray, frame_length: int = N_FFT, hop_length: int = HOP_LENGTH) -> np.ndarray:
+    """
+    Return a strided [n_frames, frame_length] view of a centered, padded signal.
+    No samples are copied; the STFT and time-domain features share this view.
+    """
+    y = np.pad(np.asarray(y, dtype=np.float32), frame_length // 2, mode="reflect" if len(y) > frame_length // 2 else "constant")
+    if len(y) < frame_length:
+        y = np.pad(y, (0, frame_length - len(y)))
+    frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)
+    return frames[::hop_length]
+
+
+def _local_peaks(x: np.ndarray, threshold: np.ndarray, min_distance: int) -> np.ndarray:
+    """Indices of local maxima above threshold, at least min_distance apart"""
+    if len(x) < 3:
+        return np.zeros(0, dtype=int)
+    peaks = np.flatnonzero((x[1:-1] > x[:-2]) & (x[1:-1] >= x[2:]) & (x[1:-1] > threshold[1:-1])) + 1
+    if len(peaks) < 2:
+        return peaks
+    # Drop peaks that follow the previously kept one too closely
+    keep = [peaks[0]]
+    for peak in peaks[1:]:
+        if peak - keep[-1] >= min_distance:
+            keep.append(peak)
+    return np.asarray(keep)
+
+
+def _estimate_tempo(onset_env: np.ndarray, frame_rate: float) -> float:
+    """Tempo (BPM) from the onset envelope autocorrelation with a log-normal prior at 120 BPM"""
+    if len(onset_env) < 4 or not np.any(onset_env):
+        return 0.0
+    env = onset_env - onset_env.mean()
+    n = int(2 ** np.ceil(np.log2(2 * len(env))))
+    spectrum = np.fft.rfft(env, n)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum), n)[:len(env)]
+
+    min_lag = max(int(frame_rate * 60 / 300), 1)
+    max_lag = min(int(frame_rate * 60 / 30), len(autocorr) - 1)
+    if max_lag <= min_lag:
+        return 0.0
+    lags = np.arange(min_lag, max_lag + 1)
+    bpms = 60.0 * frame_rate / lags
+    prior = np.exp(-0.5 * np.log2(bpms / 120.0) ** 2)
+    best = lags[np.argmax(autocorr[min_lag:max_lag + 1] * prior)]
+    return float(60.0 * frame_rate / best)
+
+
+def compute_features(y: np.ndarray, sr: int = FEATURE_SAMPLE_RATE,
+                     segment_seconds: float = 10.0) -> Dict[str, Any]:
+    """
+    Compute every audio feature from one framing and one STFT.
+
+    Returns the global means used so far (tempo, rms, zero_crossing_rate,
+    spectral_centroid) plus a `timeline` of per-segment features
+    (loudness, speech rate, speech ratio, spectral centroid) so long
+    recordings can be inspected over time.
+    """
+    frames = frame_signal(y)
+    window = np.hanning(N_FFT + 1)[:-1].astype(np.float32)
+    freqs = np.fft.rfftfreq(N_FFT, d=1.0 / sr)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+    frame_rate = sr / HOP_LENGTH
+    window_energy = N_FFT * np.sum(window ** 2)
+
+    n_frames = len(frames)
+    rms = np.empty(n_frames, dtype=np.float32)
+    zcr = np.empty(n_frames, dtype=np.float32)
+    centroid = np.empty(n_frames, dtype=np.float32)
+    band_power = np.empty(n_frames, dtype=np.float32)
+    onset_env = np.zeros(n_frames, dtype=np.float32)
+
+    # The STFT is computed in blocks so only per-frame scalars are kept for
+    # the whole recording; a full-resolution spectrogram of an hour-long
+    # lecture would not fit comfortably in memory
+    previous_log_power = None
+    for start in range(0, n_frames, STFT_BLOCK_FRAMES):
+        block = frames[start:start + STFT_BLOCK_FRAMES]
+        end = start + len(block)
+        magnitude = np.abs(np.fft.rfft(block * window, axis=1)).astype(np.float32)
+        power = magnitude ** 2
+
+        # RMS from the spectrum (Parseval), compensating for the window energy
+        edge_power = 0.5 * (power[:, 0] + power[:, -1])
+        rms[start:end] = np.sqrt(2.0 * (power.sum(axis=1) - edge_power) / window_energy)
+
+        # Zero crossings come from the same frames, no second pass over the signal
+        signs = np.signbit(block)
+        zcr[start:end] = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        total_magnitude = magnitude.sum(axis=1)
+        centroid[start:end] = np.divide(magnitude @ freqs, total_magnitude,
+                                        out=np.zeros_like(total_magnitude), where=total_magnitude > 0)
+        band_power[start:end] = power[:, band].sum(axis=1)
+
+        # Spectral flux onset envelope, carried across block boundaries
+        log_power = np.log1p(power)
+        if previous_log_power is not None:
+            log_power_with_prev = np.vstack([previous_log_power, log_power])
+            onset_env[start:end] = np.maximum(np.diff(log_power_with_prev, axis=0), 0.0).sum(axis=1)
+        else:
+            onset_env[start + 1:end] = np.maximum(np.diff(log_power, axis=0), 0.0).sum(axis=1)
+        previous_log_power = log_power[-1:]
+
+    # Speech activity and syllable nuclei from the speech-band envelope
+    band_db = 10.0 * np.log10(band_power + 1e-10)
+    smooth = np.convolve(band_db, np.ones(5) / 5, mode="same")
+    noise_floor = np.percentile(smooth, 10) if len(smooth) else 0.0
+    voiced = smooth > noise_floor + 10.0
+    peak_floor = np.where(voiced, noise_floor + 10.0, np.inf)
+    nuclei = _local_peaks(smooth, peak_floor, min_distance=int(0.1 * frame_rate))
+
+    loudness_db = 20.0 * np.log10(rms + 1e-10)
+
+    # Per-segment timeline via reduceat over frame index boundaries
+    seg_frames = max(int(segment_seconds * frame_rate), 1)
+    starts = np.arange(0, n_frames, seg_frames)
+    counts = np.diff(np.append(starts, n_frames))
+    seg_voiced = np.add.reduceat(voiced.astype(np.float32), starts)
+    seg_loudness = np.add.reduceat(loudness_db, starts) / counts
+    seg_centroid = np.add.reduceat(centroid, starts) / counts
+    seg_nuclei = np.bincount(nuclei // seg_frames, minlength=len(starts))[:len(starts)]
+
+    timeline: List[Dict[str, float]] = []
+    for i, start in enumerate(starts):
+        voiced_seconds = seg_voiced[i] / frame_rate
+        timeline.append({
+            "start": float(start / frame_rate),
+            "end": float(min(start + counts[i], n_frames) / frame_rate),
+            "loudness_db": float(seg_loudness[i]),
+            "speech_rate": float(seg_nuclei[i] / voiced_seconds) if voiced_seconds > 0 else 0.0,
+            "speech_ratio": float(seg_voiced[i] / counts[i]),
+            "spectral_centroid": float(seg_centroid[i]),
+        })
+
+    total_voiced_seconds = voiced.sum() / frame_rate
+    return {
+        "tempo": _estimate_tempo(onset_env, frame_rate),
+        "rms": float(rms.mean()),
+        "zero_crossing_rate": float(zcr.mean()),
+        "spectral_centroid": float(centroid.mean()),
+        "speech_rate": float(len(nuclei) / total_voiced_seconds) if total_voiced_seconds > 0 else 0.0,
+        "timeline": timeline,
+    }
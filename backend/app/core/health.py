@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import Dict, Any
 import httpx
@@ -29,11 +30,23 @@ async def check_external_connectivity() -> bool:
         logger.error(f"External connectivity check failed: {str(e)}")
         return False
 
+async def check_database() -> bool:
+    """Check if the database is reachable (the check blocks, so off the event loop)."""
+    return await asyncio.get_event_loop().run_in_executor(None, check_db_connection)
+
+async def check_services() -> Dict[str, bool]:
+    """Check every service the API depends on, concurrently."""
+    database, gemini, external = await asyncio.gather(
+        check_database(), check_gemini_connection(), check_external_connectivity()
+    )
+    return {"database": database, "gemini": gemini, "external_connectivity": external}
+
 async def get_health_status() -> Dict[str, Any]:
     """Get health status of all services."""
-    db_healthy = await check_db_connection()
-    gemini_healthy = await check_gemini_connection()
-    external_connectivity = await check_external_connectivity()
+    services = await check_services()
+    db_healthy = services["database"]
+    gemini_healthy = services["gemini"]
+    external_connectivity = services["external_connectivity"]
     
     all_healthy = all([db_healthy, external_connectivity])
     
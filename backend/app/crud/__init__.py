@@ -1,8 +1,15 @@
-from .crud_user import user
-from .crud_recording import recording
-from .crud_research import research
-from .crud_study import study
-from .crud_quiz import quiz
+from .crud_user import user, async_user
+from .crud_recording import recording, async_recording
+from .crud_research import research, async_research
+from .crud_study import study, async_study
+from .crud_quiz import async_quiz
+from .crud_transcript import transcript_segment, async_transcript_segment
+from .crud_search import async_search
+from .crud_export import async_export
 
 # For convenience, import all crud operations here
-__all__ = ["user", "recording", "research", "study", "quiz"]
+__all__ = [
+    "user", "recording", "research", "study", "transcript_segment",
+    "async_user", "async_recording", "async_research", "async_study", "async_quiz",
+    "async_transcript_segment", "async_search", "async_export",
+]
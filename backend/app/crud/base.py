@@ -1,36 +1,130 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Set, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Insert, Select, Update, insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
+from sqlalchemy.orm.attributes import set_committed_value
 from app.db.base_class import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+def deferred_options(model: Any, columns: Iterable[str], fields: Optional[Set[str]] = None) -> List[Any]:
+    """
+    Loader options that leave `columns` out of a query unless named in
+    `fields`. Accessing a deferred column raises rather than lazy loading it
+    row by row.
+    """
+    fields = fields or set()
+    return [defer(getattr(model, name), raiseload=True) for name in columns if name not in fields]
+
+def _column_changes(db_obj: Any, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Values from `obj_in` for the object's mapped columns, minus those equal to
+    what is already loaded. Unloaded attributes count as changed, so nothing
+    (like a large transcription) is read just to compare it.
+    """
+    update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+    loaded = inspect(db_obj).dict
+    return {
+        attr.key: update_data[attr.key]
+        for attr in inspect(type(db_obj)).column_attrs
+        if attr.key in update_data
+        and not (attr.key in loaded and loaded[attr.key] == update_data[attr.key])
+    }
+
+def _has_update_events(model: Any) -> bool:
+    # Bulk UPDATE statements bypass mapper events, so models that maintain
+    # state in them (e.g. study-stats rollups) must go through a flush
+    dispatch = inspect(model).dispatch
+    return bool(dispatch.before_update or dispatch.after_update)
+
+def _update_returning(db_obj: Any, changes: Dict[str, Any]) -> Update:
+    """
+    One UPDATE for just the changed columns, returning them along with the
+    columns the database recomputes on update (like updated_at)
+    """
+    model = type(db_obj)
+    mapper = inspect(model)
+    returned = [
+        getattr(model, attr.key) for attr in mapper.column_attrs
+        if attr.key in changes or any(
+            column.onupdate is not None or column.server_onupdate is not None
+            for column in attr.columns
+        )
+    ]
+    identity = mapper.primary_key_from_instance(db_obj)
+    return (
+        update(model)
+        .where(*(column == value for column, value in zip(mapper.primary_key, identity)))
+        .values(**changes)
+        .returning(*returned)
+        .execution_options(synchronize_session=False)
+    )
+
+def _populate(db_obj: Any, row: Any) -> None:
+    """Load a returned row into the object's committed state"""
+    for key, value in row._mapping.items():
+        set_committed_value(db_obj, key, value)
+
+# Statements and objects shared by the sync and async classes, which differ
+# only in how they execute them
+
+def _multi(model: Any, skip: int, limit: int) -> Select:
+    return select(model).offset(skip).limit(limit)
+
+def _new(model: Any, obj_in: Any) -> Any:
+    return model(**jsonable_encoder(obj_in))
+
+def _insert_returning(model: Any) -> Insert:
+    return insert(model).returning(model, sort_by_parameter_order=True)
+
+def _apply(db_obj: Any, changes: Dict[str, Any]) -> None:
+    """Set changes on the object, for models whose update events need a flush"""
+    for field, value in changes.items():
+        setattr(db_obj, field, value)
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
+        Request handlers use `AsyncCRUDBase`; this sync counterpart is for
+        background jobs and scripts, which run on `SessionLocal`.
         """
         self.model = model
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        return db.get(self.model, id)
 
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return list(db.scalars(_multi(self.model, skip, limit)))
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
+        db_obj = _new(self.model, obj_in)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def create_many(
+        self, db: Session, *, objs_in: Sequence[Dict[str, Any]]
+    ) -> List[ModelType]:
+        """
+        Insert rows with multi-row INSERT ... RETURNING, in the caller's
+        transaction. The returned objects already carry generated ids and
+        server defaults, in the order given, so no per-row refresh is
+        needed. PostgreSQL keeps that order in one statement per batch;
+        SQLite can't, so it falls back to a statement per row. Being a bulk
+        insert, it skips mapper events (after_insert).
+        """
+        if not objs_in:
+            return []
+        return list(db.scalars(_insert_returning(self.model), list(objs_in)))
+
     def update(
         self,
         db: Session,
@@ -38,21 +132,94 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        """
+        Write only the columns that change with a single UPDATE ... RETURNING
+        and load the returned values into `db_obj`, instead of encoding the
+        whole object and refreshing it. Models with update mapper events go
+        through a normal flush so those still fire.
+        """
+        changes = _column_changes(db_obj, obj_in)
+        if not changes:
+            return db_obj
+        if _has_update_events(self.model):
+            _apply(db_obj, changes)
+            db.add(db_obj)
+            db.commit()
+            db.refresh(db_obj)
+            return db_obj
+        row = db.execute(_update_returning(db_obj, changes)).one()
         db.commit()
-        db.refresh(db_obj)
+        # After the commit, which expires the object in sessions that do so
+        _populate(db_obj, row)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
+    def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
+        obj = db.get(self.model, id)
+        if obj is not None:
+            db.delete(obj)
+            db.commit()
+        return obj
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Large columns that list statements leave out unless asked for
+    deferred_columns: Sequence[str] = ()
+
+    def __init__(self, model: Type[ModelType]):
+        """
+        CRUD object with default async methods to Create, Read, Update,
+        Delete (CRUD) on an AsyncSession. Mirrors `CRUDBase`.
+        """
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        return await db.get(self.model, id)
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        return list(await db.scalars(_multi(self.model, skip, limit)))
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        db_obj = _new(self.model, obj_in)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Sequence[Dict[str, Any]]
+    ) -> List[ModelType]:
+        """See `CRUDBase.create_many`"""
+        if not objs_in:
+            return []
+        return list(await db.scalars(_insert_returning(self.model), list(objs_in)))
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """See `CRUDBase.update`"""
+        changes = _column_changes(db_obj, obj_in)
+        if not changes:
+            return db_obj
+        if _has_update_events(self.model):
+            _apply(db_obj, changes)
+            db.add(db_obj)
+            await db.commit()
+            await db.refresh(db_obj)
+            return db_obj
+        row = (await db.execute(_update_returning(db_obj, changes))).one()
+        await db.commit()
+        _populate(db_obj, row)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        obj = await db.get(self.model, id)
+        if obj is not None:
+            await db.delete(obj)
+            await db.commit()
         return obj
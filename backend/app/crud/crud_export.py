@@ -0,0 +1,118 @@
+import enum
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, List, Tuple
+from sqlalchemy import Select, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.quiz import QuestionAnswer, Quiz, QuizAttempt, QuizQuestion
+from app.models.recording import Recording
+from app.models.research import ResearchRecommendation, SavedPaper
+from app.models.study import StudySession
+from app.models.transcript import TranscriptSegment
+from app.models.user import User
+
+# Rows fetched per round trip from the server-side cursor; one chunk of
+# the response is written per batch
+EXPORT_BATCH_SIZE = 1000
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _columns(model: Any, *exclude: str) -> List[Any]:
+    return [column for column in model.__table__.c if column.name not in exclude]
+
+def _recordings(user_id: int) -> Select:
+    """Ids of the user's recordings that aren't (soft) deleted"""
+    return select(Recording.id).where(Recording.user_id == user_id, Recording.deleted_at.is_(None))
+
+def _quizzes(user_id: int) -> Select:
+    return select(Quiz.id).where(Quiz.recording_id.in_(_recordings(user_id)))
+
+# (type, statement for a user's rows), in the order they are exported; the
+# statements read plain columns rather than ORM objects
+_SECTIONS: Tuple[Tuple[str, Callable[[int], Select]], ...] = (
+    ("user", lambda user_id: select(*_columns(User, "hashed_password")).where(User.id == user_id)),
+    ("recording", lambda user_id: (
+        select(*_columns(Recording, "file_path", "deleted_at"))
+        .where(Recording.user_id == user_id, Recording.deleted_at.is_(None))
+        .order_by(Recording.id)
+    )),
+    ("transcript_segment", lambda user_id: (
+        select(*_columns(TranscriptSegment))
+        .where(TranscriptSegment.recording_id.in_(_recordings(user_id)))
+        .order_by(TranscriptSegment.recording_id, TranscriptSegment.position)
+    )),
+    ("quiz", lambda user_id: (
+        select(*_columns(Quiz)).where(Quiz.id.in_(_quizzes(user_id))).order_by(Quiz.id)
+    )),
+    ("quiz_question", lambda user_id: (
+        select(*_columns(QuizQuestion))
+        .where(QuizQuestion.quiz_id.in_(_quizzes(user_id)))
+        .order_by(QuizQuestion.quiz_id, QuizQuestion.id)
+    )),
+    ("quiz_attempt", lambda user_id: (
+        select(*_columns(QuizAttempt))
+        .where(QuizAttempt.user_id == user_id, QuizAttempt.quiz_id.in_(_quizzes(user_id)))
+        .order_by(QuizAttempt.id)
+    )),
+    ("question_answer", lambda user_id: (
+        select(*_columns(QuestionAnswer))
+        .join(QuizAttempt, QuestionAnswer.attempt_id == QuizAttempt.id)
+        .where(QuizAttempt.user_id == user_id, QuizAttempt.quiz_id.in_(_quizzes(user_id)))
+        .order_by(QuestionAnswer.attempt_id, QuestionAnswer.question_id)
+    )),
+    ("study_session", lambda user_id: (
+        select(*_columns(StudySession))
+        .where(
+            StudySession.user_id == user_id,
+            or_(StudySession.recording_id.is_(None), StudySession.recording_id.in_(_recordings(user_id))),
+        )
+        .order_by(StudySession.id)
+    )),
+    ("research_recommendation", lambda user_id: (
+        select(*_columns(ResearchRecommendation))
+        .where(ResearchRecommendation.recording_id.in_(_recordings(user_id)))
+        .order_by(ResearchRecommendation.id)
+    )),
+    ("saved_paper", lambda user_id: (
+        select(*_columns(SavedPaper))
+        .join(ResearchRecommendation, SavedPaper.recommendation_id == ResearchRecommendation.id)
+        .where(SavedPaper.user_id == user_id, ResearchRecommendation.recording_id.in_(_recordings(user_id)))
+        .order_by(SavedPaper.id)
+    )),
+)
+
+EXPORT_TYPES = tuple(kind for kind, _ in _SECTIONS)
+
+class AsyncCRUDExport:
+    async def stream(
+        self, db: AsyncSession, *, user_id: int, batch_size: int = EXPORT_BATCH_SIZE
+    ) -> AsyncIterator[bytes]:
+        """
+        A user's data as NDJSON: one `{"type": ..., "data": {...}}` object
+        per row, section by section (see `EXPORT_TYPES`). Rows come from
+        server-side cursors `batch_size` at a time as plain column tuples,
+        so memory stays flat however much the user has; soft-deleted
+        recordings and what belongs to them are left out.
+
+        `db` must not have begun a transaction: on PostgreSQL the sections
+        are read in one REPEATABLE READ transaction, so they agree with
+        each other.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        for kind, statement in _SECTIONS:
+            stmt = statement(user_id).execution_options(yield_per=batch_size)
+            result = await db.stream(stmt)
+            async for rows in result.mappings().partitions():
+                yield "".join(
+                    json.dumps({"type": kind, "data": dict(row)}, default=_json_default, separators=(",", ":"))
+                    + "\n"
+                    for row in rows
+                ).encode()
+
+async_export = AsyncCRUDExport()
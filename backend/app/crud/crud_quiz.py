@@ -1,77 +1,160 @@
-from typing import List, Optional
-from datetime import datetime
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
-from app.models.quiz import Quiz
-from app.schemas.quiz import QuizCreate, QuizUpdate, QuizResult
-from app.core.ai import generate_quiz_questions
-
-class CRUDQuiz(CRUDBase[Quiz, QuizCreate, QuizUpdate]):
-    def create_with_owner(
-        self, db: Session, *, obj_in: QuizCreate, owner_id: int
-    ) -> Quiz:
-        # Get recording transcript
-        from app.models.recording import Recording
-        recording = db.query(Recording).filter(Recording.id == obj_in.recording_id).first()
-        if not recording or not recording.transcript:
-            raise ValueError("Recording not found or transcript not available")
-        
-        # Generate quiz questions using Gemini
-        questions = generate_quiz_questions(recording.transcript)
-        
-        obj_in_data = jsonable_encoder(obj_in)
-        obj_in_data["questions"] = questions
-        
-        db_obj = self.model(**obj_in_data, user_id=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Integer, Select, and_, bindparam, case, false, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.models.quiz import QuestionAnswer, Quiz, QuizAttempt, QuizQuestion
+from app.schemas.quiz import QuestionStats, QuizCreate, QuizResult, QuizSubmission, QuizUpdate
+from app.utils.count_cache import count_cache
 
-    def get_by_recording(
-        self, db: Session, *, recording_id: int, user_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Quiz]:
+class AsyncCRUDQuiz(AsyncCRUDBase[Quiz, QuizCreate, QuizUpdate]):
+    def get_multi_by_user(self, *, user_id: int) -> Select:
+        """Statement for the quizzes on a user's recordings, newest first, for pagination"""
+        from app.models.recording import Recording
         return (
-            db.query(self.model)
-            .filter(Quiz.recording_id == recording_id, Quiz.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+            select(self.model)
+            .join(Recording, Quiz.recording_id == Recording.id)
+            .where(Recording.user_id == user_id, Recording.deleted_at.is_(None))
+            .order_by(Quiz.created_at.desc(), Quiz.id.desc())
+        )
+
+    async def get_by_user(self, db: AsyncSession, *, id: int, user_id: int) -> Optional[Quiz]:
+        """A quiz on one of the user's (not deleted) recordings"""
+        from app.models.recording import Recording
+        return await db.scalar(
+            select(self.model)
+            .join(Recording, Quiz.recording_id == Recording.id)
+            .where(Quiz.id == id, Recording.user_id == user_id, Recording.deleted_at.is_(None))
         )
 
-    def submit_answers(
-        self, db: Session, *, quiz: Quiz, answers: QuizUpdate
+    async def submit_answers(
+        self, db: AsyncSession, *, quiz: Quiz, user_id: int, answers: QuizSubmission
     ) -> QuizResult:
-        # Calculate score
-        correct_answers = 0
-        total_questions = len(quiz.questions)
-        
-        for question in quiz.questions:
-            question_id = str(question["id"])
-            if (
-                question_id in answers.user_answers
-                and answers.user_answers[question_id].lower() == question["correct_answer"].lower()
-            ):
-                correct_answers += 1
-        
-        score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
-        
-        # Update quiz with answers and score
-        quiz.user_answers = answers.user_answers
-        quiz.score = score
-        quiz.completed_at = datetime.utcnow()
-        
-        db.add(quiz)
-        db.commit()
-        db.refresh(quiz)
-        
-        return QuizResult(
-            quiz_id=quiz.id,
-            score=score,
-            correct_answers=correct_answers,
-            total_questions=total_questions,
-            completed_at=quiz.completed_at
+        """
+        Record an attempt: its answers in one batched INSERT ... SELECT
+        (answers to questions of other quizzes are dropped, correctness is
+        decided in the database) and its score from one aggregate.
+        """
+        attempt = QuizAttempt(quiz_id=quiz.id, user_id=user_id)
+        db.add(attempt)
+        await db.flush()
+        if answers.answers:
+            await db.execute(_ANSWERS_INSERT, _answer_rows(attempt, answers))
+        _record_score(attempt, quiz, (await db.execute(_score(attempt))).one())
+        await db.commit()
+        await db.refresh(attempt)
+        return _result(attempt)
+
+    def get_attempts_by_user(self, *, user_id: int, quiz_id: Optional[int] = None) -> Select:
+        """Statement for a user's quiz attempts (optionally of one quiz), newest first, for pagination"""
+        stmt = select(QuizAttempt).where(QuizAttempt.user_id == user_id)
+        if quiz_id is not None:
+            stmt = stmt.where(QuizAttempt.quiz_id == quiz_id)
+        return stmt.order_by(QuizAttempt.created_at.desc(), QuizAttempt.id.desc())
+
+    async def get_question_stats(self, db: AsyncSession, *, quiz_id: int) -> List[QuestionStats]:
+        """How often each question of a quiz has been answered, and answered correctly"""
+        correct = func.coalesce(func.sum(case((QuestionAnswer.is_correct, 1), else_=0)), 0)
+        rows = await db.execute(
+            select(QuizQuestion.id, func.count(QuestionAnswer.id), correct)
+            .outerjoin(QuestionAnswer, QuestionAnswer.question_id == QuizQuestion.id)
+            .where(QuizQuestion.quiz_id == quiz_id)
+            .group_by(QuizQuestion.id)
+            .order_by(QuizQuestion.id)
+        )
+        return [
+            QuestionStats(
+                question_id=question_id,
+                answers=answers,
+                correct_answers=correct_answers,
+                correct_rate=correct_answers / answers if answers else 0.0,
+            )
+            for question_id, answers, correct_answers in rows
+        ]
+
+    async def get_recording(self, db: AsyncSession, *, recording_id: int):
+        from app.crud.crud_recording import async_recording
+        return await async_recording.get(db, recording_id)
+
+    async def create_with_user(
+        self, db: AsyncSession, *, obj_in: QuizCreate, user_id: int
+    ) -> Quiz:
+        # Quizzes belong to the user through their recording
+        db_obj = self.model(recording_id=obj_in.recording_id)
+        db.add(db_obj)
+        await db.flush()
+        # All questions in one multi-row insert, attached without a reload
+        questions = await async_quiz_question.create_many(db, objs_in=[
+            {**question.model_dump(), "quiz_id": db_obj.id} for question in obj_in.questions
+        ])
+        set_committed_value(db_obj, "questions", questions)
+        await db.commit()
+        return db_obj
+
+# Scoring. Answers are stored one row per question and scored by the
+# database, so answer history can be queried without loading quizzes.
+
+# Run once per submitted answer (executemany); selects no row for a question
+# that isn't part of the quiz
+_ANSWERS_INSERT = insert(QuestionAnswer.__table__).from_select(
+    ["attempt_id", "question_id", "selected_option", "is_correct"],
+    select(
+        bindparam("attempt_id", type_=Integer),
+        QuizQuestion.id,
+        bindparam("selected_option", type_=Integer),
+        func.coalesce(QuizQuestion.correct_answer == bindparam("selected_option", type_=Integer), false()),
+    ).where(
+        QuizQuestion.id == bindparam("question_id", type_=Integer),
+        QuizQuestion.quiz_id == bindparam("quiz_id", type_=Integer),
+    ),
+)
+
+def _answer_rows(attempt: QuizAttempt, answers: QuizSubmission) -> List[Dict[str, Any]]:
+    return [
+        {"attempt_id": attempt.id, "quiz_id": attempt.quiz_id,
+         "question_id": question_id, "selected_option": selected_option}
+        for question_id, selected_option in answers.answers.items()
+    ]
+
+def _score(attempt: QuizAttempt) -> Select:
+    """(total_questions, correct_answers) of an attempt; unanswered questions count as wrong"""
+    return (
+        select(
+            func.count(QuizQuestion.id).label("total_questions"),
+            func.coalesce(func.sum(case((QuestionAnswer.is_correct, 1), else_=0)), 0).label("correct_answers"),
         )
+        .outerjoin(QuestionAnswer, and_(
+            QuestionAnswer.question_id == QuizQuestion.id,
+            QuestionAnswer.attempt_id == attempt.id,
+        ))
+        .where(QuizQuestion.quiz_id == attempt.quiz_id)
+    )
+
+def _record_score(attempt: QuizAttempt, quiz: Quiz, totals: Any) -> None:
+    attempt.total_questions = totals.total_questions
+    attempt.correct_answers = totals.correct_answers
+    attempt.score = (
+        totals.correct_answers / totals.total_questions * 100 if totals.total_questions > 0 else 0.0
+    )
+    # The quiz keeps its latest score for the progress averages
+    quiz.score = attempt.score
+
+def _result(attempt: QuizAttempt) -> QuizResult:
+    return QuizResult(
+        attempt_id=attempt.id,
+        quiz_id=attempt.quiz_id,
+        score=attempt.score,
+        correct_answers=attempt.correct_answers,
+        total_questions=attempt.total_questions,
+        completed_at=attempt.created_at,
+    )
+
+async_quiz = AsyncCRUDQuiz(Quiz)
+quiz_question = CRUDBase(QuizQuestion)
+async_quiz_question = AsyncCRUDBase(QuizQuestion)
+
+def _recording_owner(connection, target):
+    from app.models.recording import Recording
+    return connection.scalar(select(Recording.user_id).where(Recording.id == target.recording_id))
 
-quiz = CRUDQuiz(Quiz)
+count_cache.invalidate_on_write(Quiz, "quizzes", _recording_owner)
@@ -1,93 +1,197 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Set
+from datetime import datetime, timezone
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from sqlalchemy import Select, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session, load_only
+from app.crud.base import AsyncCRUDBase, CRUDBase, deferred_options
 from app.models.recording import Recording
 from app.schemas.recording import RecordingCreate, RecordingUpdate, RecordingWithProgress
-from app.core.audio import process_audio_file, extract_transcript
-from app.core.ai import generate_summary
+from app.utils.count_cache import count_cache
+
+# Text columns (up to hundreds of KB each) that list views don't show
+DEFERRED_COLUMNS = ("transcription", "summary")
 
 class CRUDRecording(CRUDBase[Recording, RecordingCreate, RecordingUpdate]):
-    def create_with_owner(
-        self, db: Session, *, obj_in: RecordingCreate, owner_id: int, audio_file: bytes
-    ) -> Recording:
-        obj_in_data = jsonable_encoder(obj_in)
-        
-        # Process audio file and get duration
-        file_path, duration = process_audio_file(audio_file)
-        obj_in_data["file_path"] = file_path
-        obj_in_data["duration"] = duration
-        
-        # Extract transcript using speech-to-text
-        transcript = extract_transcript(file_path)
-        obj_in_data["transcript"] = transcript
-        
-        # Generate summary using Gemini
-        summary = generate_summary(transcript)
-        obj_in_data["summary"] = summary
-        
-        db_obj = self.model(**obj_in_data, user_id=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+    """
+    Recording operations on sync sessions, for background jobs and reports;
+    request handlers use `AsyncCRUDRecording`.
+    """
+
+    def with_progress(self, db: Session, *, owner_id: int, fields: Optional[Set[str]] = None) -> Query:
+        """
+        Query of (Recording, quiz_count, average_quiz_score, study_time,
+        research_count) rows for one owner, in a single statement.
+
+        Each aggregate comes from a subquery grouped by recording and limited
+        to the owner's recordings, outer-joined onto the recordings, so no
+        quiz, study session or research row is loaded into Python. Large
+        columns are left out unless named in `fields`.
+        """
+        from app.models.quiz import Quiz
+        from app.models.research import ResearchRecommendation
+        from app.models.study import StudySession
+
+        owned = (
+            select(Recording.id)
+            .where(Recording.user_id == owner_id, Recording.deleted_at.is_(None))
+            .scalar_subquery()
+        )
+
+        quiz_stats = (
+            select(
+                Quiz.recording_id,
+                func.count(Quiz.id).label("quiz_count"),
+                func.avg(Quiz.score).label("average_quiz_score"),
+            )
+            .where(Quiz.recording_id.in_(owned))
+            .group_by(Quiz.recording_id)
+            .subquery()
+        )
+        study_stats = (
+            select(
+                StudySession.recording_id,
+                func.sum(StudySession.duration).label("study_time"),
+            )
+            .where(StudySession.recording_id.in_(owned), StudySession.duration.isnot(None))
+            .group_by(StudySession.recording_id)
+            .subquery()
+        )
+        research_stats = (
+            select(
+                ResearchRecommendation.recording_id,
+                func.count(ResearchRecommendation.id).label("research_count"),
+            )
+            .where(ResearchRecommendation.recording_id.in_(owned))
+            .group_by(ResearchRecommendation.recording_id)
+            .subquery()
+        )
+
+        return (
+            db.query(
+                Recording,
+                func.coalesce(quiz_stats.c.quiz_count, 0).label("quiz_count"),
+                quiz_stats.c.average_quiz_score,
+                func.coalesce(study_stats.c.study_time, 0.0).label("study_time"),
+                func.coalesce(research_stats.c.research_count, 0).label("research_count"),
+            )
+            .outerjoin(quiz_stats, quiz_stats.c.recording_id == Recording.id)
+            .outerjoin(study_stats, study_stats.c.recording_id == Recording.id)
+            .outerjoin(research_stats, research_stats.c.recording_id == Recording.id)
+            .filter(Recording.user_id == owner_id, Recording.deleted_at.is_(None))
+            .order_by(Recording.created_at.desc(), Recording.id.desc())
+            .options(*deferred_options(Recording, DEFERRED_COLUMNS, fields))
+        )
 
     def get_multi_by_owner(
         self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
     ) -> List[RecordingWithProgress]:
-        recordings = (
-            db.query(self.model)
-            .filter(Recording.user_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-        
-        # Enhance recordings with progress information
-        enhanced_recordings = []
-        for recording in recordings:
-            quiz_stats = self._get_quiz_stats(db, recording.id)
-            study_stats = self._get_study_stats(db, recording.id)
-            research_count = self._get_research_count(db, recording.id)
-            
-            enhanced_recording = RecordingWithProgress(
-                **jsonable_encoder(recording),
-                quiz_count=quiz_stats["count"],
-                average_quiz_score=quiz_stats["average_score"],
-                study_time=study_stats["total_duration"],
-                research_count=research_count
+        rows = self.with_progress(db, owner_id=owner_id).offset(skip).limit(limit).all()
+        return [
+            RecordingWithProgress(
+                **jsonable_encoder(row.Recording),
+                quiz_count=row.quiz_count,
+                average_quiz_score=row.average_quiz_score,
+                study_time=row.study_time,
+                research_count=row.research_count,
             )
-            enhanced_recordings.append(enhanced_recording)
-        
-        return enhanced_recordings
+            for row in rows
+        ]
 
-    def _get_quiz_stats(self, db: Session, recording_id: int) -> dict:
-        from app.models.quiz import Quiz
-        quizzes = db.query(Quiz).filter(Quiz.recording_id == recording_id).all()
-        if not quizzes:
-            return {"count": 0, "average_score": None}
-        
-        completed_quizzes = [q for q in quizzes if q.score is not None]
-        if not completed_quizzes:
-            return {"count": len(quizzes), "average_score": None}
-        
-        avg_score = sum(q.score for q in completed_quizzes) / len(completed_quizzes)
-        return {"count": len(quizzes), "average_score": avg_score}
-
-    def _get_study_stats(self, db: Session, recording_id: int) -> dict:
-        from app.models.study import StudySession
-        sessions = db.query(StudySession).filter(
-            StudySession.recording_id == recording_id,
-            StudySession.duration.isnot(None)
-        ).all()
-        
-        total_duration = sum(session.duration for session in sessions)
-        return {"total_duration": total_duration}
-
-    def _get_research_count(self, db: Session, recording_id: int) -> int:
-        from app.models.research import ResearchRecommendation
-        return db.query(ResearchRecommendation).filter(
+    def claim_deleted(self, db: Session) -> Optional[Recording]:
+        """
+        The longest-waiting soft-deleted recording, locked for this
+        transaction; rows another reaper holds are skipped.
+        """
+        return db.scalars(
+            select(self.model)
+            .where(Recording.deleted_at.isnot(None))
+            .order_by(Recording.deleted_at, Recording.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .options(load_only(Recording.id, Recording.user_id, Recording.file_path))
+        ).first()
+
+    def purge(self, db: Session, *, recording_id: int) -> None:
+        """
+        Delete a recording and everything that belongs to it with one DELETE
+        per table, children first. Set-based deletes skip the ORM cascades
+        and mapper events, so the study rollups are adjusted here; the
+        caller commits and removes the stored files.
+        """
+        from app.crud.crud_study import study
+        from app.models.quiz import QuestionAnswer, Quiz, QuizAttempt, QuizQuestion
+        from app.models.research import ResearchRecommendation, SavedPaper
+        from app.models.transcript import TranscriptSegment
+
+        quizzes = select(Quiz.id).where(Quiz.recording_id == recording_id)
+        attempts = select(QuizAttempt.id).where(QuizAttempt.quiz_id.in_(quizzes))
+        recommendations = select(ResearchRecommendation.id).where(
             ResearchRecommendation.recording_id == recording_id
-        ).count()
+        )
+        study.remove_by_recording(db, recording_id=recording_id)
+        statements: List[Any] = [
+            delete(QuestionAnswer).where(QuestionAnswer.attempt_id.in_(attempts)),
+            delete(QuizAttempt).where(QuizAttempt.quiz_id.in_(quizzes)),
+            delete(QuizQuestion).where(QuizQuestion.quiz_id.in_(quizzes)),
+            delete(Quiz).where(Quiz.recording_id == recording_id),
+            delete(SavedPaper).where(SavedPaper.recommendation_id.in_(recommendations)),
+            delete(ResearchRecommendation).where(ResearchRecommendation.recording_id == recording_id),
+            delete(TranscriptSegment).where(TranscriptSegment.recording_id == recording_id),
+            delete(Recording).where(Recording.id == recording_id),
+        ]
+        for stmt in statements:
+            db.execute(stmt, execution_options={"synchronize_session": False})
+
+class AsyncCRUDRecording(AsyncCRUDBase[Recording, RecordingCreate, RecordingUpdate]):
+    deferred_columns = DEFERRED_COLUMNS
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[Recording]:
+        """A recording, unless it has been soft deleted"""
+        recording = await super().get(db, id)
+        if recording is None or recording.deleted_at is not None:
+            return None
+        return recording
+
+    def get_multi_by_user(self, *, user_id: int, fields: Optional[Set[str]] = None) -> Select:
+        """
+        Statement for a user's recordings, newest first, for pagination.
+        Large columns are left out unless named in `fields`.
+        """
+        return (
+            select(self.model)
+            .where(Recording.user_id == user_id, Recording.deleted_at.is_(None))
+            .order_by(Recording.created_at.desc(), Recording.id.desc())
+            .options(*deferred_options(self.model, self.deferred_columns, fields))
+        )
+
+    async def create_with_user(
+        self, db: AsyncSession, *, obj_in: RecordingCreate, user_id: int,
+        transcription: Optional[str] = None
+    ) -> Recording:
+        # Unset optional fields (`description`) have no column to go in
+        obj_in_data = jsonable_encoder(obj_in, exclude_unset=True)
+        db_obj = self.model(**obj_in_data, user_id=user_id, transcription=transcription)
+        if transcription is not None:
+            db_obj.transcription_status = "completed"
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def soft_delete(self, db: AsyncSession, *, db_obj: Recording) -> Recording:
+        """
+        Mark a recording deleted; it disappears from reads at once and the
+        reaper removes its rows and files later.
+        """
+        db_obj = await self.update(db, db_obj=db_obj, obj_in={"deleted_at": datetime.now(timezone.utc)})
+        # An UPDATE doesn't fire the count cache's insert/delete events, and
+        # the user's quizzes and research are hidden along with the recording
+        for resource in ("recordings", "quizzes", "research"):
+            count_cache.invalidate(db_obj.user_id, resource)
+        return db_obj
 
 recording = CRUDRecording(Recording)
+async_recording = AsyncCRUDRecording(Recording)
+
+count_cache.invalidate_on_write(Recording, "recordings", lambda connection, target: target.user_id)
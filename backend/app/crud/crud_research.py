@@ -1,16 +1,23 @@
-from typing import List, Optional
+from typing import List, Optional, Set
 from datetime import datetime
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase, deferred_options
 from app.models.research import ResearchRecommendation, SavedPaper
 from app.schemas.research import (
     ResearchRecommendationCreate,
     SavedPaperCreate,
     SavedPaperUpdate
 )
+from app.utils.count_cache import count_cache
 from app.core.ai import generate_research_recommendations
 
+# Columns list views don't show: abstracts, takeaways and reading notes
+RECOMMENDATION_DEFERRED_COLUMNS = ("description", "key_takeaways")
+SAVED_PAPER_DEFERRED_COLUMNS = ("notes",)
+
 class CRUDResearch:
     def generate_recommendations(
         self, db: Session, *, recording_id: int, user_id: int
@@ -18,38 +25,37 @@ class CRUDResearch:
         # Get recording transcript
         from app.models.recording import Recording
         recording = db.query(Recording).filter(Recording.id == recording_id).first()
-        if not recording or not recording.transcript:
+        if not recording or not recording.transcription:
             raise ValueError("Recording not found or transcript not available")
         
         # Generate recommendations using Gemini
-        recommendations = generate_research_recommendations(recording.transcript)
-        
-        # Save recommendations to database
-        db_recommendations = []
-        for rec in recommendations:
-            db_rec = ResearchRecommendation(
-                **rec,
-                recording_id=recording_id,
-                user_id=user_id
-            )
-            db.add(db_rec)
-            db_recommendations.append(db_rec)
+        recommendations = generate_research_recommendations(recording.transcription)
         
+        # Save recommendations to database in one multi-row insert; they
+        # belong to the user through their recording
+        db_recommendations = _recommendations.create_many(
+            db, objs_in=[{**rec, "recording_id": recording_id} for rec in recommendations]
+        )
         db.commit()
-        for rec in db_recommendations:
-            db.refresh(rec)
+        # Bulk inserts skip the mapper events that invalidate cached totals
+        count_cache.invalidate(user_id, "research")
         
         return db_recommendations
 
     def get_recommendations_by_recording(
         self, db: Session, *, recording_id: int, user_id: int, skip: int = 0, limit: int = 100
     ) -> List[ResearchRecommendation]:
+        # Recommendations belong to the user through their recording
+        from app.models.recording import Recording
         return (
             db.query(ResearchRecommendation)
+            .join(Recording, ResearchRecommendation.recording_id == Recording.id)
             .filter(
                 ResearchRecommendation.recording_id == recording_id,
-                ResearchRecommendation.user_id == user_id
+                Recording.user_id == user_id,
+                Recording.deleted_at.is_(None)
             )
+            .order_by(ResearchRecommendation.created_at.desc(), ResearchRecommendation.id.desc())
             .offset(skip)
             .limit(limit)
             .all()
@@ -66,11 +72,14 @@ class CRUDResearch:
         return db_obj
 
     def get_saved_papers(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100,
+        fields: Optional[Set[str]] = None
     ) -> List[SavedPaper]:
         return (
             db.query(SavedPaper)
             .filter(SavedPaper.user_id == user_id)
+            .order_by(SavedPaper.created_at.desc(), SavedPaper.id.desc())
+            .options(*deferred_options(SavedPaper, SAVED_PAPER_DEFERRED_COLUMNS, fields))
             .offset(skip)
             .limit(limit)
             .all()
@@ -106,4 +115,36 @@ class CRUDResearch:
         db.delete(obj)
         db.commit()
 
+class AsyncCRUDResearch(AsyncCRUDBase[ResearchRecommendation, ResearchRecommendationCreate, ResearchRecommendationCreate]):
+    deferred_columns = RECOMMENDATION_DEFERRED_COLUMNS
+
+    def get_multi_by_user(self, *, user_id: int, fields: Optional[Set[str]] = None) -> Select:
+        """
+        Statement for the recommendations for a user's recordings, newest
+        first, for pagination. Large columns are left out unless named in
+        `fields`.
+        """
+        from app.models.recording import Recording
+        return (
+            select(self.model)
+            .join(Recording, ResearchRecommendation.recording_id == Recording.id)
+            .where(Recording.user_id == user_id, Recording.deleted_at.is_(None))
+            .order_by(ResearchRecommendation.created_at.desc(), ResearchRecommendation.id.desc())
+            .options(*deferred_options(self.model, self.deferred_columns, fields))
+        )
+
+    async def create_with_user(
+        self, db: AsyncSession, *, obj_in: ResearchRecommendationCreate, user_id: int
+    ) -> ResearchRecommendation:
+        # Recommendations belong to the user through their recording
+        return await self.create(db, obj_in=obj_in)
+
 research = CRUDResearch()
+_recommendations = CRUDBase(ResearchRecommendation)
+async_research = AsyncCRUDResearch(ResearchRecommendation)
+
+def _recording_owner(connection, target):
+    from app.models.recording import Recording
+    return connection.scalar(select(Recording.user_id).where(Recording.id == target.recording_id))
+
+count_cache.invalidate_on_write(ResearchRecommendation, "research", _recording_owner)
@@ -0,0 +1,188 @@
+import html
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import Select, and_, column, exists, func, literal_column, or_, select, table, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.search import SEARCH_SOURCES, TEXT_SEARCH_CONFIG, SearchSource
+from app.models.recording import Recording
+from app.models.research import ResearchRecommendation, SavedPaper
+from app.models.study import StudySession
+from app.schemas.search import SearchResult
+
+# Delimiters the database wraps matches in, swapped for <mark> once the
+# excerpt has been HTML-escaped
+_START, _STOP = "\x02", "\x03"
+
+# PostgreSQL's default rank weights, reused for SQLite's bm25 column weights
+_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+class _Target(NamedTuple):
+    source: SearchSource
+    model: Any
+    title: Any
+    recording_id: Any
+    join: Optional[Tuple[Any, Any]]  # Table the title comes from, and how to reach it
+    snippet_columns: Tuple[str, ...]
+    deleted: Any  # Whether the row's recording is soft deleted
+
+_SOURCES = {source.kind: source for source in SEARCH_SOURCES}
+
+_TARGETS = {
+    target.source.kind: target for target in (
+        _Target(_SOURCES["recording"], Recording, Recording.title, Recording.id, None,
+                ("summary", "transcription"), Recording.deleted_at.isnot(None)),
+        _Target(_SOURCES["study_session"], StudySession, Recording.title, StudySession.recording_id,
+                (Recording, StudySession.recording_id == Recording.id), ("notes",),
+                exists().where(Recording.id == StudySession.recording_id, Recording.deleted_at.isnot(None))),
+        _Target(_SOURCES["saved_paper"], SavedPaper, ResearchRecommendation.title,
+                ResearchRecommendation.recording_id,
+                (ResearchRecommendation, SavedPaper.recommendation_id == ResearchRecommendation.id),
+                ("notes",),
+                exists().where(
+                    ResearchRecommendation.id == SavedPaper.recommendation_id,
+                    Recording.id == ResearchRecommendation.recording_id,
+                    Recording.deleted_at.isnot(None),
+                )),
+    )
+}
+
+SEARCH_TYPES = tuple(_TARGETS)
+
+def _highlight(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    return html.escape(text).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+class _PostgresMatch:
+    """Matches against the trigger-maintained `search_vector` columns"""
+    def __init__(self, q: str):
+        self.config = literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+        self.query = func.websearch_to_tsquery(self.config, q)
+
+    def _vector(self, target: _Target) -> Any:
+        return literal_column(f"{target.source.table}.search_vector")
+
+    def join(self, stmt: Select, target: _Target) -> Select:
+        return stmt
+
+    def criteria(self, target: _Target) -> List[Any]:
+        return [self._vector(target).op("@@")(self.query)]
+
+    def rank(self, target: _Target) -> Any:
+        return func.ts_rank_cd(self._vector(target), self.query)
+
+    def snippet(self, target: _Target) -> Any:
+        text = func.concat_ws(" … ", *(getattr(target.model, name) for name in target.snippet_columns))
+        options = f"StartSel={_START}, StopSel={_STOP}, MaxWords=24, MinWords=8, MaxFragments=2"
+        return func.ts_headline(self.config, text, self.query, options)
+
+class _SQLiteMatch:
+    """Matches against the trigger-maintained FTS5 tables"""
+    def __init__(self, q: str):
+        # Rebuild words and "quoted phrases" as FTS5 phrases, so user input
+        # can't use the rest of the FTS5 query syntax
+        phrases = (" ".join(re.findall(r"\w+", phrase or word)) for phrase, word in re.findall(r'"([^"]*)"|(\w+)', q))
+        self.query = " ".join(f'"{phrase}"' for phrase in phrases if phrase)
+
+    def _fts(self, target: _Target) -> Any:
+        return literal_column(target.source.fts_table)
+
+    def join(self, stmt: Select, target: _Target) -> Select:
+        fts = table(target.source.fts_table, column("rowid"))
+        return stmt.join(fts, fts.c.rowid == target.model.id)
+
+    def criteria(self, target: _Target) -> List[Any]:
+        return [self._fts(target).op("MATCH")(self.query)]
+
+    def rank(self, target: _Target) -> Any:
+        # bm25 is lower for better matches
+        weights = [_WEIGHTS[weight] for weight in target.source.weights]
+        return -func.bm25(self._fts(target), *weights)
+
+    def snippet(self, target: _Target) -> Any:
+        return func.snippet(self._fts(target), -1, _START, _STOP, "…", 24)
+
+class AsyncCRUDSearch:
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        q: str,
+        types: Sequence[str] = SEARCH_TYPES,
+        limit: int = 10,
+        after: Optional[Tuple[float, str, int]] = None,
+    ) -> List[SearchResult]:
+        """
+        A user's recordings, study notes and saved-paper notes matching `q`
+        (leaving out soft-deleted recordings and what belongs to them), most
+        relevant first, in (rank descending, type, id) order; `after` is
+        the position of the last result of the previous page. Excerpts are
+        only built for the returned page.
+        """
+        connection = await db.connection()
+        if connection.dialect.name == "postgresql":
+            match = _PostgresMatch(q)
+        else:
+            match = _SQLiteMatch(q)
+        targets = [_TARGETS[kind] for kind in types]
+
+        arms = []
+        for target in targets:
+            model = target.model
+            stmt = select(
+                literal_column(f"'{target.source.kind}'").label("type"),
+                model.id.label("id"),
+                match.rank(target).label("rank"),
+            ).select_from(model)
+            arms.append(match.join(stmt, target).where(
+                model.user_id == user_id, ~target.deleted, *match.criteria(target)
+            ))
+        hits = (union_all(*arms) if len(arms) > 1 else arms[0]).subquery()
+
+        stmt = select(hits.c.type, hits.c.id, hits.c.rank)
+        if after is not None:
+            rank, kind, id = after
+            stmt = stmt.where(or_(
+                hits.c.rank < rank,
+                and_(hits.c.rank == rank, tuple_(hits.c.type, hits.c.id) > tuple_(kind, id)),
+            ))
+        stmt = stmt.order_by(hits.c.rank.desc(), hits.c.type, hits.c.id).limit(limit)
+        page = (await db.execute(stmt)).all()
+
+        details: Dict[Tuple[str, int], Any] = {}
+        for target in targets:
+            ids = [row.id for row in page if row.type == target.source.kind]
+            if ids:
+                for row in await self._details(db, match, target, ids):
+                    details[(target.source.kind, row.id)] = row
+
+        results = []
+        for row in page:
+            detail = details.get((row.type, row.id))
+            results.append(SearchResult(
+                type=row.type,
+                id=row.id,
+                recording_id=detail.recording_id if detail else None,
+                title=detail.title if detail else None,
+                snippet=_highlight(detail.snippet) if detail else None,
+                rank=row.rank,
+            ))
+        return results
+
+    async def _details(self, db: AsyncSession, match: Any, target: _Target, ids: List[int]) -> List[Any]:
+        model = target.model
+        stmt = select(
+            model.id,
+            target.title.label("title"),
+            target.recording_id.label("recording_id"),
+            match.snippet(target).label("snippet"),
+        ).select_from(model)
+        stmt = match.join(stmt, target)
+        if target.join is not None:
+            stmt = stmt.outerjoin(*target.join)
+        # SQLite can only build snippets for rows found by a MATCH
+        stmt = stmt.where(model.id.in_(ids), *match.criteria(target))
+        return (await db.execute(stmt)).all()
+
+async_search = AsyncCRUDSearch()
@@ -1,82 +1,235 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from datetime import datetime, timezone
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.crud.base import CRUDBase
-from app.models.study import StudySession
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.models.study import RecordingStudyStats, StudySession, UserStudyStats
 from app.schemas.study import StudySessionCreate, StudySessionUpdate, StudyStats
 
+def _stats(rollup: Optional[Union[UserStudyStats, RecordingStudyStats]]) -> StudyStats:
+    if rollup is None:
+        return StudyStats(total_sessions=0, total_duration=0.0, average_session_duration=0.0)
+    return StudyStats(
+        total_sessions=rollup.total_sessions,
+        total_duration=rollup.total_duration,
+        average_session_duration=(
+            rollup.total_duration / rollup.total_sessions if rollup.total_sessions > 0 else 0.0
+        ),
+        last_session=rollup.last_session
+    )
+
+def _with_duration(db_obj: StudySession, update_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Ending a session (setting end_time) also records its duration in minutes"""
+    end_time = update_data.get("end_time")
+    if end_time is None or db_obj.start_time is None:
+        return update_data
+    if end_time.tzinfo is not None:
+        # Session times are stored as naive UTC
+        end_time = end_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        **update_data,
+        "end_time": end_time,
+        "duration": max((end_time - db_obj.start_time).total_seconds() / 60, 0.0),
+    }
+
 class CRUDStudy(CRUDBase[StudySession, StudySessionCreate, StudySessionUpdate]):
-    def create_with_owner(
-        self, db: Session, *, obj_in: StudySessionCreate, owner_id: int
+    """Rollup maintenance on sync sessions; request handlers use `AsyncCRUDStudy`"""
+
+    def rebuild_rollups(self, db: Session, *, user_id: Optional[int] = None) -> int:
+        """
+        Recompute the study-stats rollups from the sessions, for everyone or
+        one user, in a single transaction. Returns the number of users rebuilt.
+        """
+        user_criteria = [] if user_id is None else [StudySession.user_id == user_id]
+        finished = [StudySession.duration.isnot(None), StudySession.user_id.isnot(None), *user_criteria]
+        totals = (
+            func.count(StudySession.id),
+            func.sum(StudySession.duration),
+            func.max(StudySession.end_time),
+        )
+        columns = ["total_sessions", "total_duration", "last_session"]
+
+        for rollup in (UserStudyStats, RecordingStudyStats):
+            stmt = delete(rollup)
+            if user_id is not None:
+                stmt = stmt.where(rollup.user_id == user_id)
+            db.execute(stmt)
+
+        db.execute(insert(UserStudyStats).from_select(
+            ["user_id", *columns],
+            select(StudySession.user_id, *totals).where(*finished).group_by(StudySession.user_id),
+        ))
+        db.execute(insert(RecordingStudyStats).from_select(
+            ["user_id", "recording_id", *columns],
+            select(StudySession.user_id, StudySession.recording_id, *totals)
+            .where(*finished, StudySession.recording_id.isnot(None))
+            .group_by(StudySession.user_id, StudySession.recording_id),
+        ))
+        rebuilt = db.scalar(select(func.count()).select_from(UserStudyStats).where(
+            *([] if user_id is None else [UserStudyStats.user_id == user_id])
+        ))
+        db.commit()
+        return rebuilt
+
+    def remove_by_recording(self, db: Session, *, recording_id: int) -> None:
+        """
+        Delete a recording's study sessions in one statement, taking their
+        totals out of the users' rollups (a bulk DELETE doesn't run the
+        rollup events). The caller commits.
+        """
+        finished = [StudySession.recording_id == recording_id, StudySession.duration.isnot(None)]
+        totals = db.execute(
+            select(StudySession.user_id, func.count(StudySession.id), func.sum(StudySession.duration))
+            .where(*finished, StudySession.user_id.isnot(None))
+            .group_by(StudySession.user_id)
+        ).all()
+        db.execute(
+            delete(StudySession).where(StudySession.recording_id == recording_id),
+            execution_options={"synchronize_session": False},
+        )
+        for user_id, sessions, duration in totals:
+            # Re-read the maximum now the sessions are gone
+            last_session = (
+                select(func.max(StudySession.end_time))
+                .where(StudySession.user_id == user_id, StudySession.duration.isnot(None))
+                .scalar_subquery()
+            )
+            db.execute(
+                update(UserStudyStats)
+                .where(UserStudyStats.user_id == user_id)
+                .values(
+                    total_sessions=UserStudyStats.total_sessions - sessions,
+                    total_duration=UserStudyStats.total_duration - duration,
+                    last_session=last_session,
+                )
+            )
+        db.execute(delete(RecordingStudyStats).where(RecordingStudyStats.recording_id == recording_id))
+
+class AsyncCRUDStudy(AsyncCRUDBase[StudySession, StudySessionCreate, StudySessionUpdate]):
+    async def create_with_owner(
+        self, db: AsyncSession, *, obj_in: StudySessionCreate, owner_id: int
     ) -> StudySession:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data, user_id=owner_id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
-    def get_by_recording(
-        self, db: Session, *, recording_id: int, user_id: int, skip: int = 0, limit: int = 100
+    async def update(
+        self, db: AsyncSession, *, db_obj: StudySession,
+        obj_in: Union[StudySessionUpdate, Dict[str, Any]]
+    ) -> StudySession:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        return await super().update(db, db_obj=db_obj, obj_in=_with_duration(db_obj, update_data))
+
+    async def get_by_recording(
+        self, db: AsyncSession, *, recording_id: int, user_id: int, skip: int = 0, limit: int = 100
     ) -> List[StudySession]:
-        return (
-            db.query(self.model)
-            .filter(
+        result = await db.execute(
+            select(self.model)
+            .where(
                 StudySession.recording_id == recording_id,
                 StudySession.user_id == user_id
             )
             .offset(skip)
             .limit(limit)
-            .all()
         )
+        return list(result.scalars().all())
 
-    def get_recording_stats(
-        self, db: Session, *, recording_id: int, user_id: int
+    async def get_recording_stats(
+        self, db: AsyncSession, *, recording_id: int, user_id: int
     ) -> StudyStats:
-        query = db.query(
-            func.count(StudySession.id).label("total_sessions"),
-            func.sum(StudySession.duration).label("total_duration"),
-            func.max(StudySession.end_time).label("last_session")
-        ).filter(
-            StudySession.recording_id == recording_id,
-            StudySession.user_id == user_id,
-            StudySession.duration.isnot(None)
-        )
-        
-        result = query.first()
-        total_sessions = result.total_sessions or 0
-        total_duration = result.total_duration or 0.0
-        
-        return StudyStats(
-            total_sessions=total_sessions,
-            total_duration=total_duration,
-            average_session_duration=total_duration / total_sessions if total_sessions > 0 else 0.0,
-            last_session=result.last_session
-        )
+        # Rollups change through Core statements, so skip the identity map
+        return _stats(await db.get(RecordingStudyStats, (user_id, recording_id), populate_existing=True))
 
-    def get_overall_stats(
-        self, db: Session, *, user_id: int
+    async def get_overall_stats(
+        self, db: AsyncSession, *, user_id: int
     ) -> StudyStats:
-        query = db.query(
-            func.count(StudySession.id).label("total_sessions"),
-            func.sum(StudySession.duration).label("total_duration"),
-            func.max(StudySession.end_time).label("last_session")
-        ).filter(
-            StudySession.user_id == user_id,
-            StudySession.duration.isnot(None)
-        )
-        
-        result = query.first()
-        total_sessions = result.total_sessions or 0
-        total_duration = result.total_duration or 0.0
-        
-        return StudyStats(
-            total_sessions=total_sessions,
-            total_duration=total_duration,
-            average_session_duration=total_duration / total_sessions if total_sessions > 0 else 0.0,
-            last_session=result.last_session
-        )
+        return _stats(await db.get(UserStudyStats, user_id, populate_existing=True))
 
 study = CRUDStudy(StudySession)
+async_study = AsyncCRUDStudy(StudySession)
+
+# Rollup maintenance. Mapper events run on the flush's connection, so the
+# rollups change in the same transaction as the session rows they summarize.
+
+def _adjust_rollups(connection, user_id: int, recording_id: int, sessions: int,
+                    duration: float, end_time: Optional[datetime]) -> None:
+    """Add (sessions=1) or remove (sessions=-1) one finished session's totals"""
+    if user_id is None:
+        return
+    upsert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    rollups = [(UserStudyStats, {"user_id": user_id})]
+    if recording_id is not None:
+        rollups.append((RecordingStudyStats, {"user_id": user_id, "recording_id": recording_id}))
+    for rollup, keys in rollups:
+        if sessions > 0:
+            stmt = upsert(rollup).values(
+                **keys, total_sessions=1, total_duration=duration, last_session=end_time
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={
+                    "total_sessions": rollup.total_sessions + 1,
+                    "total_duration": rollup.total_duration + duration,
+                    "last_session": case(
+                        (stmt.excluded.last_session.is_(None), rollup.last_session),
+                        (rollup.last_session.is_(None), stmt.excluded.last_session),
+                        (stmt.excluded.last_session > rollup.last_session, stmt.excluded.last_session),
+                        else_=rollup.last_session,
+                    ),
+                },
+            )
+        else:
+            # A maximum can't be decremented; re-read it through the partial
+            # index (the session row has already been changed on this connection)
+            last_session = (
+                select(func.max(StudySession.end_time))
+                .where(
+                    StudySession.duration.isnot(None),
+                    *(getattr(StudySession, key) == value for key, value in keys.items())
+                )
+                .scalar_subquery()
+            )
+            stmt = (
+                update(rollup)
+                .where(*(getattr(rollup, key) == value for key, value in keys.items()))
+                .values(
+                    total_sessions=rollup.total_sessions - 1,
+                    total_duration=rollup.total_duration - duration,
+                    last_session=last_session,
+                )
+            )
+        connection.execute(stmt)
+
+def _previous(target: StudySession, key: str) -> Any:
+    history = inspect(target).attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(target, key)
+
+@event.listens_for(StudySession, "after_insert")
+def _rollup_insert(mapper, connection, target):
+    if target.duration is not None:
+        _adjust_rollups(connection, target.user_id, target.recording_id, 1, target.duration, target.end_time)
+
+@event.listens_for(StudySession, "after_update")
+def _rollup_update(mapper, connection, target):
+    keys = ("user_id", "recording_id", "duration", "end_time")
+    before = {key: _previous(target, key) for key in keys}
+    after = {key: getattr(target, key) for key in keys}
+    if before == after:
+        return
+    if before["duration"] is not None:
+        _adjust_rollups(connection, before["user_id"], before["recording_id"], -1,
+                        before["duration"], before["end_time"])
+    if after["duration"] is not None:
+        _adjust_rollups(connection, after["user_id"], after["recording_id"], 1,
+                        after["duration"], after["end_time"])
+
+@event.listens_for(StudySession, "after_delete")
+def _rollup_delete(mapper, connection, target):
+    if target.duration is not None:
+        _adjust_rollups(connection, target.user_id, target.recording_id, -1, target.duration, target.end_time)
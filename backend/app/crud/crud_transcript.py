@@ -0,0 +1,60 @@
+from typing import List
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.models.transcript import TranscriptSegment
+from app.schemas.transcript import TranscriptSegmentCreate
+
+class CRUDTranscriptSegment(CRUDBase[TranscriptSegment, TranscriptSegmentCreate, TranscriptSegmentCreate]):
+    def get_at(self, db: Session, *, recording_id: int, offset_ms: int) -> TranscriptSegment:
+        """The segment playing at an audio offset (or the last one before it)"""
+        return (
+            db.query(self.model)
+            .filter(
+                TranscriptSegment.recording_id == recording_id,
+                TranscriptSegment.start_ms <= offset_ms,
+            )
+            .order_by(TranscriptSegment.start_ms.desc())
+            .first()
+        )
+
+    def get_from(self, db: Session, *, recording_id: int, position: int) -> List[TranscriptSegment]:
+        """A recording's segments from `position` on, in order"""
+        return (
+            db.query(self.model)
+            .filter(
+                TranscriptSegment.recording_id == recording_id,
+                TranscriptSegment.position >= position,
+            )
+            .order_by(TranscriptSegment.position)
+            .all()
+        )
+
+    def append(self, db: Session, *, recording_id: int, segment: dict) -> None:
+        """Add one segment in the caller's transaction, as transcription reaches it"""
+        db.execute(insert(TranscriptSegment).values(**segment, recording_id=recording_id))
+
+    def replace_for_recording(self, db: Session, *, recording_id: int, segments: List[dict]) -> int:
+        """Swap a recording's segments for a new set in one transaction"""
+        db.query(self.model).filter(
+            TranscriptSegment.recording_id == recording_id
+        ).delete(synchronize_session=False)
+        if segments:
+            db.execute(insert(TranscriptSegment), [
+                {**segment, "recording_id": recording_id} for segment in segments
+            ])
+        db.commit()
+        return len(segments)
+
+class AsyncCRUDTranscriptSegment(AsyncCRUDBase[TranscriptSegment, TranscriptSegmentCreate, TranscriptSegmentCreate]):
+    async def get_by_recording(self, db: AsyncSession, *, recording_id: int) -> List[TranscriptSegment]:
+        result = await db.execute(
+            select(self.model)
+            .where(TranscriptSegment.recording_id == recording_id)
+            .order_by(TranscriptSegment.position)
+        )
+        return list(result.scalars().all())
+
+transcript_segment = CRUDTranscriptSegment(TranscriptSegment)
+async_transcript_segment = AsyncCRUDTranscriptSegment(TranscriptSegment)
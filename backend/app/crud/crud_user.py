@@ -1,45 +1,69 @@
 from typing import Any, Dict, Optional, Union
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
+def _by_email(email: str) -> Select:
+    return select(User).where(User.email == email)
+
+def _new_user(obj_in: UserCreate, hashed_password: str) -> User:
+    return User(
+        email=obj_in.email,
+        hashed_password=hashed_password,
+        full_name=obj_in.full_name,
+        is_active=True,
+    )
+
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    """The user operations jobs and scripts (like `init_db`) need"""
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
+        return db.scalars(_by_email(email)).first()
 
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        db_obj = User(
-            email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
-            full_name=obj_in.full_name,
-            is_active=True,
-        )
+        db_obj = _new_user(obj_in, get_password_hash(obj_in.password))
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
-    def update(
-        self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        return (await db.scalars(_by_email(email))).first()
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        # Password hashing is deliberately slow; keep it off the event loop
+        db_obj = _new_user(obj_in, await run_in_threadpool(get_password_hash, obj_in.password))
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
     ) -> User:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
         if update_data.get("password"):
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await run_in_threadpool(get_password_hash, update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        return await super().update(db, db_obj=db_obj, obj_in=update_data)
 
-    def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
-        user = self.get_by_email(db, email=email)
+    async def authenticate(self, db: AsyncSession, *, email: str, password: str) -> Optional[User]:
+        user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await run_in_threadpool(verify_password, password, user.hashed_password):
             return None
         return user
 
 user = CRUDUser(User)
+async_user = AsyncCRUDUser(User)
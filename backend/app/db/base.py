@@ -2,7 +2,10 @@
 from app.db.base_class import Base
 from app.models.user import User
 from app.models.recording import Recording
-from app.models.quiz import Quiz, QuizQuestion
-from app.models.study import StudySession
+from app.models.transcript import TranscriptSegment
+from app.models.quiz import Quiz, QuizQuestion, QuizAttempt, QuestionAnswer
+from app.models.study import StudySession, UserStudyStats, RecordingStudyStats
 from app.models.research import ResearchRecommendation, SavedPaper
 from app.models.profile import Profile
+# Full-text search indexes live outside the models; importing installs them on create_all
+import app.db.search  # noqa: F401
@@ -1,28 +1,22 @@
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from typing import AsyncGenerator, Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import QueuePool
 from sqlalchemy import event
 from app.core.config import settings
+from app.db.engine import ASYNC_POOL_SHARE, create_db_engine
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Get database URL from settings and convert to async URL
-DATABASE_URL = settings.SQLALCHEMY_DATABASE_URI
-if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+# The primary's pool for requests, sized from the connection budget
+engine = create_db_engine(settings.SQLALCHEMY_DATABASE_URI, name="primary", share=ASYNC_POOL_SHARE)
 
-# Create async engine with proper pooling
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=settings.DB_ECHO,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_timeout=settings.DB_POOL_TIMEOUT,
-    pool_pre_ping=True,  # Enable connection health checks
-)
+# Read replicas; read-only endpoints use them through app.db.replicas
+replica_engines = [
+    create_db_engine(url.strip(), name=f"replica_{index}")
+    for index, url in enumerate(url for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip())
+]
 
 # Create async session factory
 async_session_factory = async_sessionmaker(
@@ -36,9 +30,9 @@ async_session_factory = async_sessionmaker(
 Base = declarative_base()
 
 @asynccontextmanager
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    """Get a database session with automatic cleanup."""
-    session = async_session_factory()
+async def get_session(bind: Optional[AsyncEngine] = None) -> AsyncGenerator[AsyncSession, None]:
+    """Get a database session with automatic cleanup, on `bind` if given (e.g. a replica)."""
+    session = async_session_factory(bind=bind) if bind is not None else async_session_factory()
     try:
         yield session
     except Exception as e:
@@ -58,13 +52,3 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 def connect(dbapi_connection, connection_record):
     """Log when a connection is created."""
     logger.info("Database connection established")
-
-@event.listens_for(engine.sync_engine, "checkout")
-def checkout(dbapi_connection, connection_record, connection_proxy):
-    """Log when a connection is checked out from the pool."""
-    logger.debug("Database connection retrieved from pool")
-
-@event.listens_for(engine.sync_engine, "checkin")
-def checkin(dbapi_connection, connection_record):
-    """Log when a connection is returned to the pool."""
-    logger.debug("Database connection returned to pool")
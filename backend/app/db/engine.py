@@ -0,0 +1,186 @@
+"""
+Database engine factory.
+
+Every engine the app opens (the async primary for requests, the sync primary
+for background jobs and scripts, the read replicas) is built here, with its
+pool sized from one connection budget and instrumented for the pool metrics.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+# Share of a worker's connections each primary pool gets: requests use the
+# async pool, background jobs (transcription progress) the sync one
+ASYNC_POOL_SHARE = 0.75
+SYNC_POOL_SHARE = 0.25
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def worker_connections() -> int:
+    """This worker's share of the connection budget"""
+    return max(settings.DB_CONNECTION_BUDGET // max(settings.WEB_CONCURRENCY, 1), 2)
+
+def pool_limits(share: float) -> Tuple[int, int]:
+    """
+    (pool_size, max_overflow) for a pool allowed `share` of this worker's
+    connections; a third of them are overflow, opened only under load.
+    """
+    connections = max(int(worker_connections() * share), 1)
+    overflow = connections // 3
+    return connections - overflow, overflow
+
+class PoolMetrics:
+    """Checkout counters and wait-time histogram for one pool"""
+    def __init__(self, name: str, engine: Engine, max_connections: Optional[int] = None):
+        self.name = name
+        self.engine = engine
+        self.max_connections = max_connections
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_sum += seconds
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[index] += 1
+
+    def checked_out(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def checked_in(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+class _MeteredPool:
+    # Pools are recreated on dispose with the same logging name, which is
+    # how a pool finds its metrics
+    def connect(self):
+        metrics = pool_metrics.get(self.logging_name)
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            if metrics is not None:
+                metrics.timed_out()
+            raise
+        finally:
+            if metrics is not None:
+                metrics.observe_wait(time.perf_counter() - start)
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+def _async_url(url: str) -> str:
+    """Convert a database URL to its async driver, handling Render's postgres:// format"""
+    for scheme in ("postgres://", "postgresql://"):
+        if url.startswith(scheme):
+            return url.replace(scheme, "postgresql+asyncpg://", 1)
+    return url
+
+def _sync_url(url: str) -> str:
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+def create_db_engine(
+    url: str, *, name: str, share: float = 1.0, asynchronous: bool = True
+) -> Union[AsyncEngine, Engine]:
+    """
+    An engine for `url` whose pool holds at most its `share` of this
+    worker's connection budget, reported in the pool metrics as `name`.
+    SQLite keeps its own pooling.
+    """
+    url = _async_url(url) if asynchronous else _sync_url(url)
+    options = dict(echo=settings.DB_ECHO, pool_pre_ping=True, pool_logging_name=name)
+    max_connections = None
+    if not url.startswith("sqlite"):
+        pool_size, max_overflow = pool_limits(share)
+        options.update(
+            poolclass=MeteredAsyncQueuePool if asynchronous else MeteredQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+        max_connections = pool_size + max_overflow
+    engine = create_async_engine(url, **options) if asynchronous else create_engine(url, **options)
+    sync_engine = engine.sync_engine if asynchronous else engine
+
+    metrics = PoolMetrics(name, sync_engine, max_connections)
+    pool_metrics[name] = metrics
+
+    @event.listens_for(sync_engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        """Count a connection checked out of the pool."""
+        metrics.checked_out()
+
+    @event.listens_for(sync_engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        """Count a connection returned to the pool."""
+        metrics.checked_in()
+
+    return engine
+
+def render_pool_metrics() -> str:
+    """The pool metrics of this worker in the Prometheus text format"""
+    worker = str(os.getpid())
+    families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def sample(name: str, kind: str, help: str, labels: Dict[str, str], value: float, suffix: str = "") -> None:
+        label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+        families.setdefault(name, (kind, help, []))[2].append(f"{name}{suffix}{{{label_text}}} {value}")
+
+    for metrics in pool_metrics.values():
+        labels = {"pool": metrics.name, "worker": worker}
+        pool = metrics.engine.pool
+        if metrics.max_connections is not None:
+            sample("db_pool_max_connections", "gauge", "Most connections the pool may open",
+                   labels, metrics.max_connections)
+        if isinstance(pool, QueuePool):
+            sample("db_pool_size", "gauge", "Connections the pool keeps open", labels, pool.size())
+            sample("db_pool_overflow", "gauge", "Overflow connections open beyond the pool size",
+                   labels, max(pool.overflow(), 0))
+        sample("db_pool_checked_out", "gauge", "Connections currently checked out",
+               labels, metrics.checkouts - metrics.checkins)
+        sample("db_pool_checkouts_total", "counter", "Connections checked out", labels, metrics.checkouts)
+        sample("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting",
+               labels, metrics.timeouts)
+        wait = "db_pool_checkout_wait_seconds"
+        wait_help = "Time to get a connection from the pool"
+        for bound, count in zip(WAIT_BUCKETS, metrics.wait_buckets):
+            sample(wait, "histogram", wait_help, {**labels, "le": str(bound)}, count, "_bucket")
+        sample(wait, "histogram", wait_help, {**labels, "le": "+Inf"}, metrics.wait_count, "_bucket")
+        sample(wait, "histogram", wait_help, labels, metrics.wait_sum, "_sum")
+        sample(wait, "histogram", wait_help, labels, metrics.wait_count, "_count")
+
+    lines = []
+    for name, (kind, help, samples) in families.items():
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", *samples]
+    return "\n".join(lines) + "\n"
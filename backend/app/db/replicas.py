@@ -0,0 +1,139 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.db.database import engine, get_session, replica_engines
+
+logger = logging.getLogger(__name__)
+
+# Cookie carrying the time of the client's last write, while it is recent
+LAST_WRITE_COOKIE = "last_write"
+
+# A client that wrote is kept on the primary at least as long as a replica
+# may lag, so a replica it is sent back to already has the write
+READ_YOUR_WRITES_WINDOW = max(settings.READ_YOUR_WRITES_SECONDS, settings.REPLICA_MAX_LAG_SECONDS)
+
+# Seconds since the last replayed transaction; zero when caught up (or not
+# a replica at all), NULL when nothing has been replayed yet
+_POSTGRESQL_LAG = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+class ReplicaRouter:
+    """
+    Picks a replica for read-only work, round robin over those whose
+    replication lag is within `max_lag` seconds. Lag is measured at most
+    every `check_interval` seconds per replica, by one request at a time
+    (the others wait for its result); a replica that can't be measured
+    within `probe_timeout` seconds counts as too far behind.
+    """
+    def __init__(self, engines: List[AsyncEngine], max_lag: float, check_interval: float,
+                 probe_timeout: float):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self._lags: Dict[int, Tuple[float, float]] = {}  # replica -> (checked at, lag)
+        self._locks = [asyncio.Lock() for _ in engines]
+        self._turn = itertools.count()
+
+    async def _measure(self, replica: AsyncEngine) -> float:
+        if replica.dialect.name != "postgresql":
+            return 0.0
+        async with replica.connect() as connection:
+            lag = await connection.scalar(_POSTGRESQL_LAG)
+        return math.inf if lag is None else float(lag)
+
+    def _cached_lag(self, index: int) -> Optional[float]:
+        checked_at, lag = self._lags.get(index, (-math.inf, math.inf))
+        return lag if time.monotonic() - checked_at < self.check_interval else None
+
+    async def lag(self, index: int) -> float:
+        lag = self._cached_lag(index)
+        if lag is not None:
+            return lag
+        async with self._locks[index]:
+            # Another request may have measured it while this one waited
+            lag = self._cached_lag(index)
+            if lag is not None:
+                return lag
+            try:
+                lag = await asyncio.wait_for(self._measure(self.engines[index]), timeout=self.probe_timeout)
+            except Exception as e:
+                logger.warning(f"Replica {index} lag check failed: {str(e) or type(e).__name__}")
+                lag = math.inf
+            self._lags[index] = (time.monotonic(), lag)
+        return lag
+
+    async def choose(self) -> Optional[AsyncEngine]:
+        """A replica that is close enough to the primary, or None"""
+        if not self.engines:
+            return None
+        start = next(self._turn)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if await self.lag(index) <= self.max_lag:
+                return self.engines[index]
+        return None
+
+replica_router = ReplicaRouter(
+    replica_engines,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_LAG_CHECK_SECONDS,
+    probe_timeout=settings.REPLICA_LAG_PROBE_TIMEOUT,
+)
+
+def wrote_recently(last_write: Optional[float]) -> bool:
+    return last_write is not None and time.time() - last_write < READ_YOUR_WRITES_WINDOW
+
+def last_write_from(cookies: Dict[str, str]) -> Optional[float]:
+    try:
+        return float(cookies[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+@asynccontextmanager
+async def get_read_session(last_write: Optional[float] = None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    A session for read-only work: on a replica, unless the client wrote
+    within the read-your-writes window or every replica lags too far behind,
+    in which case it is on the primary.
+    """
+    replica = None if wrote_recently(last_write) else await replica_router.choose()
+    async with get_session(bind=replica) as session:
+        yield session
+
+# Write tracking. The middleware opens a tracker per request; statements
+# that change rows on the primary mark it, and the response then carries
+# the last-write cookie.
+
+class WriteTracker:
+    wrote: bool = False
+
+_write_tracker: ContextVar[Optional[WriteTracker]] = ContextVar("write_tracker", default=None)
+
+@contextmanager
+def track_writes() -> Iterator[WriteTracker]:
+    tracker = WriteTracker()
+    token = _write_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _write_tracker.reset(token)
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _mark_write(connection, cursor, statement, parameters, context, executemany):
+    tracker = _write_tracker.get()
+    if tracker is not None and (context.isinsert or context.isupdate or context.isdelete):
+        tracker.wrote = True
@@ -0,0 +1,27 @@
+import argparse
+import logging
+from typing import Optional
+
+from app.db.session import get_db_context
+
+logger = logging.getLogger(__name__)
+
+def rebuild_study_stats(user_id: Optional[int] = None) -> int:
+    """
+    Recompute the study-stats rollup tables from the study sessions, for all
+    users or just one. Use it to backfill or to repair drifted totals.
+    """
+    from app.crud.crud_study import study
+
+    with get_db_context() as db:
+        rebuilt = study.rebuild_rollups(db, user_id=user_id)
+    logger.info(f"Rebuilt study stats for {rebuilt} user(s)")
+    return rebuilt
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the study-stats rollup tables")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's rollups")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rebuild_study_stats(args.user_id)
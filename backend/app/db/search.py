@@ -0,0 +1,123 @@
+"""
+Full-text search indexes.
+
+PostgreSQL keeps a weighted `search_vector` tsvector column on each searched
+table, maintained by a trigger and indexed with GIN. SQLite (local
+development) keeps an external-content FTS5 table per searched table,
+maintained by triggers. Neither is mapped on the models; `create_all`
+installs them through the metadata events below and migrations do the same.
+"""
+from typing import List, NamedTuple, Tuple
+
+from sqlalchemy import event
+
+from app.db.base_class import Base
+
+# Text search configuration (stemming and stop words) for PostgreSQL
+TEXT_SEARCH_CONFIG = "english"
+
+
+class SearchSource(NamedTuple):
+    kind: str  # Result type clients filter on
+    table: str
+    columns: Tuple[str, ...]  # Searched text, most important first
+    weights: Tuple[str, ...]  # PostgreSQL setweight label per column
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+
+SEARCH_SOURCES = (
+    SearchSource("recording", "recordings", ("title", "summary", "transcription"), ("A", "B", "C")),
+    SearchSource("study_session", "study_sessions", ("notes",), ("B",)),
+    SearchSource("saved_paper", "saved_papers", ("notes",), ("B",)),
+)
+
+
+def search_vector(source: SearchSource, row: str = "") -> str:
+    """The tsvector expression for a row's searched columns (e.g. row="NEW.")"""
+    return " || ".join(
+        f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce({row}{column}, '')), '{weight}')"
+        for column, weight in zip(source.columns, source.weights)
+    )
+
+
+def postgresql_ddl(source: SearchSource) -> List[str]:
+    table = source.table
+    function = f"{table}_search_vector_update"
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector",
+        f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$ "
+        f"BEGIN NEW.search_vector := {search_vector(source, 'NEW.')}; RETURN NEW; END "
+        f"$$ LANGUAGE plpgsql",
+        f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}",
+        # Only rewriting the searched columns recomputes the vector
+        f"CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {', '.join(source.columns)} "
+        f"ON {table} FOR EACH ROW EXECUTE FUNCTION {function}()",
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)",
+        f"UPDATE {table} SET search_vector = {search_vector(source)} WHERE search_vector IS NULL",
+    ]
+
+
+def sqlite_ddl(source: SearchSource) -> List[str]:
+    table, fts = source.table, source.fts_table
+    columns = ", ".join(source.columns)
+    new = ", ".join(f"new.{column}" for column in source.columns)
+    old = ", ".join(f"old.{column}" for column in source.columns)
+    # External-content deletes must repeat the indexed values
+    remove = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    add = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, content='{table}', "
+        f"content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {add} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {remove} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {columns} ON {table} "
+        f"BEGIN {remove} {add} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _sources(tables) -> List[SearchSource]:
+    names = {table.name for table in tables} if tables is not None else None
+    return [source for source in SEARCH_SOURCES if names is None or source.table in names]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def install_search(target, connection, tables=None, **kw):
+    """Create the search columns, tables and triggers for the tables just created"""
+    if connection.dialect.name == "postgresql":
+        ddl = postgresql_ddl
+    elif connection.dialect.name == "sqlite":
+        ddl = sqlite_ddl
+    else:
+        return
+    for source in _sources(tables):
+        for statement in ddl(source):
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_drop")
+def remove_search(target, connection, tables=None, **kw):
+    """Drop what `install_search` created outside the dropped tables"""
+    for source in _sources(tables):
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql(f"DROP FUNCTION IF EXISTS {source.table}_search_vector_update()")
+        elif connection.dialect.name == "sqlite":
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {source.fts_table}")
+
+
+def is_search_object(name: str, type_: str) -> bool:
+    """Whether a reflected schema object belongs to the search indexes (for Alembic autogenerate)"""
+    if type_ == "column":
+        return name == "search_vector"
+    if type_ == "index":
+        return name.startswith("ix_") and name.endswith("_search_vector")
+    if type_ == "table":
+        # FTS5 virtual tables and their shadow tables
+        return any(
+            name == source.fts_table or name.startswith(f"{source.fts_table}_")
+            for source in SEARCH_SOURCES
+        )
+    return False
@@ -1,22 +1,18 @@
-from sqlalchemy import create_engine
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 from contextlib import contextmanager
 
 from app.core.config import get_settings
+from app.db.engine import SYNC_POOL_SHARE, create_db_engine
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-# Create engine with connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,  # Recycle connections after 30 minutes
-    pool_pre_ping=True,  # Enable connection health checks
+# Sync engine for background jobs and scripts, sized from the connection budget
+engine = create_db_engine(
+    settings.SQLALCHEMY_DATABASE_URI, name="primary_sync", share=SYNC_POOL_SHARE, asynchronous=False
 )
 
 SessionLocal = sessionmaker(
@@ -62,7 +58,7 @@ def check_db_connection():
     """Check if database connection is working."""
     try:
         with get_db_context() as db:
-            db.execute("SELECT 1")
+            db.execute(text("SELECT 1"))
         return True
     except SQLAlchemyError as e:
         logger.error(f"Database connection check failed: {str(e)}")
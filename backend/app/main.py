@@ -1,13 +1,17 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.api import api_router
 from app.core.config import settings
 from app.core.health import check_services, get_health_status
 from app.api.errors import APIError
+from app.db.engine import render_pool_metrics
+from app.db.replicas import LAST_WRITE_COOKIE, READ_YOUR_WRITES_WINDOW, track_writes
 import logging
+import math
+import secrets
 import time
 from typing import Callable
 import uvicorn
@@ -42,6 +46,21 @@ async def log_requests(request: Request, call_next: Callable):
     
     return response
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next: Callable):
+    """Mark clients that wrote, so their reads stay on the primary for a while."""
+    with track_writes() as writes:
+        response = await call_next(request)
+    if writes.wrote:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{time.time():.3f}",
+            max_age=math.ceil(READ_YOUR_WRITES_WINDOW),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -99,6 +118,16 @@ async def services_health_check():
     """Detailed services health check."""
     return await check_services()
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    """Database pool metrics of the worker serving the request, for Prometheus."""
+    if not settings.METRICS_TOKEN:
+        raise StarletteHTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise StarletteHTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(render_pool_metrics(), media_type="text/plain; version=0.0.4")
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
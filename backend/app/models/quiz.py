@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, JSON, Float, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -18,14 +18,72 @@ class QuizQuestion(Base):
     # Relationships
     quiz = relationship("Quiz", back_populates="questions")
 
+    __table_args__ = (
+        Index("ix_quiz_questions_quiz_id", "quiz_id"),
+    )
+
 class Quiz(Base):
     __tablename__ = "quizzes"
 
     id = Column(Integer, primary_key=True, index=True)
     recording_id = Column(Integer, ForeignKey("recordings.id"))
+    score = Column(Float, nullable=True)  # Percentage, set when the quiz is submitted
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     recording = relationship("Recording", back_populates="quizzes")
     questions = relationship("QuizQuestion", back_populates="quiz", cascade="all, delete-orphan")
+    attempts = relationship("QuizAttempt", back_populates="quiz", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # Quizzes per recording, newest first; score is carried in the index
+        # (PostgreSQL) so progress averages are answered from it alone
+        Index(
+            "ix_quizzes_recording_created", "recording_id", "created_at", "id",
+            postgresql_include=["score"],
+        ),
+    )
+
+class QuizAttempt(Base):
+    """One submission of a quiz, scored from its answers"""
+    __tablename__ = "quiz_attempts"
+
+    id = Column(Integer, primary_key=True)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=True)  # Percentage, set once the answers are scored
+    correct_answers = Column(Integer, nullable=True)
+    total_questions = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())  # Submitted at
+
+    # Relationships
+    quiz = relationship("Quiz", back_populates="attempts")
+    answers = relationship("QuestionAnswer", back_populates="attempt", cascade="all, delete-orphan",
+                           passive_deletes=True)
+
+    __table_args__ = (
+        # A user's attempts, newest first (history and per-user analytics)
+        Index("ix_quiz_attempts_user_created", "user_id", "created_at", "id"),
+        Index("ix_quiz_attempts_quiz_user", "quiz_id", "user_id"),
+    )
+
+class QuestionAnswer(Base):
+    """The option chosen for one question in an attempt"""
+    __tablename__ = "question_answers"
+
+    id = Column(Integer, primary_key=True)
+    attempt_id = Column(Integer, ForeignKey("quiz_attempts.id", ondelete="CASCADE"), nullable=False)
+    question_id = Column(Integer, ForeignKey("quiz_questions.id", ondelete="CASCADE"), nullable=False)
+    selected_option = Column(Integer, nullable=False)  # Index of the chosen option
+    is_correct = Column(Boolean, nullable=False)
+
+    # Relationships
+    attempt = relationship("QuizAttempt", back_populates="answers")
+
+    __table_args__ = (
+        UniqueConstraint("attempt_id", "question_id", name="uq_question_answers_attempt_question"),
+        # Per-question analytics (how often each question is answered
+        # correctly) are answered from this index alone
+        Index("ix_question_answers_question_correct", "question_id", "is_correct"),
+    )
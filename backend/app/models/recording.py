@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -11,9 +11,12 @@ class Recording(Base):
     duration = Column(String)  # Duration in format "HH:MM:SS"
     summary = Column(Text, nullable=True)
     transcription = Column(Text, nullable=True)
+    transcription_status = Column(String, default="pending", server_default="pending")  # pending, processing, completed, failed
+    transcribed_seconds = Column(Float, nullable=True)  # Audio covered by the transcript segments stored so far
     file_path = Column(String)  # Internal use only, not exposed to frontend
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # Soft deleted; the reaper removes it
     
     # Foreign Keys
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -23,3 +26,17 @@ class Recording(Base):
     quizzes = relationship("Quiz", back_populates="recording", cascade="all, delete-orphan")
     research_recommendations = relationship("ResearchRecommendation", back_populates="recording", cascade="all, delete-orphan")
     study_sessions = relationship("StudySession", back_populates="recording", cascade="all, delete-orphan")
+    segments = relationship("TranscriptSegment", back_populates="recording", cascade="all, delete-orphan",
+                            order_by="TranscriptSegment.position")
+
+    __table_args__ = (
+        # A user's recordings, newest first: listings, keyset cursors and the
+        # ownership subqueries of the progress aggregates
+        Index("ix_recordings_user_created", "user_id", "created_at", "id"),
+        # Just the recordings waiting for the reaper
+        Index(
+            "ix_recordings_deleted_at", "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
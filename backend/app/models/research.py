@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -33,6 +33,10 @@ class ResearchRecommendation(Base):
     recording = relationship("Recording", back_populates="research_recommendations")
     saved_papers = relationship("SavedPaper", back_populates="recommendation", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_research_recommendations_recording_created", "recording_id", "created_at", "id"),
+    )
+
 class SavedPaper(Base):
     __tablename__ = "saved_papers"
 
@@ -48,3 +52,7 @@ class SavedPaper(Base):
     # Relationships
     recommendation = relationship("ResearchRecommendation", back_populates="saved_papers")
     user = relationship("User", back_populates="saved_papers")
+
+    __table_args__ = (
+        Index("ix_saved_papers_user_created", "user_id", "created_at"),
+    )
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Index, text
+from sqlalchemy.orm import column_property, relationship
 from datetime import datetime
 from app.db.base_class import Base
 
@@ -8,14 +8,47 @@ class StudySession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     start_time = Column(DateTime, default=datetime.utcnow)
-    end_time = Column(DateTime, nullable=True)
-    duration = Column(Float, nullable=True)  # Duration in minutes
+    # Columns the study-stats rollups are keyed or totalled on keep their
+    # previous value on change (active history) so the rollups can be adjusted
+    end_time = column_property(Column(DateTime, nullable=True), active_history=True)
+    duration = column_property(Column(Float, nullable=True), active_history=True)  # Duration in minutes
     notes = Column(Text, nullable=True)
     
     # Foreign Keys
-    recording_id = Column(Integer, ForeignKey("recordings.id"))
-    user_id = Column(Integer, ForeignKey("users.id"))
+    recording_id = column_property(Column(Integer, ForeignKey("recordings.id")), active_history=True)
+    user_id = column_property(Column(Integer, ForeignKey("users.id")), active_history=True)
     
     # Relationships
     recording = relationship("Recording", back_populates="study_sessions")
     user = relationship("User", back_populates="study_sessions")
+
+    __table_args__ = (
+        Index("ix_study_sessions_recording_user", "recording_id", "user_id"),
+        # Statistics only count finished sessions; the partial index holds just
+        # those, with the aggregated columns included (PostgreSQL)
+        Index(
+            "ix_study_sessions_user_finished", "user_id", "recording_id",
+            postgresql_include=["duration", "end_time"],
+            postgresql_where=text("duration IS NOT NULL"),
+            sqlite_where=text("duration IS NOT NULL"),
+        ),
+    )
+
+class UserStudyStats(Base):
+    """Running totals of a user's finished study sessions"""
+    __tablename__ = "user_study_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_sessions = Column(Integer, nullable=False, default=0, server_default="0")
+    total_duration = Column(Float, nullable=False, default=0.0, server_default="0")  # Minutes
+    last_session = Column(DateTime, nullable=True)  # Latest end_time
+
+class RecordingStudyStats(Base):
+    """Running totals of a user's finished study sessions on one recording"""
+    __tablename__ = "recording_study_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    recording_id = Column(Integer, ForeignKey("recordings.id", ondelete="CASCADE"), primary_key=True)
+    total_sessions = Column(Integer, nullable=False, default=0, server_default="0")
+    total_duration = Column(Float, nullable=False, default=0.0, server_default="0")  # Minutes
+    last_session = Column(DateTime, nullable=True)  # Latest end_time
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, SmallInteger, ForeignKey, Text, Index
+from sqlalchemy.orm import relationship
+from app.db.base_class import Base
+
+class TranscriptSegment(Base):
+    __tablename__ = "transcript_segments"
+
+    id = Column(Integer, primary_key=True)
+    position = Column(Integer, nullable=False)  # Order within the recording
+    start_ms = Column(Integer, nullable=False)  # Audio offset of the segment start
+    end_ms = Column(Integer, nullable=False)
+    speaker = Column(SmallInteger, nullable=True)  # Speaker cluster label, None if unknown
+    text = Column(Text, nullable=False)
+
+    # Foreign Keys
+    recording_id = Column(Integer, ForeignKey("recordings.id", ondelete="CASCADE"), nullable=False)
+
+    # Relationships
+    recording = relationship("Recording", back_populates="segments")
+
+    __table_args__ = (
+        # Segment lookups are always per recording, by order or by audio offset
+        Index("ix_transcript_segments_recording_start", "recording_id", "start_ms"),
+    )
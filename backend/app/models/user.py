@@ -20,3 +20,4 @@ class User(Base):
     profile = relationship("Profile", back_populates="user", uselist=False, cascade="all, delete-orphan")
     recordings = relationship("Recording", back_populates="user", cascade="all, delete-orphan")
     saved_papers = relationship("SavedPaper", back_populates="user", cascade="all, delete-orphan")
+    study_sessions = relationship("StudySession", back_populates="user", cascade="all, delete-orphan")
@@ -1,55 +1,58 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user, get_db
-from app.api.errors import NotFoundError
+from app.api.deps import get_current_active_user, get_db, get_read_db
+from app.api.errors import NotFoundError, ValidationError
 from app.api.responses import create_success_response
-from app.api.pagination import PaginationParams, paginate_query
-from app.crud.crud_quiz import quiz as crud_quiz
+from app.api.pagination import PaginationParams, paginate
+from app.crud.crud_quiz import async_quiz as crud_quiz
+from app.models.quiz import Quiz as QuizModel, QuizAttempt as QuizAttemptModel
 from app.models.user import User
-from app.schemas.quiz import QuizCreate, QuizUpdate, Quiz
+from app.schemas.quiz import QuizCreate, QuizSubmission, Quiz
 from app.utils.quiz import generate_quiz_questions
 
 router = APIRouter()
 
 @router.get("/", response_model=dict)
-def get_quizzes(
+async def get_quizzes(
     params: PaginationParams = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Get paginated quizzes for the current user.
     """
-    query = crud_quiz.get_multi_by_user(db, user_id=current_user.id)
+    stmt = crud_quiz.get_multi_by_user(user_id=current_user.id)
     return create_success_response(
-        data=paginate_query(query, params),
+        data=await paginate(db, stmt, params, QuizModel, cache_key=(current_user.id, "quizzes")),
         message="Quizzes retrieved successfully",
     )
 
 @router.post("/generate/{recording_id}", response_model=dict)
 async def generate_quiz(
     recording_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Generate a new quiz for a recording.
     """
     # First check if recording exists and belongs to user
-    recording = crud_quiz.get_recording(db, recording_id=recording_id)
+    recording = await crud_quiz.get_recording(db, recording_id=recording_id)
     if not recording or recording.user_id != current_user.id:
         raise NotFoundError(detail="Recording not found")
+    if not recording.transcription:
+        raise ValidationError(detail="Recording has not been transcribed yet")
 
     # Generate quiz questions using AI
-    questions = await generate_quiz_questions(recording.transcript)
+    questions = await generate_quiz_questions(recording.transcription)
     
     # Create quiz
     quiz_data = QuizCreate(
         recording_id=recording_id,
         questions=questions,
     )
-    quiz = crud_quiz.create_with_user(
+    quiz = await crud_quiz.create_with_user(
         db=db,
         obj_in=quiz_data,
         user_id=current_user.id,
@@ -61,15 +64,15 @@ async def generate_quiz(
     )
 
 @router.get("/{quiz_id}", response_model=dict)
-def get_quiz(
+async def get_quiz(
     quiz_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Get a specific quiz by ID.
     """
-    quiz = crud_quiz.get(db=db, id=quiz_id)
+    quiz = await crud_quiz.get(db=db, id=quiz_id)
     if not quiz or quiz.user_id != current_user.id:
         raise NotFoundError(detail="Quiz not found")
     
@@ -79,55 +82,82 @@ def get_quiz(
     )
 
 @router.post("/{quiz_id}/submit", response_model=dict)
-def submit_quiz(
+async def submit_quiz(
     quiz_id: int,
-    answers: dict[int, str],
-    db: Session = Depends(get_db),
+    submission: QuizSubmission,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
-    Submit answers for a quiz and get results.
+    Submit answers for a quiz and get results. Every submission is kept as
+    an attempt.
     """
-    quiz = crud_quiz.get(db=db, id=quiz_id)
-    if not quiz or quiz.user_id != current_user.id:
+    quiz = await crud_quiz.get_by_user(db, id=quiz_id, user_id=current_user.id)
+    if not quiz:
         raise NotFoundError(detail="Quiz not found")
     
-    # Calculate score and update quiz
-    score = crud_quiz.calculate_score(quiz, answers)
-    quiz_update = QuizUpdate(
-        completed=True,
-        score=score,
-        submitted_answers=answers,
-    )
-    quiz = crud_quiz.update(
+    result = await crud_quiz.submit_answers(
         db=db,
-        db_obj=quiz,
-        obj_in=quiz_update,
+        quiz=quiz,
+        user_id=current_user.id,
+        answers=submission,
     )
     
     return create_success_response(
-        data={
-            "quiz": quiz,
-            "score": score,
-            "feedback": crud_quiz.generate_feedback(quiz, answers),
-        },
+        data=result,
         message="Quiz submitted successfully",
     )
 
+@router.get("/{quiz_id}/attempts", response_model=dict)
+async def get_quiz_attempts(
+    quiz_id: int,
+    params: PaginationParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get paginated attempts at a quiz by the current user, newest first.
+    """
+    if not await crud_quiz.get_by_user(db, id=quiz_id, user_id=current_user.id):
+        raise NotFoundError(detail="Quiz not found")
+
+    stmt = crud_quiz.get_attempts_by_user(user_id=current_user.id, quiz_id=quiz_id)
+    return create_success_response(
+        data=await paginate(db, stmt, params, QuizAttemptModel),
+        message="Quiz attempts retrieved successfully",
+    )
+
+@router.get("/{quiz_id}/stats", response_model=dict)
+async def get_quiz_stats(
+    quiz_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get how often each question of a quiz has been answered correctly.
+    """
+    if not await crud_quiz.get_by_user(db, id=quiz_id, user_id=current_user.id):
+        raise NotFoundError(detail="Quiz not found")
+
+    return create_success_response(
+        data=await crud_quiz.get_question_stats(db, quiz_id=quiz_id),
+        message="Quiz statistics retrieved successfully",
+    )
+
 @router.delete("/{quiz_id}", response_model=dict)
-def delete_quiz(
+async def delete_quiz(
     quiz_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Delete a quiz.
     """
-    quiz = crud_quiz.get(db=db, id=quiz_id)
+    quiz = await crud_quiz.get(db=db, id=quiz_id)
     if not quiz or quiz.user_id != current_user.id:
         raise NotFoundError(detail="Quiz not found")
     
-    crud_quiz.remove(db=db, id=quiz_id)
+    await crud_quiz.remove(db=db, id=quiz_id)
     return create_success_response(
         message="Quiz deleted successfully",
     )
@@ -1,38 +1,74 @@
-from fastapi import APIRouter, Depends, File, UploadFile
-from sqlalchemy.orm import Session
+import asyncio
+import logging
 
-from app.api.deps import get_current_active_user, get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Request, UploadFile, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_active_user, get_db, get_read_db
 from app.api.errors import NotFoundError, ValidationError
 from app.api.responses import create_success_response
-from app.api.pagination import PaginationParams, paginate_query
-from app.crud.crud_recording import recording as crud_recording
+from app.api.fields import FieldSelection, loaded_columns
+from app.api.pagination import PaginationParams, paginate
+from app.api.streaming import RangeFileResponse, sse_event
+from app.core.config import settings
+from app.core.deps import get_user_from_token
+from app.db.database import get_session
+from app.crud.crud_recording import async_recording as crud_recording
+from app.crud.crud_transcript import async_transcript_segment as crud_transcript_segment
+from app.models.recording import Recording as RecordingModel
 from app.models.user import User
 from app.schemas.recording import RecordingCreate, RecordingUpdate, Recording
-from app.utils.audio import process_audio_file
-from app.utils.storage import save_file
+from app.schemas.transcript import TranscriptSegment
+from app.core.audio import process_audio_file
+from app.utils.storage import storage
+from app.utils.live import LiveTranscriptionSession
+from app.utils.reaper import reap_deleted_recordings
+from app.utils.progress import (
+    poll_transcript_progress,
+    save_transcript_segments,
+    transcribe_recording,
+    transcript_broker,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Storage paths are internal, and deleted recordings are never returned
+HIDDEN_COLUMNS = ("file_path", "deleted_at")
+
+def _recording_data(recording: RecordingModel) -> dict:
+    return loaded_columns(recording, exclude=HIDDEN_COLUMNS)
+
 @router.get("/", response_model=dict)
-def get_recordings(
+async def get_recordings(
     params: PaginationParams = Depends(),
-    db: Session = Depends(get_db),
+    fields: FieldSelection = Depends(),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Get paginated recordings for the current user.
+    Large fields (`transcription`, `summary`) are only included
+    when named in `fields`.
     """
-    query = crud_recording.get_multi_by_user(db, user_id=current_user.id)
+    stmt = crud_recording.get_multi_by_user(
+        user_id=current_user.id, fields=fields.include(crud_recording.deferred_columns)
+    )
+    page = await paginate(db, stmt, params, RecordingModel, cache_key=(current_user.id, "recordings"))
+    page["items"] = [_recording_data(recording) for recording in page["items"]]
     return create_success_response(
-        data=paginate_query(query, params),
+        data=page,
         message="Recordings retrieved successfully",
     )
 
 @router.post("/", response_model=dict)
 async def create_recording(
     title: str,
+    background_tasks: BackgroundTasks,
     audio_file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
@@ -46,85 +82,247 @@ async def create_recording(
         )
     
     # Save audio file
-    file_path = await save_file(audio_file, "recordings")
+    file_path = await storage.save_upload(audio_file, current_user.id)
     
-    # Process audio file (transcription, etc.)
-    audio_data = await process_audio_file(file_path)
+    # Read its duration (decoding blocks, so off the event loop)
+    _, duration = await asyncio.get_event_loop().run_in_executor(None, process_audio_file, file_path)
     
     # Create recording
     recording_data = RecordingCreate(
         title=title,
         file_path=file_path,
-        duration=audio_data.duration,
-        transcription=audio_data.transcription,
+        duration=duration,
     )
-    recording = crud_recording.create_with_user(
+    recording = await crud_recording.create_with_user(
         db=db,
         obj_in=recording_data,
         user_id=current_user.id,
     )
+
+    # Transcribe in the background; clients follow progress on
+    # /recordings/{id}/transcript/stream
+    background_tasks.add_task(transcribe_recording, recording.id, file_path)
     
     return create_success_response(
-        data=recording,
+        data=_recording_data(recording),
         message="Recording created successfully",
     )
 
+@router.websocket("/live")
+async def live_recording(
+    websocket: WebSocket,
+    title: str,
+):
+    """
+    Record and transcribe a lecture live.
+
+    The first message must be a text frame holding the access token (not a
+    query parameter, which would end up in access logs); the socket is
+    closed with 1008 if it is missing, invalid or takes longer than
+    LIVE_AUTH_TIMEOUT. The client then streams binary frames of 16 kHz mono little-endian int16 PCM
+    and receives `{"type": "transcript", ...}` messages as speech segments
+    are transcribed. Sending the text message `stop` (or closing the socket)
+    finishes the lecture; the stored recording is created right away from
+    the already-transcribed segments and announced with
+    `{"type": "complete", "recording_id": ...}`.
+
+    A lecture can run for hours, so no database session is held while it
+    streams: short ones authenticate the client and store the recording.
+    """
+    await websocket.accept()
+    try:
+        message = await asyncio.wait_for(websocket.receive(), timeout=settings.LIVE_AUTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        message = {}
+    if message.get("type") == "websocket.disconnect":
+        return
+    token = message.get("text")
+    async with get_session() as db:
+        current_user = await get_user_from_token(db, token) if token else None
+    if not current_user or not current_user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    user_id = current_user.id
+
+    session = LiveTranscriptionSession(websocket.send_json)
+    connected = True
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text") == "stop":
+                break
+    except WebSocketDisconnect:
+        connected = False
+
+    try:
+        transcription, duration = await session.finish()
+        loop = asyncio.get_event_loop()
+        file_path = await loop.run_in_executor(
+            None, storage.save_pcm, session.spool_path, session.sample_rate, user_id
+        )
+        await loop.run_in_executor(
+            None, storage.build_analysis_from_pcm, session.spool_path, file_path
+        )
+    finally:
+        session.cleanup()
+
+    async with get_session() as db:
+        recording = await crud_recording.create_with_user(
+            db=db,
+            obj_in=RecordingCreate(title=title, file_path=file_path, duration=duration),
+            user_id=user_id,
+            transcription=transcription,
+        )
+    try:
+        await asyncio.get_event_loop().run_in_executor(
+            None, save_transcript_segments, recording.id, file_path, session.segments
+        )
+    finally:
+        # Only needed to label the segments' speakers
+        storage.delete_analysis(file_path)
+    logger.info(f"Live recording {recording.id} stored ({duration:.0f}s)")
+
+    if connected:
+        await websocket.send_json({"type": "complete", "recording_id": recording.id})
+        await websocket.close()
+
+@router.get("/{recording_id}/transcript/stream")
+async def stream_recording_transcript(
+    recording_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Stream a recording's transcript as Server-Sent Events while it is being
+    transcribed. Each `chunk` event carries the text and its start/end
+    offsets in seconds, in order; the stream ends with `complete` or `error`.
+    """
+    recording = await crud_recording.get(db=db, id=recording_id)
+    if not recording or recording.user_id != current_user.id:
+        raise NotFoundError(detail="Recording not found")
+
+    if transcript_broker.has_channel(recording_id):
+        events = transcript_broker.subscribe(recording_id)
+    else:
+        events = poll_transcript_progress(recording_id)
+
+    async def _event_stream():
+        async for event in events:
+            data = {key: value for key, value in event.items() if key != "type"}
+            yield sse_event(event["type"], data)
+
+    return StreamingResponse(
+        _event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{recording_id}/segments", response_model=dict)
+async def get_recording_segments(
+    recording_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get a recording's transcript segments in order, with audio offsets in
+    milliseconds and speaker labels (when speakers could be told apart).
+    """
+    recording = await crud_recording.get(db=db, id=recording_id)
+    if not recording or recording.user_id != current_user.id:
+        raise NotFoundError(detail="Recording not found")
+
+    segments = await crud_transcript_segment.get_by_recording(db=db, recording_id=recording_id)
+    return create_success_response(
+        data=[TranscriptSegment.model_validate(segment) for segment in segments],
+        message="Transcript segments retrieved successfully",
+    )
+
 @router.get("/{recording_id}", response_model=dict)
-def get_recording(
+async def get_recording(
     recording_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Get a specific recording by ID.
     """
-    recording = crud_recording.get(db=db, id=recording_id)
+    recording = await crud_recording.get(db=db, id=recording_id)
     if not recording or recording.user_id != current_user.id:
         raise NotFoundError(detail="Recording not found")
     
     return create_success_response(
-        data=recording,
+        data=_recording_data(recording),
         message="Recording retrieved successfully",
     )
 
+@router.get("/{recording_id}/audio")
+async def stream_recording_audio(
+    recording_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Stream a recording's audio with HTTP Range support for seeking.
+    """
+    recording = await crud_recording.get(db=db, id=recording_id)
+    if not recording or recording.user_id != current_user.id:
+        raise NotFoundError(detail="Recording not found")
+
+    try:
+        return RangeFileResponse(recording.file_path, request)
+    except FileNotFoundError:
+        raise NotFoundError(detail="Recording audio not found")
+
 @router.put("/{recording_id}", response_model=dict)
-def update_recording(
+async def update_recording(
     recording_id: int,
     recording_in: RecordingUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Update a recording.
     """
-    recording = crud_recording.get(db=db, id=recording_id)
+    recording = await crud_recording.get(db=db, id=recording_id)
     if not recording or recording.user_id != current_user.id:
         raise NotFoundError(detail="Recording not found")
     
-    recording = crud_recording.update(
+    recording = await crud_recording.update(
         db=db,
         db_obj=recording,
         obj_in=recording_in,
     )
     return create_success_response(
-        data=recording,
+        data=_recording_data(recording),
         message="Recording updated successfully",
     )
 
 @router.delete("/{recording_id}", response_model=dict)
-def delete_recording(
+async def delete_recording(
     recording_id: int,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Delete a recording.
+
+    The recording is marked deleted and hidden right away; its quizzes,
+    research, study sessions, segments and stored files are removed in the
+    background.
     """
-    recording = crud_recording.get(db=db, id=recording_id)
+    recording = await crud_recording.get(db=db, id=recording_id)
     if not recording or recording.user_id != current_user.id:
         raise NotFoundError(detail="Recording not found")
     
-    crud_recording.remove(db=db, id=recording_id)
+    await crud_recording.soft_delete(db=db, db_obj=recording)
+    background_tasks.add_task(reap_deleted_recordings)
     return create_success_response(
         message="Recording deleted successfully",
     )
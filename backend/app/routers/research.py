@@ -1,106 +1,115 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import get_current_active_user, get_db, get_read_db
 from app.api.errors import NotFoundError
 from app.api.responses import create_success_response
-from app.api.pagination import PaginationParams, paginate_query
-from app.crud.crud_research import research as crud_research
+from app.api.fields import FieldSelection, loaded_columns
+from app.api.pagination import PaginationParams, paginate
+from app.crud.crud_research import async_research as crud_research
+from app.models.research import ResearchRecommendation
 from app.models.user import User
-from app.schemas.research import ResearchCreate, ResearchUpdate, Research
+from app.schemas.research import ResearchRecommendationCreate, ResearchRecommendationUpdate
 
 router = APIRouter()
 
 @router.get("/", response_model=dict)
-def get_research_papers(
+async def get_research_papers(
     params: PaginationParams = Depends(),
-    db: Session = Depends(get_db),
+    fields: FieldSelection = Depends(),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Get paginated research papers for the current user.
+    Large fields (`description`, `key_takeaways`) are only included
+    when named in `fields`.
     """
-    query = crud_research.get_multi_by_user(db, user_id=current_user.id)
+    stmt = crud_research.get_multi_by_user(
+        user_id=current_user.id, fields=fields.include(crud_research.deferred_columns)
+    )
+    page = await paginate(db, stmt, params, ResearchRecommendation, cache_key=(current_user.id, "research"))
+    page["items"] = [loaded_columns(research) for research in page["items"]]
     return create_success_response(
-        data=paginate_query(query, params),
+        data=page,
         message="Research papers retrieved successfully",
     )
 
 @router.post("/", response_model=dict)
-def create_research_paper(
-    research_in: ResearchCreate,
-    db: Session = Depends(get_db),
+async def create_research_paper(
+    research_in: ResearchRecommendationCreate,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Create a new research paper recommendation.
     """
-    research = crud_research.create_with_user(
+    research = await crud_research.create_with_user(
         db=db,
         obj_in=research_in,
         user_id=current_user.id,
     )
     return create_success_response(
-        data=research,
+        data=loaded_columns(research),
         message="Research paper created successfully",
     )
 
 @router.get("/{research_id}", response_model=dict)
-def get_research_paper(
+async def get_research_paper(
     research_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Get a specific research paper by ID.
     """
-    research = crud_research.get(db=db, id=research_id)
+    research = await crud_research.get(db=db, id=research_id)
     if not research or research.user_id != current_user.id:
         raise NotFoundError(detail="Research paper not found")
     
     return create_success_response(
-        data=research,
+        data=loaded_columns(research),
         message="Research paper retrieved successfully",
     )
 
 @router.put("/{research_id}", response_model=dict)
-def update_research_paper(
+async def update_research_paper(
     research_id: int,
-    research_in: ResearchUpdate,
-    db: Session = Depends(get_db),
+    research_in: ResearchRecommendationUpdate,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Update a research paper.
     """
-    research = crud_research.get(db=db, id=research_id)
+    research = await crud_research.get(db=db, id=research_id)
     if not research or research.user_id != current_user.id:
         raise NotFoundError(detail="Research paper not found")
     
-    research = crud_research.update(
+    research = await crud_research.update(
         db=db,
         db_obj=research,
         obj_in=research_in,
     )
     return create_success_response(
-        data=research,
+        data=loaded_columns(research),
         message="Research paper updated successfully",
     )
 
 @router.delete("/{research_id}", response_model=dict)
-def delete_research_paper(
+async def delete_research_paper(
     research_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Delete a research paper.
     """
-    research = crud_research.get(db=db, id=research_id)
+    research = await crud_research.get(db=db, id=research_id)
     if not research or research.user_id != current_user.id:
         raise NotFoundError(detail="Research paper not found")
     
-    crud_research.remove(db=db, id=research_id)
+    await crud_research.remove(db=db, id=research_id)
     return create_success_response(
         message="Research paper deleted successfully",
     )
@@ -0,0 +1,66 @@
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_active_user, get_read_db
+from app.api.errors import ValidationError
+from app.api.pagination import CursorPageInfo, decode_rank_cursor, encode_rank_cursor
+from app.api.responses import create_success_response
+from app.crud.crud_search import SEARCH_TYPES, async_search as crud_search
+from app.models.user import User
+
+router = APIRouter()
+
+@router.get("/", response_model=dict)
+async def search(
+    q: str = Query(..., min_length=1, max_length=256, description="Words or \"quoted phrases\" to find"),
+    types: Optional[str] = Query(
+        None,
+        description="Comma-separated result types to search: "
+                    "recording, study_session, saved_paper. Defaults to all.",
+    ),
+    per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from page_info.next_cursor"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Search the current user's transcripts, summaries, study notes and
+    saved-paper notes. Results are ranked by relevance, carry an excerpt
+    with the matches in <mark>, and are paginated by cursor.
+    """
+    if not re.search(r"\w", q):
+        raise ValidationError(detail="Search query has no words", code="INVALID_SEARCH_QUERY")
+    kinds = [kind.strip() for kind in types.split(",") if kind.strip()] if types else list(SEARCH_TYPES)
+    unknown = set(kinds) - set(SEARCH_TYPES)
+    if unknown or not kinds:
+        raise ValidationError(
+            detail=f"Unknown result types: {', '.join(sorted(unknown))}",
+            code="INVALID_SEARCH_TYPES",
+            params={"available": list(SEARCH_TYPES)},
+        )
+
+    results = await crud_search.search(
+        db,
+        user_id=current_user.id,
+        q=q,
+        types=kinds,
+        limit=per_page + 1,
+        after=decode_rank_cursor(cursor) if cursor else None,
+    )
+    has_next = len(results) > per_page
+    items = results[:per_page]
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_rank_cursor(last.rank, last.type, last.id)
+
+    return create_success_response(
+        data={
+            "items": items,
+            "page_info": CursorPageInfo(per_page=per_page, has_next=has_next, next_cursor=next_cursor),
+        },
+        message="Search results retrieved successfully",
+    )
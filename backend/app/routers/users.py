@@ -1,26 +1,67 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Any, AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_current_active_superuser
 from app.core.deps import get_db, get_current_user
-from app.crud.crud_user import user as crud_user
+from app.crud.crud_export import async_export as crud_export
+from app.crud.crud_user import async_user as crud_user
+from app.db.replicas import get_read_session, last_write_from
 from app.schemas.user import User, UserUpdate
 
 router = APIRouter()
 
 @router.get("/users/me", response_model=User)
-def read_user_me(
+async def read_user_me(
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """Get current user."""
     return current_user
 
 @router.put("/users/me", response_model=User)
-def update_user_me(
+async def update_user_me(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_in: UserUpdate,
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """Update own user."""
-    user = crud_user.update(db, db_obj=current_user, obj_in=user_in)
+    user = await crud_user.update(db, db_obj=current_user, obj_in=user_in)
     return user
+
+def _export_response(user_id: int, last_write: Optional[float]) -> StreamingResponse:
+    async def body() -> AsyncIterator[bytes]:
+        # The session lives as long as the stream, not the request handler
+        async with get_read_session(last_write) as db:
+            async for chunk in crud_export.stream(db, user_id=user_id):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="notewyze-export-{user_id}.ndjson"'},
+    )
+
+@router.get("/users/me/export")
+async def export_user_me(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Export all of the current user's data (recordings, transcripts,
+    quizzes, study sessions, research) as NDJSON, one
+    `{"type": ..., "data": {...}}` object per line, streamed as it is read.
+    """
+    return _export_response(current_user.id, last_write_from(request.cookies))
+
+@router.get("/users/{user_id}/export")
+async def export_user(
+    user_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser),
+) -> StreamingResponse:
+    """Export a user's data, as in /users/me/export (superusers only)."""
+    if not await crud_user.get(db, id=user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return _export_response(user_id, last_write_from(request.cookies))
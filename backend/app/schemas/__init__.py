@@ -1,7 +1,9 @@
 from .user import User, UserCreate, UserUpdate, UserInDB
 from .token import Token, TokenPayload
 from .recording import Recording, RecordingCreate, RecordingUpdate, RecordingInDB, RecordingWithProgress
+from .transcript import TranscriptSegment, TranscriptSegmentCreate
 from .research import ResearchRecommendation, ResearchRecommendationCreate, SavedPaper, SavedPaperCreate, SavedPaperUpdate
+from .search import SearchResult
 
 __all__ = [
     "User",
@@ -15,9 +17,12 @@ __all__ = [
     "RecordingUpdate",
     "RecordingInDB",
     "RecordingWithProgress",
+    "TranscriptSegment",
+    "TranscriptSegmentCreate",
     "ResearchRecommendation",
     "ResearchRecommendationCreate",
     "SavedPaper",
     "SavedPaperCreate",
-    "SavedPaperUpdate"
+    "SavedPaperUpdate",
+    "SearchResult"
 ]
@@ -5,7 +5,8 @@ from pydantic import BaseModel
 class QuestionBase(BaseModel):
     question: str
     options: List[str]
-    correct_answer: str
+    correct_answer: int  # Index of the correct option
+    explanation: Optional[str] = None
 
 class QuizBase(BaseModel):
     questions: List[QuestionBase]
@@ -31,7 +32,28 @@ class QuizInDBBase(QuizBase):
 class Quiz(QuizInDBBase):
     pass
 
+class QuizSubmission(BaseModel):
+    answers: Dict[int, int]  # Question ID to the index of the chosen option
+
+class QuizAttempt(BaseModel):
+    id: int
+    quiz_id: int
+    score: Optional[float] = None
+    correct_answers: Optional[int] = None
+    total_questions: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class QuestionStats(BaseModel):
+    question_id: int
+    answers: int
+    correct_answers: int
+    correct_rate: float
+
 class QuizResult(BaseModel):
+    attempt_id: int
     quiz_id: int
     score: float
     correct_answers: int
@@ -20,6 +20,8 @@ class RecordingInDBBase(RecordingBase):
     duration: float
     transcript: Optional[str] = None
     summary: Optional[str] = None
+    transcription_status: Optional[str] = None
+    transcribed_seconds: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     user_id: int
@@ -30,6 +32,9 @@ class RecordingInDBBase(RecordingBase):
 class Recording(RecordingInDBBase):
     pass
 
+class RecordingInDB(RecordingInDBBase):
+    pass
+
 class RecordingWithProgress(Recording):
     quiz_count: int
     average_quiz_score: Optional[float] = None
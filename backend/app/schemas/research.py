@@ -12,6 +12,13 @@ class ResearchRecommendationBase(BaseModel):
 class ResearchRecommendationCreate(ResearchRecommendationBase):
     recording_id: int
 
+class ResearchRecommendationUpdate(BaseModel):
+    title: Optional[str] = None
+    authors: Optional[str] = None
+    abstract: Optional[str] = None
+    url: Optional[HttpUrl] = None
+    relevance_score: Optional[float] = None
+
 class ResearchRecommendationInDBBase(ResearchRecommendationBase):
     id: int
     recording_id: int
@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class SearchResult(BaseModel):
+    type: str  # recording, study_session or saved_paper
+    id: int
+    recording_id: Optional[int] = None
+    title: Optional[str] = None  # Recording title, or the recommended paper's for saved papers
+    snippet: Optional[str] = None  # HTML-escaped excerpt with matches wrapped in <mark>
+    rank: float  # Higher is more relevant; only comparable within one search
@@ -0,0 +1,19 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class TranscriptSegmentBase(BaseModel):
+    position: int
+    start_ms: int
+    end_ms: int
+    speaker: Optional[int] = None
+    text: str
+
+class TranscriptSegmentCreate(TranscriptSegmentBase):
+    recording_id: int
+
+class TranscriptSegment(TranscriptSegmentBase):
+    id: int
+    recording_id: int
+
+    class Config:
+        from_attributes = True
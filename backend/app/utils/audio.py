@@ -1,14 +1,21 @@
 import os
 import asyncio
+import itertools
 from concurrent.futures import ThreadPoolExecutor
 import librosa
 import soundfile as sf
 import numpy as np
-from pydub import AudioSegment
 import google.generativeai as genai
 from dotenv import load_dotenv
 import tempfile
 import logging
+import uuid
+from typing import Awaitable, Callable, List, Optional, Tuple
+from app.utils.codec import encode_float_pcm_file, encode_samples, get_storage_profile
+from app.utils.denoise import denoise, denoise_blocks
+from app.utils.transcript_cache import cache_key, fingerprint_samples, transcript_cache
+from app.utils.storage import ANALYSIS_SAMPLE_RATE, storage
+from app.utils.vad import frame_energy
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -27,10 +34,125 @@ genai.configure(api_key=GEMINI_API_KEY)
 # Create a thread pool executor for CPU-intensive tasks
 executor = ThreadPoolExecutor(max_workers=3)
 
-async def process_audio(input_path: str) -> str:
+# Transcription model and prompt; bump the prompt version whenever the prompt
+# changes so cached chunk transcripts are not reused across prompts
+TRANSCRIPTION_MODEL = 'gemini-pro'
+TRANSCRIPTION_PROMPT = "Please transcribe this audio segment accurately, maintaining punctuation and speaker changes: {path}"
+TRANSCRIPTION_PROMPT_VERSION = "1"
+
+TRANSCRIPTION_SAMPLE_RATE = ANALYSIS_SAMPLE_RATE
+
+
+class ChunkBoundaryFinder:
+    """
+    Streaming `find_chunk_boundaries`: audio is fed in arbitrary-sized
+    blocks and each chunk is returned, as (start_ms, end_ms), once no later
+    audio can move its end. A candidate boundary is final target_ms/2
+    after it, so chunks trail the input by at most that much.
+    """
+
+    def __init__(self, sample_rate: int, target_ms: int = 30000, max_ms: int = 45000,
+                 frame_ms: int = 100):
+        self.sample_rate = sample_rate
+        self.target_ms = target_ms
+        self.max_ms = max_ms
+        self.frame_ms = frame_ms
+        self.frame_len = max(int(sample_rate * frame_ms / 1000), 1)
+        self.half_window = max(target_ms // (2 * frame_ms), 1)
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._energy = np.zeros(0, dtype=np.float32)
+        self._samples = 0
+        self._next_frame = 1  # Frame 0 is never a boundary
+        self._last = 0  # Last boundary (ms)
+
+    def _is_min(self, i: int) -> bool:
+        # Quietest in its window; ties resolve to the first frame, keeping
+        # minima unique. Frames past either end count as infinitely loud.
+        lo, hi = max(i - self.half_window, 0), i + self.half_window + 1
+        window = self._energy[lo:hi]
+        return int(np.argmin(window)) == i - lo
+
+    def _close(self, point: int) -> List[Tuple[int, int]]:
+        gap = point - self._last
+        if gap <= 0:
+            return []
+        points = []
+        if gap > self.max_ms:
+            pieces = -(-gap // self.target_ms)
+            step = gap / pieces
+            points.extend(int(self._last + step * k) for k in range(1, pieces))
+        points.append(point)
+        spans = list(zip([self._last] + points[:-1], points))
+        self._last = point
+        return spans
+
+    def feed(self, samples: np.ndarray) -> List[Tuple[int, int]]:
+        """Consume a block of float samples and return any chunks that closed"""
+        self._samples += len(samples)
+        buffer = np.concatenate([self._pending, np.asarray(samples, dtype=np.float32)])
+        n_frames = len(buffer) // self.frame_len
+        self._pending = buffer[n_frames * self.frame_len:]
+        if n_frames:
+            energy = frame_energy(buffer[:n_frames * self.frame_len], self.frame_len)
+            self._energy = np.concatenate([self._energy, energy])
+
+        spans = []
+        while self._next_frame + self.half_window < len(self._energy):
+            if self._is_min(self._next_frame):
+                spans.extend(self._close(self._next_frame * self.frame_ms))
+            self._next_frame += 1
+        return spans
+
+    def flush(self) -> List[Tuple[int, int]]:
+        """Close the remaining chunks at end of stream"""
+        spans = []
+        while self._next_frame < len(self._energy):
+            if self._is_min(self._next_frame):
+                spans.extend(self._close(self._next_frame * self.frame_ms))
+            self._next_frame += 1
+        spans.extend(self._close(int(self._samples * 1000 / self.sample_rate)))
+        return spans
+
+
+def find_chunk_boundaries(samples: np.ndarray, sample_rate: int,
+                          target_ms: int = 30000, max_ms: int = 45000,
+                          frame_ms: int = 100, block_seconds: int = 60) -> list:
+    """
+    Pick content-defined chunk boundaries (in ms) for a mono signal.
+
+    A boundary is placed at each frame that is the quietest within
+    +/- target_ms/2 of itself, so chunks end in pauses rather than
+    mid-word, and the same audio always yields the same chunks (and so the
+    same transcript cache entries). Runs longer than max_ms are split
+    evenly. The signal is read `block_seconds` at a time, so memory-mapped
+    recordings are never fully materialized.
+    """
+    if len(samples) < max(int(sample_rate * frame_ms / 1000), 1):
+        return [0, int(len(samples) * 1000 / sample_rate)]
+
+    finder = ChunkBoundaryFinder(sample_rate, target_ms, max_ms, frame_ms)
+    block = sample_rate * block_seconds
+    spans = []
+    for start in range(0, len(samples), block):
+        spans.extend(finder.feed(samples[start:start + block]))
+    spans.extend(finder.flush())
+    return [0] + [end for _, end in spans]
+
+
+def pcm_chunk(samples: np.ndarray, start_ms: int, end_ms: int,
+              sample_rate: int = ANALYSIS_SAMPLE_RATE) -> np.ndarray:
+    """The int16 samples of a chunk of a float signal, as sent for transcription"""
+    start = start_ms * sample_rate // 1000
+    end = end_ms * sample_rate // 1000
+    return np.clip(samples[start:end] * 32768.0, -32768, 32767).astype(np.int16)
+
+
+async def process_audio(input_path: str, denoise_preset: Optional[str] = None) -> str:
     """
     Process the audio file: reduce noise, normalize volume, and improve quality.
-    Returns the path to the processed audio file.
+    `denoise_preset` is one of "off", "fast" or "quality" (default from
+    NOISE_REDUCTION_PRESET). Returns the path to the processed audio file.
     """
     try:
         # Create processed directory if it doesn't exist
@@ -38,37 +160,24 @@ async def process_audio(input_path: str) -> str:
         os.makedirs(processed_dir, exist_ok=True)
 
         # Generate output path
+        profile = get_storage_profile()
         filename = os.path.basename(input_path)
         base_name = os.path.splitext(filename)[0]
-        output_path = os.path.join(processed_dir, f"processed_{base_name}.m4a")
+        output_path = os.path.join(processed_dir, f"processed_{base_name}{profile['extension']}")
 
         def _process():
             try:
                 # Load the audio file
                 y, sr = librosa.load(input_path, sr=None)
                 
-                # Noise reduction using spectral gating
-                S = librosa.stft(y)
-                S_db = librosa.amplitude_to_db(np.abs(S), ref=np.max)
-                noise_threshold = np.mean(S_db) - 1.5 * np.std(S_db)
-                mask = S_db > noise_threshold
-                S_clean = S * mask
-                y_clean = librosa.istft(S_clean)
+                # Noise reduction with the selected preset
+                y_clean = denoise(y, sr, denoise_preset)
 
                 # Normalize audio
                 y_normalized = librosa.util.normalize(y_clean)
 
-                # Save as temporary WAV file
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                    sf.write(temp_wav.name, y_normalized, sr)
-                    
-                    # Convert to M4A
-                    wav_audio = AudioSegment.from_wav(temp_wav.name)
-                    wav_audio.export(output_path, format='ipod', 
-                                  parameters=["-acodec", "aac", "-ac", "2", "-ab", "192k"])
-
-                # Clean up temporary file
-                os.unlink(temp_wav.name)
+                # Encode straight from memory with the storage codec profile
+                encode_samples(y_normalized, sr, output_path, profile)
 
                 return output_path
             except Exception as e:
@@ -84,56 +193,102 @@ async def process_audio(input_path: str) -> str:
         logger.error(f"Error in process_audio: {e}")
         raise
 
-async def transcribe_audio(audio_path: str) -> str:
+async def transcribe_samples(samples: np.ndarray, index: int = 0,
+                            temp_dir: Optional[str] = None) -> str:
+    """
+    Transcribe one chunk of 16 kHz mono int16 samples.
+    Cached transcripts are returned without calling the API.
+    """
+    fingerprint = fingerprint_samples(samples)
+    key = cache_key(fingerprint, TRANSCRIPTION_MODEL, TRANSCRIPTION_PROMPT_VERSION)
+    cached = transcript_cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        # Create temporary directory for chunks if it doesn't exist
+        temp_dir = temp_dir or os.path.join(tempfile.gettempdir(), "temp_chunks")
+        os.makedirs(temp_dir, exist_ok=True)
+
+        # Save chunk with unique name
+        temp_path = os.path.join(temp_dir, f"chunk_{fingerprint}_{uuid.uuid4().hex[:8]}.wav")
+        sf.write(temp_path, samples, TRANSCRIPTION_SAMPLE_RATE, subtype='PCM_16')
+
+        try:
+            # Use Gemini API for speech-to-text, off the event loop
+            def _generate():
+                model = genai.GenerativeModel(TRANSCRIPTION_MODEL)
+                prompt = TRANSCRIPTION_PROMPT.format(path=temp_path)
+                return model.generate_content(prompt)
+
+            loop = asyncio.get_event_loop()
+            response = await loop.run_in_executor(None, _generate)
+
+            text = response.text.strip()
+            if text:
+                transcript_cache.set(key, text)
+            return text
+        finally:
+            # Clean up temp file
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    except Exception as e:
+        logger.error(f"Error processing chunk {index}: {e}")
+        return ""
+
+async def transcribe_audio(
+    audio_path: str,
+    on_chunk: Optional[Callable[[dict], Awaitable[None]]] = None,
+) -> str:
     """
     Transcribe the audio file using Gemini API.
     Returns the transcription text.
+
+    If `on_chunk` is given it is awaited with
+    `{"index", "start", "end", "text"}` (offsets in seconds) for each chunk,
+    in order, as soon as that chunk and every earlier one are transcribed.
     """
     try:
-        # Convert audio to text chunks
+        # Convert audio to text chunks, reading the recording's cached
+        # 16 kHz mono analysis samples instead of decoding it again
         def _get_audio_chunks():
-            audio = AudioSegment.from_file(audio_path)
-            chunk_length_ms = 30000  # 30 second chunks for better accuracy
-            chunks = []
-            
-            for i in range(0, len(audio), chunk_length_ms):
-                chunk = audio[i:i + chunk_length_ms]
-                chunks.append(chunk)
-            
-            return chunks
-
-        # Process chunk in thread pool
-        async def _process_chunk(chunk: AudioSegment, index: int) -> str:
-            try:
-                # Create temporary directory for chunks if it doesn't exist
-                temp_dir = os.path.join(os.path.dirname(audio_path), "temp_chunks")
-                os.makedirs(temp_dir, exist_ok=True)
-
-                # Save chunk with unique name
-                temp_path = os.path.join(temp_dir, f"chunk_{index}.wav")
-                chunk.export(temp_path, format="wav", parameters=["-ac", "1", "-ar", "16000"])
-
-                try:
-                    # Use Gemini API for speech-to-text
-                    model = genai.GenerativeModel('gemini-pro')
-                    prompt = f"Please transcribe this audio segment accurately, maintaining punctuation and speaker changes: {temp_path}"
-                    response = model.generate_content(prompt)
-                    
-                    return response.text.strip()
-                finally:
-                    # Clean up temp file
-                    if os.path.exists(temp_path):
-                        os.remove(temp_path)
-            except Exception as e:
-                logger.error(f"Error processing chunk {index}: {e}")
-                return ""
+            samples = storage.load_analysis(audio_path)
+            boundaries = find_chunk_boundaries(samples, TRANSCRIPTION_SAMPLE_RATE)
+
+            return [
+                (start_ms / 1000, end_ms / 1000, pcm_chunk(samples, start_ms, end_ms, TRANSCRIPTION_SAMPLE_RATE))
+                for start_ms, end_ms in zip(boundaries, boundaries[1:])
+            ]
+
+        temp_dir = os.path.join(os.path.dirname(audio_path), "temp_chunks")
 
         # Get audio chunks
-        chunks = _get_audio_chunks()
+        loop = asyncio.get_event_loop()
+        chunks = await loop.run_in_executor(executor, _get_audio_chunks)
         
-        # Process all chunks with index
-        tasks = [_process_chunk(chunk, i) for i, chunk in enumerate(chunks)]
-        transcriptions = await asyncio.gather(*tasks)
+        # Process all chunks with index; cached chunks skip the API entirely
+        transcriptions: list = [None] * len(chunks)
+        next_to_emit = 0
+        emit_lock = asyncio.Lock()
+
+        async def _run_chunk(index: int) -> None:
+            nonlocal next_to_emit
+            start, end, samples = chunks[index]
+            transcriptions[index] = await transcribe_samples(samples, index, temp_dir)
+            if on_chunk is None:
+                return
+            async with emit_lock:
+                while next_to_emit < len(chunks) and transcriptions[next_to_emit] is not None:
+                    chunk_start, chunk_end, _ = chunks[next_to_emit]
+                    await on_chunk({
+                        "index": next_to_emit,
+                        "start": chunk_start,
+                        "end": chunk_end,
+                        "text": transcriptions[next_to_emit],
+                    })
+                    next_to_emit += 1
+
+        await asyncio.gather(*(_run_chunk(i) for i in range(len(chunks))))
         
         # Combine transcriptions
         full_transcript = " ".join(filter(None, transcriptions))
@@ -145,3 +300,121 @@ async def transcribe_audio(audio_path: str) -> str:
     except Exception as e:
         logger.error(f"Error in transcribe_audio: {e}")
         raise
+
+async def process_and_transcribe(
+    input_path: str,
+    on_chunk: Optional[Callable[[dict], Awaitable[None]]] = None,
+    denoise_preset: Optional[str] = None,
+) -> Tuple[str, str]:
+    """
+    Pipelined `process_audio` + `transcribe_audio`.
+
+    The recording is decoded once at the transcription rate (by the same
+    decoder `transcribe_audio` reads) and noise-reduced block by block; each
+    cleaned block is written to the processed file's analysis samples and
+    fed to a `ChunkBoundaryFinder`, and every closed chunk is sent for
+    transcription while later blocks are still being denoised. Wall-clock
+    time approaches the slower of the two stages rather than their sum.
+
+    Chunks are cut exactly as `transcribe_audio` cuts them, so the same
+    samples make the same chunks and share transcript cache entries: a
+    pipelined run with the "off" preset reuses those of a plain run.
+
+    `on_chunk` is called as in `transcribe_audio`. Returns
+    (processed audio path, transcription).
+    """
+    try:
+        processed_dir = os.path.join(os.path.dirname(input_path), "processed")
+        os.makedirs(processed_dir, exist_ok=True)
+
+        profile = get_storage_profile()
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        output_path = os.path.join(processed_dir, f"processed_{base_name}{profile['extension']}")
+        temp_dir = os.path.join(os.path.dirname(input_path), "temp_chunks")
+        sr = TRANSCRIPTION_SAMPLE_RATE
+
+        loop = asyncio.get_event_loop()
+        segments: asyncio.Queue = asyncio.Queue()
+
+        def _produce() -> str:
+            try:
+                y = storage.load_analysis(input_path)
+                analysis = np.memmap(storage.analysis_path(output_path), dtype=np.float32,
+                                     mode="w+", shape=(max(len(y), 1),))
+                finder = ChunkBoundaryFinder(sr)
+
+                position = 0
+                peak = 0.0
+                # A final None flushes the chunks still open at the end
+                for block in itertools.chain(denoise_blocks(y, sr, denoise_preset), [None]):
+                    if block is None:
+                        spans = finder.flush()
+                    else:
+                        analysis[position:position + len(block)] = block
+                        position += len(block)
+                        if len(block):
+                            peak = max(peak, float(np.max(np.abs(block))))
+                        spans = finder.feed(block)
+                    for start_ms, end_ms in spans:
+                        chunk = (start_ms, end_ms, pcm_chunk(analysis, start_ms, end_ms, sr))
+                        loop.call_soon_threadsafe(segments.put_nowait, chunk)
+                del y
+                # Only the processed file's analysis samples are kept
+                storage.delete_analysis(input_path)
+
+                # Normalize and encode once the cleaned signal is complete;
+                # ffmpeg reads the samples from disk and applies the gain
+                analysis.flush()
+                del analysis
+                encode_float_pcm_file(str(storage.analysis_path(output_path)), sr, output_path, profile,
+                                      gain=1.0 / peak if peak > 0 else 1.0)
+                return output_path
+            finally:
+                loop.call_soon_threadsafe(segments.put_nowait, None)
+
+        producer = loop.run_in_executor(executor, _produce)
+
+        # Transcribe chunks as they arrive, emitting them in order
+        chunks: list = []
+        transcriptions: list = []
+        tasks = []
+        next_to_emit = 0
+        emit_lock = asyncio.Lock()
+
+        async def _run_chunk(index: int, samples: np.ndarray) -> None:
+            nonlocal next_to_emit
+            transcriptions[index] = await transcribe_samples(samples, index, temp_dir)
+            if on_chunk is None:
+                return
+            async with emit_lock:
+                while next_to_emit < len(chunks) and transcriptions[next_to_emit] is not None:
+                    chunk_start, chunk_end = chunks[next_to_emit]
+                    await on_chunk({
+                        "index": next_to_emit,
+                        "start": chunk_start,
+                        "end": chunk_end,
+                        "text": transcriptions[next_to_emit],
+                    })
+                    next_to_emit += 1
+
+        while True:
+            chunk = await segments.get()
+            if chunk is None:
+                break
+            start_ms, end_ms, samples = chunk
+            chunks.append((start_ms / 1000, end_ms / 1000))
+            transcriptions.append(None)
+            tasks.append(asyncio.create_task(_run_chunk(len(chunks) - 1, samples)))
+
+        # Let in-flight transcriptions finish before surfacing a producer error
+        await asyncio.gather(*tasks)
+        output_path = await producer
+
+        full_transcript = " ".join(filter(None, transcriptions))
+        if not full_transcript.strip():
+            raise ValueError("No text was transcribed from the audio")
+
+        return output_path, full_transcript
+    except Exception as e:
+        logger.error(f"Error in process_and_transcribe: {e}")
+        raise
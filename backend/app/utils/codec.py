@@ -0,0 +1,312 @@
+import os
+import logging
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import ffmpeg
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LEGACY_EXTENSIONS = (".wav", ".m4a", ".mp3")
+
+# Opus streams are Ogg-wrapped; make sure playback serves a sensible type
+mimetypes.add_type("audio/ogg", ".opus")
+
+# Codec profiles for stored audio. Lectures are mono speech, so the default
+# profile is Opus at a speech bitrate instead of stereo 192k AAC.
+STORAGE_PROFILES: Dict[str, Dict] = {
+    "opus": {
+        "extension": ".opus",
+        "format": "ogg",
+        "codec": "libopus",
+        "channels": 1,
+        "sample_rate": 16000,
+        "bitrate": "24k",
+        "options": {"application": "voip"},
+    },
+    "aac": {
+        "extension": ".m4a",
+        "format": "ipod",
+        "codec": "aac",
+        "channels": 1,
+        "sample_rate": 22050,
+        "bitrate": "48k",
+        "options": {},
+    },
+    "wav": {
+        "extension": ".wav",
+        "format": "wav",
+        "codec": "pcm_s16le",
+        "channels": 1,
+        "sample_rate": 16000,
+        "bitrate": None,
+        "options": {},
+    },
+}
+
+
+
+def get_storage_profile(name: Optional[str] = None) -> Dict:
+    """
+    Return the codec profile used for stored audio (`AUDIO_STORAGE_PROFILE`
+    by default), with its bitrate overridden by `AUDIO_STORAGE_BITRATE`
+    for lossy profiles.
+    """
+    name = name or settings.AUDIO_STORAGE_PROFILE
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown audio storage profile: {name}")
+    profile = dict(STORAGE_PROFILES[name])
+    if settings.AUDIO_STORAGE_BITRATE and profile["bitrate"]:
+        profile["bitrate"] = settings.AUDIO_STORAGE_BITRATE
+    return profile
+
+
+def _output_kwargs(profile: Dict) -> Dict:
+    kwargs = {
+        "format": profile["format"],
+        "acodec": profile["codec"],
+        "ac": profile["channels"],
+        "ar": profile["sample_rate"],
+    }
+    if profile["bitrate"]:
+        kwargs["audio_bitrate"] = profile["bitrate"]
+    kwargs.update(profile["options"])
+    return kwargs
+
+
+def storage_path_for(path: str, profile: Optional[Dict] = None) -> str:
+    """Return the path a file would have once stored with the given profile"""
+    profile = profile or get_storage_profile()
+    return str(Path(path).with_suffix(profile["extension"]))
+
+
+def encode_samples(samples: np.ndarray, sample_rate: int, output_path: str,
+                   profile: Optional[Dict] = None) -> str:
+    """Encode float samples (mono or [channels, n]) with the storage profile"""
+    profile = profile or get_storage_profile()
+    samples = np.asarray(samples, dtype=np.float32)
+    channels = 1 if samples.ndim == 1 else samples.shape[0]
+    # ffmpeg expects interleaved frames
+    pcm = samples if samples.ndim == 1 else samples.T
+
+    stream = ffmpeg.input("pipe:", format="f32le", ac=channels, ar=sample_rate)
+    stream = ffmpeg.output(stream, output_path, **_output_kwargs(profile))
+    stream.overwrite_output().run(input=np.ascontiguousarray(pcm).tobytes(), quiet=True)
+    return output_path
+
+
+def encode_pcm_file(raw_path: str, sample_rate: int, output_path: str,
+                    profile: Optional[Dict] = None) -> str:
+    """Encode a raw 16-bit little-endian mono PCM file with the storage profile"""
+    profile = profile or get_storage_profile()
+    stream = ffmpeg.input(raw_path, format="s16le", ac=1, ar=sample_rate)
+    stream = ffmpeg.output(stream, output_path, **_output_kwargs(profile))
+    stream.overwrite_output().run(quiet=True)
+    return output_path
+
+
+def encode_float_pcm_file(raw_path: str, sample_rate: int, output_path: str,
+                          profile: Optional[Dict] = None, gain: float = 1.0) -> str:
+    """
+    Encode a raw 32-bit float little-endian mono PCM file with the storage
+    profile, scaled by `gain`. ffmpeg reads the file itself, so long
+    recordings are never held in memory.
+    """
+    profile = profile or get_storage_profile()
+    stream = ffmpeg.input(raw_path, format="f32le", ac=1, ar=sample_rate)
+    if gain != 1.0:
+        stream = stream.filter("volume", f"{gain:.9g}")
+    stream = ffmpeg.output(stream, output_path, **_output_kwargs(profile))
+    stream.overwrite_output().run(quiet=True)
+    return output_path
+
+
+def decode_to_float_pcm(input_path: str, output_path: str, sample_rate: int = 16000) -> str:
+    """Decode any audio file to raw float32 mono PCM at sample_rate (one resample)"""
+    stream = ffmpeg.input(input_path)
+    stream = ffmpeg.output(stream, output_path, format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate)
+    stream.overwrite_output().run(quiet=True)
+    return output_path
+
+
+def transcode_file(input_path: str, output_path: Optional[str] = None,
+                   profile: Optional[Dict] = None) -> str:
+    """Transcode an audio file of any format with the storage profile"""
+    profile = profile or get_storage_profile()
+    output_path = output_path or storage_path_for(input_path, profile)
+    if os.path.abspath(output_path) == os.path.abspath(input_path):
+        raise ValueError(f"Refusing to transcode {input_path} onto itself")
+
+    stream = ffmpeg.input(input_path)
+    stream = ffmpeg.output(stream, output_path, **_output_kwargs(profile))
+    stream.overwrite_output().run(quiet=True)
+    return output_path
+
+
+def needs_transcode(path: str, profile: Optional[Dict] = None) -> bool:
+    profile = profile or get_storage_profile()
+    return Path(path).suffix.lower() != profile["extension"]
+
+
+def migrate_recordings(db, profile_name: Optional[str] = None,
+                       max_workers: Optional[int] = None,
+                       delete_originals: bool = False) -> Tuple[int, int]:
+    """
+    Transcode every stored recording that isn't in the target profile yet.
+
+    Recordings still being transcribed are skipped (the transcriber reads
+    the file and repoints the row when it finishes), as are files whose
+    transcoded name is taken (see `_free_targets`); run the migration
+    again later for them. Files are transcoded in parallel (ffmpeg runs out
+    of process, so threads are enough) and each row is repointed only after
+    its new file exists, and only if it still points at the old file and
+    hasn't started transcribing meanwhile. Originals are kept unless
+    `delete_originals` is set, in which case each is removed once its row
+    update is committed. Returns (transcoded, failed).
+    """
+    from app.models.recording import Recording
+    from app.utils.progress import STATUS_COMPLETED, STATUS_FAILED
+
+    settled = (STATUS_COMPLETED, STATUS_FAILED)
+    profile = get_storage_profile(profile_name)
+    rows = (
+        db.query(Recording.id, Recording.file_path)
+        .filter(Recording.file_path.isnot(None), Recording.transcription_status.in_(settled))
+        .all()
+    )
+    paths = {
+        row.file_path: row.id for row in rows
+        if needs_transcode(row.file_path, profile) and os.path.exists(row.file_path)
+    }
+    pending = [(paths[path], path) for path in _free_targets(list(paths), profile)]
+    logger.info(f"Transcoding {len(pending)} recordings to {profile['extension']}")
+
+    transcoded, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 2) as pool:
+        futures = {
+            pool.submit(transcode_file, path, None, profile): (recording_id, path)
+            for recording_id, path in pending
+        }
+        for future in as_completed(futures):
+            recording_id, old_path = futures[future]
+            try:
+                new_path = future.result()
+            except Exception as e:
+                logger.error(f"Failed to transcode recording {recording_id}: {e}")
+                failed += 1
+                continue
+
+            updated = db.query(Recording).filter(
+                Recording.id == recording_id,
+                Recording.file_path == old_path,
+                Recording.transcription_status.in_(settled),
+            ).update({Recording.file_path: new_path}, synchronize_session=False)
+            db.commit()
+            if not updated:
+                # Transcription started (or the row moved) while transcoding
+                logger.info(f"Recording {recording_id} changed while transcoding; left as is")
+                _remove(new_path)
+                continue
+            if delete_originals:
+                _remove(old_path)
+            transcoded += 1
+
+    return transcoded, failed
+
+
+def migrate_directory(directory: str, profile_name: Optional[str] = None,
+                      max_workers: Optional[int] = None, delete_originals: bool = False,
+                      exclude: Iterable[str] = ()) -> Tuple[int, int]:
+    """
+    Transcode loose files (e.g. processed outputs) not tracked in the DB;
+    paths in `exclude` (those recordings point at) are left to
+    `migrate_recordings`. Originals are kept unless `delete_originals` is
+    set.
+    """
+    profile = get_storage_profile(profile_name)
+    excluded = {os.path.abspath(path) for path in exclude}
+    paths = [
+        str(path) for path in Path(directory).glob("*")
+        if path.is_file() and path.suffix.lower() in LEGACY_EXTENSIONS
+        and needs_transcode(str(path), profile) and os.path.abspath(path) not in excluded
+    ]
+    paths = _free_targets(paths, profile)
+
+    transcoded, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 2) as pool:
+        futures = {pool.submit(transcode_file, path, None, profile): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Failed to transcode {path}: {e}")
+                failed += 1
+                continue
+            if delete_originals:
+                _remove(path)
+            transcoded += 1
+    return transcoded, failed
+
+
+def _free_targets(paths: List[str], profile: Dict) -> List[str]:
+    """
+    The paths whose transcoded name is free: taken neither by an existing
+    file nor by another of the paths with the same stem (`x.wav` and
+    `x.m4a` would both become `x.opus`). The others are skipped with a
+    warning rather than overwritten.
+    """
+    targets: Dict[str, List[str]] = {}
+    for path in paths:
+        targets.setdefault(storage_path_for(path, profile), []).append(path)
+    free = []
+    for target, sources in targets.items():
+        if len(sources) > 1 or os.path.exists(target):
+            logger.warning(f"Skipping {', '.join(sources)}: {target} is taken")
+        else:
+            free.append(sources[0])
+    return free
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Could not remove {path}: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Transcode stored audio to the storage codec profile")
+    parser.add_argument("--profile", default=None, choices=sorted(STORAGE_PROFILES))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--delete-originals", action="store_true",
+                        help="Remove each original once its transcoded copy is in place")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Run as a background job: stay out of the way of the API workers
+    os.nice(10)
+
+    from app.db.session import get_db_context
+    from app.models.recording import Recording
+    from app.utils.storage import storage
+
+    with get_db_context() as db:
+        done, errors = migrate_recordings(
+            db, args.profile, args.workers, delete_originals=args.delete_originals
+        )
+        tracked = [path for (path,) in db.query(Recording.file_path).filter(Recording.file_path.isnot(None))]
+    logger.info(f"Recordings: {done} transcoded, {errors} failed")
+
+    done, errors = migrate_directory(
+        str(storage.processed_dir), args.profile, args.workers,
+        delete_originals=args.delete_originals, exclude=tracked,
+    )
+    logger.info(f"Processed files: {done} transcoded, {errors} failed")
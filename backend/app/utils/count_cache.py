@@ -0,0 +1,107 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached total is trusted. Each worker process has its own cache
+# and writes only invalidate the copy on the worker that made them, so the
+# TTL bounds how stale other workers' totals can get.
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "60"))
+
+CountKey = Tuple[Optional[int], str]  # (user id, resource name)
+
+# Session.info key of the totals a session's pending writes will change
+_DIRTY_KEY = "count_cache_dirty"
+
+
+class CountCache:
+    """
+    In-process cache of list totals per (user, resource), invalidated when
+    ORM writes to the resource's model are committed.
+
+    Totals are only accurate per worker: a write invalidates the cache of
+    the process that made it, and other workers serve their copy until it
+    expires (`COUNT_CACHE_TTL`).
+    """
+
+    def __init__(self, ttl: int = COUNT_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[CountKey, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: CountKey) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            total, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            return total
+
+    def set(self, key: CountKey, total: int) -> None:
+        with self._lock:
+            self._entries[key] = (total, time.monotonic())
+
+    def invalidate(self, user_id: Optional[int], resource: str) -> None:
+        with self._lock:
+            if user_id is None:
+                # Owner unknown: drop the resource for everyone
+                for key in [key for key in self._entries if key[1] == resource]:
+                    del self._entries[key]
+            else:
+                self._entries.pop((user_id, resource), None)
+
+    def invalidate_on_write(
+        self,
+        model: Any,
+        resource: str,
+        user_id_of: Callable[[Any, Any], Optional[int]],
+    ) -> None:
+        """
+        Drop a user's cached total whenever a row of `model` is inserted or
+        deleted through the ORM. `user_id_of(connection, target)` returns
+        the owning user id of a row.
+
+        The owner is looked up at flush time but the total is only dropped
+        once the session commits (see `_invalidate_committed`), so a
+        concurrent request can't recount and cache a total that misses the
+        uncommitted write.
+        """
+        def _mark_dirty(mapper, connection, target):
+            try:
+                user_id = user_id_of(connection, target)
+            except Exception as e:
+                logger.warning(f"Could not resolve owner for {resource} count: {e}")
+                user_id = None
+            session = object_session(target)
+            if session is None:
+                self.invalidate(user_id, resource)
+            else:
+                session.info.setdefault(_DIRTY_KEY, set()).add((user_id, resource))
+
+        event.listen(model, "after_insert", _mark_dirty)
+        event.listen(model, "after_delete", _mark_dirty)
+
+# Create a global instance
+count_cache = CountCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    dirty: Set[CountKey] = session.info.pop(_DIRTY_KEY, set())
+    for user_id, resource in dirty:
+        count_cache.invalidate(user_id, resource)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    # The writes never happened, so the cached totals still hold
+    session.info.pop(_DIRTY_KEY, None)
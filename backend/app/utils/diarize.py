@@ -0,0 +1,147 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.cluster import AgglomerativeClustering
+
+logger = logging.getLogger(__name__)
+
+# Short-time cepstral features: 25 ms windows, 10 ms hop at 16 kHz
+N_FFT = 512
+WIN_LENGTH = 400
+HOP_LENGTH = 160
+N_MELS = 24
+N_CEPS = 13
+
+# Only this much audio around each segment's middle is analysed, which keeps
+# the cost per segment constant however long the segment is
+EMBEDDING_SECONDS = 8.0
+MIN_SEGMENT_SECONDS = 0.5
+
+# Cosine distance under which two segments are merged into one speaker
+SPEAKER_DISTANCE_THRESHOLD = 0.35
+MAX_SPEAKERS = 8
+
+
+def _mel_filterbank(sr: int, n_fft: int = N_FFT, n_mels: int = N_MELS) -> np.ndarray:
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    edges = mel_to_hz(np.linspace(hz_to_mel(60.0), hz_to_mel(min(sr / 2, 7600.0)), n_mels + 2))
+    freqs = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (freqs - lower) / (center - lower)
+    falling = (upper - freqs) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+def _dct_matrix(n_in: int = N_MELS, n_out: int = N_CEPS) -> np.ndarray:
+    n = np.arange(n_in)
+    k = np.arange(n_out)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)).astype(np.float32)
+
+
+def segment_embedding(samples: np.ndarray, sr: int, mel: np.ndarray, dct: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Mean and standard deviation of the MFCCs (without c0, so loudness doesn't
+    matter) over the voiced frames of one segment.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if len(samples) < WIN_LENGTH:
+        return None
+    frames = np.lib.stride_tricks.sliding_window_view(samples, WIN_LENGTH)[::HOP_LENGTH]
+    window = np.hanning(WIN_LENGTH).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, n=N_FFT, axis=1)) ** 2
+    log_mel = np.log(power @ mel.T + 1e-10)
+
+    # Drop the quietest frames (pauses) so they don't pull speakers together
+    energy = log_mel.sum(axis=1)
+    voiced = energy > np.percentile(energy, 30)
+    if voiced.sum() < 10:
+        return None
+    ceps = log_mel[voiced] @ dct.T
+    ceps = ceps[:, 1:]
+    return np.concatenate([ceps.mean(axis=0), ceps.std(axis=0)])
+
+
+def assign_speakers(samples: np.ndarray, sr: int,
+                    spans: Sequence[Tuple[float, float]]) -> List[Optional[int]]:
+    """
+    Cluster transcript segments by voice.
+
+    `spans` are (start, end) offsets in seconds into `samples` (typically a
+    recording's memory-mapped analysis samples). Each segment gets a cheap
+    MFCC-statistics embedding; average-linkage clustering on cosine distance
+    then groups them. Labels are numbered in order of first appearance;
+    segments too short to embed get None.
+    """
+    mel, dct = _mel_filterbank(sr), _dct_matrix()
+    half = int(EMBEDDING_SECONDS * sr / 2)
+
+    embeddings, indices = [], []
+    for i, (start, end) in enumerate(spans):
+        if end - start < MIN_SEGMENT_SECONDS:
+            continue
+        middle = int((start + end) / 2 * sr)
+        lo = max(int(start * sr), middle - half)
+        hi = min(int(end * sr), middle + half, len(samples))
+        embedding = segment_embedding(samples[lo:hi], sr, mel, dct)
+        if embedding is not None:
+            embeddings.append(embedding)
+            indices.append(i)
+
+    labels: List[Optional[int]] = [None] * len(spans)
+    if not embeddings:
+        return labels
+    if len(embeddings) == 1:
+        labels[indices[0]] = 0
+        return labels
+
+    # Normalize per recording so the channel (room, microphone) cancels out
+    X = np.asarray(embeddings, dtype=np.float32)
+    X = (X - X.mean(axis=0)) / (X.std(axis=0) + 1e-6)
+
+    clusters = AgglomerativeClustering(
+        n_clusters=None,
+        metric="cosine",
+        linkage="average",
+        distance_threshold=SPEAKER_DISTANCE_THRESHOLD,
+    ).fit_predict(X)
+    if len(set(clusters)) > MAX_SPEAKERS:
+        clusters = AgglomerativeClustering(
+            n_clusters=MAX_SPEAKERS, metric="cosine", linkage="average"
+        ).fit_predict(X)
+
+    order = {}
+    for i, cluster in zip(indices, clusters):
+        labels[i] = order.setdefault(cluster, len(order))
+    return labels
+
+
+def build_segments(samples: Optional[np.ndarray], sr: int, chunks: Sequence[dict]) -> List[dict]:
+    """
+    Turn transcribed chunks (`{"start", "end", "text"}` in seconds) into
+    transcript segment rows with speaker labels. Diarization is best effort:
+    if it fails, segments are kept without speakers.
+    """
+    chunks = [chunk for chunk in chunks if chunk.get("text")]
+    speakers: List[Optional[int]] = [None] * len(chunks)
+    if samples is not None and len(chunks) > 0:
+        try:
+            speakers = assign_speakers(samples, sr, [(c["start"], c["end"]) for c in chunks])
+        except Exception as e:
+            logger.error(f"Speaker clustering failed: {e}")
+
+    return [
+        {
+            "position": position,
+            "start_ms": int(round(chunk["start"] * 1000)),
+            "end_ms": int(round(chunk["end"] * 1000)),
+            "speaker": speaker,
+            "text": chunk["text"],
+        }
+        for position, (chunk, speaker) in enumerate(zip(chunks, speakers))
+    ]
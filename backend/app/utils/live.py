@@ -0,0 +1,109 @@
+import os
+import asyncio
+import logging
+import tempfile
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.audio import TRANSCRIPTION_SAMPLE_RATE, transcribe_samples
+from app.utils.vad import SpeechSegmenter
+
+logger = logging.getLogger(__name__)
+
+
+class LiveTranscriptionSession:
+    """
+    Incremental transcription of a lecture streamed as raw PCM frames.
+
+    Frames are spooled to disk (so the finished recording can be encoded
+    without holding the lecture in memory) and VAD-segmented as they arrive.
+    Each closed segment is transcribed right away and its text is pushed to
+    the client in segment order through `send`.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict], Awaitable[None]],
+        sample_rate: int = TRANSCRIPTION_SAMPLE_RATE,
+    ):
+        self.send: Optional[Callable[[dict], Awaitable[None]]] = send
+        self.sample_rate = sample_rate
+        self.segmenter = SpeechSegmenter(sample_rate)
+        self.segments: List[dict] = []
+        self.total_samples = 0
+
+        self._spool = tempfile.NamedTemporaryFile(suffix=".pcm", delete=False)
+        self._leftover = b""
+        self._tasks: List[asyncio.Task] = []
+        self._next_to_send = 0
+        self._send_lock = asyncio.Lock()
+
+    @property
+    def spool_path(self) -> str:
+        return self._spool.name
+
+    async def feed(self, data: bytes) -> None:
+        """Consume a frame of little-endian int16 mono PCM"""
+        data = self._leftover + data
+        usable = len(data) - len(data) % 2
+        self._leftover = data[usable:]
+        if not usable:
+            return
+
+        self._spool.write(data[:usable])
+        samples = np.frombuffer(data[:usable], dtype="<i2")
+        self.total_samples += len(samples)
+        for start, segment in self.segmenter.feed(samples):
+            self._start_transcription(start, segment)
+
+    def _start_transcription(self, start: int, segment: np.ndarray) -> None:
+        index = len(self.segments)
+        self.segments.append({
+            "index": index,
+            "start": start / self.sample_rate,
+            "end": (start + len(segment)) / self.sample_rate,
+            "text": None,
+        })
+        self._tasks.append(asyncio.create_task(self._transcribe(index, segment)))
+
+    async def _transcribe(self, index: int, segment: np.ndarray) -> None:
+        self.segments[index]["text"] = await transcribe_samples(segment, index)
+        await self._deliver()
+
+    async def _deliver(self) -> None:
+        # Push every finished segment whose predecessors are also done
+        async with self._send_lock:
+            while self._next_to_send < len(self.segments):
+                segment = self.segments[self._next_to_send]
+                if segment["text"] is None:
+                    break
+                if self.send is not None:
+                    try:
+                        await self.send({"type": "transcript", **segment})
+                    except Exception:
+                        # Client went away; keep transcribing for the stored recording
+                        self.send = None
+                self._next_to_send += 1
+
+    async def finish(self) -> Tuple[str, float]:
+        """
+        Close the stream, wait for the last segments and return
+        (transcription, duration in seconds). Only the final open segment
+        still needs transcribing at this point.
+        """
+        for start, segment in self.segmenter.flush():
+            self._start_transcription(start, segment)
+        await asyncio.gather(*self._tasks)
+        self._spool.close()
+
+        transcription = " ".join(filter(None, (s["text"] for s in self.segments)))
+        return transcription, self.total_samples / self.sample_rate
+
+    def cleanup(self) -> None:
+        """Remove the spooled PCM file"""
+        self._spool.close()
+        try:
+            os.remove(self._spool.name)
+        except OSError:
+            pass
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import math
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.utils.storage import ANALYSIS_SAMPLE_RATE, storage
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+
+class TranscriptChannel:
+    """Ordered transcript events for one recording, with replay for late subscribers"""
+
+    def __init__(self):
+        self.events: List[dict] = []
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.closed = False
+
+    def publish(self, event: dict) -> None:
+        self.events.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+
+class TranscriptBroker:
+    """
+    In-process pub/sub of transcription progress keyed by recording id.
+
+    Only the worker running a transcription has its channel; subscribers on
+    other workers fall back to polling the recording row (see
+    `poll_transcript_progress`).
+    """
+
+    def __init__(self):
+        self.channels: Dict[int, TranscriptChannel] = {}
+
+    def open(self, recording_id: int) -> TranscriptChannel:
+        channel = TranscriptChannel()
+        self.channels[recording_id] = channel
+        return channel
+
+    def publish(self, recording_id: int, event: dict) -> None:
+        channel = self.channels.get(recording_id)
+        if channel is not None:
+            channel.publish(event)
+
+    def close(self, recording_id: int, event: dict) -> None:
+        channel = self.channels.pop(recording_id, None)
+        if channel is not None:
+            channel.publish(event)
+            channel.closed = True
+
+    def has_channel(self, recording_id: int) -> bool:
+        return recording_id in self.channels
+
+    async def subscribe(self, recording_id: int) -> AsyncIterator[dict]:
+        """Yield every event so far, then live events until the channel closes"""
+        channel = self.channels.get(recording_id)
+        if channel is None:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in channel.events:
+            queue.put_nowait(event)
+        channel.subscribers.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] in ("complete", "error"):
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+
+# Create a global instance
+transcript_broker = TranscriptBroker()
+
+
+def _save_progress(recording_id: int, values: dict) -> None:
+    from app.db.session import get_db_context
+    from app.models.recording import Recording
+
+    with get_db_context() as db:
+        db.execute(update(Recording).where(Recording.id == recording_id).values(**values))
+
+
+def _start_progress(recording_id: int) -> None:
+    """Mark a recording processing, dropping segments left by an earlier run"""
+    from app.crud.crud_transcript import transcript_segment
+    from app.db.session import get_db_context
+    from app.models.recording import Recording
+
+    with get_db_context() as db:
+        db.execute(update(Recording).where(Recording.id == recording_id).values(
+            transcription_status=STATUS_PROCESSING, transcribed_seconds=None,
+        ))
+        transcript_segment.replace_for_recording(db, recording_id=recording_id, segments=[])
+
+
+def _save_chunk(recording_id: int, position: Optional[int], chunk: dict) -> None:
+    """
+    Persist one transcribed chunk: a segment row (at `position`, if it has
+    text) and how far into the audio the transcript now reaches. Only the
+    chunk is written, not the transcript so far, so a recording costs
+    linear rather than quadratic writes; its full text is stored once at
+    the end.
+    """
+    from app.crud.crud_transcript import transcript_segment
+    from app.db.session import get_db_context
+    from app.models.recording import Recording
+
+    with get_db_context() as db:
+        if position is not None:
+            transcript_segment.append(db, recording_id=recording_id, segment={
+                "position": position,
+                "start_ms": int(round(chunk["start"] * 1000)),
+                "end_ms": int(round(chunk["end"] * 1000)),
+                "text": chunk["text"],
+            })
+        db.execute(update(Recording).where(Recording.id == recording_id).values(
+            transcribed_seconds=chunk["end"],
+        ))
+
+
+def save_transcript_segments(recording_id: int, file_path: str, chunks: List[dict]) -> int:
+    """
+    Persist a recording's timestamped transcript segments, labelling speakers
+    from its analysis samples. Returns the number of segments stored.
+    """
+    from app.crud.crud_transcript import transcript_segment
+    from app.db.session import get_db_context
+    from app.utils.diarize import build_segments
+
+    samples = storage.load_analysis(file_path, build=False)
+    segments = build_segments(samples, ANALYSIS_SAMPLE_RATE, chunks)
+    with get_db_context() as db:
+        return transcript_segment.replace_for_recording(db, recording_id=recording_id, segments=segments)
+
+
+async def transcribe_recording(recording_id: int, audio_path: str,
+                               pipelined: Optional[bool] = None) -> None:
+    """
+    Background job: transcribe a stored recording, publishing each chunk to
+    subscribers and persisting it as a transcript segment as it arrives.
+
+    In pipelined mode the upload is noise-reduced and encoded with the storage
+    profile while earlier segments are already being transcribed, and the row
+    is repointed at the processed file.
+    """
+    from app.utils.audio import process_and_transcribe, transcribe_audio
+
+    if pipelined is None:
+        # Denoise and transcribe uploads in one overlapped pass (see
+        # `process_and_transcribe`) instead of transcribing the raw upload
+        pipelined = settings.PIPELINED_INGEST
+
+    loop = asyncio.get_event_loop()
+    transcript_broker.open(recording_id)
+    chunks: List[dict] = []
+
+    async def _on_chunk(chunk: dict) -> None:
+        position = None
+        if chunk["text"]:
+            position = len(chunks)
+            chunks.append(chunk)
+        transcript_broker.publish(recording_id, {"type": "chunk", **chunk})
+        await loop.run_in_executor(None, _save_chunk, recording_id, position, chunk)
+
+    values = {}
+    try:
+        await loop.run_in_executor(None, _start_progress, recording_id)
+        if pipelined:
+            # Builds the processed file's analysis samples as it goes
+            processed_path, transcription = await process_and_transcribe(audio_path, on_chunk=_on_chunk)
+            values["file_path"] = processed_path
+        else:
+            # Decode and resample once; transcription and later analysis share it
+            await loop.run_in_executor(None, storage.build_analysis, audio_path)
+            transcription = await transcribe_audio(audio_path, on_chunk=_on_chunk)
+        await loop.run_in_executor(
+            None, save_transcript_segments, recording_id, values.get("file_path", audio_path), chunks
+        )
+        await loop.run_in_executor(None, _save_progress, recording_id, {
+            **values,
+            "transcription": transcription,
+            "transcription_status": STATUS_COMPLETED,
+        })
+        transcript_broker.close(recording_id, {"type": "complete"})
+    except Exception as e:
+        logger.error(f"Transcription of recording {recording_id} failed: {e}")
+        await loop.run_in_executor(None, _save_progress, recording_id, {
+            "transcription_status": STATUS_FAILED,
+        })
+        transcript_broker.close(recording_id, {"type": "error", "detail": "Transcription failed"})
+    finally:
+        # Analysis samples are scratch data for this job; anything that needs
+        # them later decodes the stored file again
+        for path in {audio_path, values.get("file_path", audio_path)}:
+            storage.delete_analysis(path)
+
+
+async def poll_transcript_progress(
+    recording_id: int, interval: float = 2.0, offset: int = 0,
+    stall_timeout: Optional[float] = None,
+) -> AsyncIterator[dict]:
+    """
+    Follow transcription progress from the database, for subscribers on
+    workers that aren't running the job. Emits each transcript segment
+    stored since the previous poll, from position `offset` on.
+
+    No worker may be running the job at all (it died with its worker, or
+    was never started), so the stream ends with an `error` once the row
+    has shown no progress for `stall_timeout` seconds (default
+    TRANSCRIPT_STALL_TIMEOUT).
+    """
+    from app.crud.crud_transcript import transcript_segment
+    from app.db.session import get_db_context
+    from app.models.recording import Recording
+
+    def _load(position: int) -> Tuple[Optional[tuple], list]:
+        with get_db_context() as db:
+            row = db.query(
+                Recording.transcribed_seconds,
+                Recording.transcription_status,
+            ).filter(Recording.id == recording_id).first()
+            segments = [
+                (segment.position, segment.start_ms, segment.end_ms, segment.text)
+                for segment in transcript_segment.get_from(db, recording_id=recording_id, position=position)
+            ]
+            return row, segments
+
+    if stall_timeout is None:
+        stall_timeout = settings.TRANSCRIPT_STALL_TIMEOUT
+    max_idle_polls = max(math.ceil(stall_timeout / interval), 1)
+
+    loop = asyncio.get_event_loop()
+    idle_polls = 0
+    last_seen = None
+    while True:
+        row, segments = await loop.run_in_executor(None, _load, offset)
+        if row is None:
+            yield {"type": "error", "detail": "Recording not found"}
+            return
+
+        for position, start_ms, end_ms, text in segments:
+            yield {"type": "chunk", "index": position, "start": start_ms / 1000,
+                   "end": end_ms / 1000, "text": text}
+            offset = position + 1
+
+        if row.transcription_status == STATUS_COMPLETED:
+            yield {"type": "complete"}
+            return
+        if row.transcription_status == STATUS_FAILED:
+            yield {"type": "error", "detail": "Transcription failed"}
+            return
+
+        seen = (offset, row.transcribed_seconds, row.transcription_status)
+        idle_polls = idle_polls + 1 if seen == last_seen else 0
+        last_seen = seen
+        if idle_polls >= max_idle_polls:
+            yield {"type": "error", "detail": "Transcription stalled"}
+            return
+        await asyncio.sleep(interval)
@@ -1,10 +1,11 @@
+import asyncio
 import google.generativeai as genai
 from typing import List, Dict
 import json
 import logging
 import os
 from dotenv import load_dotenv
-from models import Quiz, Question
+from app.models.quiz import Quiz
 from google.api_core import exceptions as google_exceptions
 
 load_dotenv()
@@ -112,30 +113,45 @@ def generate_quiz(transcript: str) -> Dict:
         logger.error(f"Error generating quiz: {str(e)}")
         raise
 
+def correct_option_index(question: Dict) -> int:
+    """Index of a generated question's correct answer (given as option text) among its options"""
+    return question['options'].index(question['correct_answer'])
+
+async def generate_quiz_questions(transcript: str) -> List[Dict]:
+    """
+    Generate quiz questions for a transcript, ready to store: the correct
+    answer is converted to the index of the correct option.
+    """
+    quiz_data = await asyncio.get_event_loop().run_in_executor(None, generate_quiz, transcript)
+    return [
+        {**question, 'correct_answer': correct_option_index(question)}
+        for question in quiz_data['questions']
+    ]
+
 def create_quiz_in_db(db_session, recording_id: int, quiz_data: Dict) -> Quiz:
     """
     Create a quiz and its questions in the database.
     Returns the created Quiz object.
     """
+    from app.crud.crud_quiz import quiz_question
+
     try:
         # Create quiz
-        quiz = Quiz(
-            title=quiz_data['title'],
-            recording_id=recording_id
-        )
+        quiz = Quiz(recording_id=recording_id)
         db_session.add(quiz)
         db_session.flush()  # Get quiz ID
         
-        # Create questions
-        for q_data in quiz_data['questions']:
-            question = Question(
-                quiz_id=quiz.id,
-                question_text=q_data['question'],
-                options=q_data['options'],
-                correct_answer=q_data['correct_answer'],
-                explanation=q_data['explanation']
-            )
-            db_session.add(question)
+        # Create all questions in one multi-row insert
+        quiz_question.create_many(db_session, objs_in=[
+            {
+                "quiz_id": quiz.id,
+                "question": q_data['question'],
+                "options": q_data['options'],
+                "correct_answer": correct_option_index(q_data),
+                "explanation": q_data['explanation'],
+            }
+            for q_data in quiz_data['questions']
+        ])
             
         db_session.commit()
         return quiz
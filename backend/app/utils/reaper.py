@@ -0,0 +1,72 @@
+import os
+import logging
+import time
+from typing import Optional
+
+from app.utils.storage import storage
+from app.utils.transcript_cache import transcript_cache
+
+logger = logging.getLogger(__name__)
+
+# Recordings one reaper run purges at most; the rest wait for the next run
+REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", "20"))
+
+
+def reap_deleted_recordings(limit: Optional[int] = None) -> int:
+    """
+    Background job: purge soft-deleted recordings, oldest first.
+
+    Each recording is claimed and purged in its own transaction (so
+    concurrent reapers skip each other's rows), and its files are removed
+    only once the rows are gone; a file left behind by a crash is harmless,
+    a row pointing at a missing file isn't. The transcript cache is pruned
+    at the end of each run. Returns the number purged.
+    """
+    from app.crud.crud_recording import recording as crud_recording
+    from app.db.session import get_db_context
+
+    limit = REAPER_BATCH_SIZE if limit is None else limit
+    reaped = 0
+    while reaped < limit:
+        with get_db_context() as db:
+            recording = crud_recording.claim_deleted(db)
+            if recording is None:
+                break
+            recording_id, file_path = recording.id, recording.file_path
+            crud_recording.purge(db, recording_id=recording_id)
+        reaped += 1
+        if file_path:
+            try:
+                removed = storage.remove_recording_files(file_path)
+            except OSError as e:
+                logger.error(f"Could not remove the files of recording {recording_id}: {e}")
+            else:
+                logger.info(f"Purged recording {recording_id} and {removed} files")
+    try:
+        pruned = transcript_cache.prune()
+    except OSError as e:
+        logger.error(f"Could not prune the transcript cache: {e}")
+    else:
+        if pruned:
+            logger.info(f"Pruned {pruned} transcript cache entries")
+    return reaped
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Purge soft-deleted recordings and their files")
+    parser.add_argument("--limit", type=int, default=REAPER_BATCH_SIZE,
+                        help="Recordings to purge per run")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Keep running, sleeping this many seconds between runs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        reaped = reap_deleted_recordings(args.limit)
+        logger.info(f"Reaped {reaped} recordings")
+        if args.interval is None:
+            break
+        if reaped < args.limit:
+            time.sleep(args.interval)
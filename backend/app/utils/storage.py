@@ -1,22 +1,27 @@
 import os
 import aiofiles
-import shutil
 from pathlib import Path
 from fastapi import UploadFile
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 import uuid
+import numpy as np
+
+# Sample rate of the derived analysis representation (float32 mono)
+ANALYSIS_SAMPLE_RATE = 16000
 
 class FileStorage:
     def __init__(self, base_dir: str = "uploads"):
         self.base_dir = Path(base_dir)
         self.audio_dir = self.base_dir / "audio"
         self.processed_dir = self.base_dir / "processed"
+        self.analysis_dir = self.base_dir / "analysis"
         self._create_directories()
 
     def _create_directories(self):
         """Create necessary directories if they don't exist"""
         self.audio_dir.mkdir(parents=True, exist_ok=True)
         self.processed_dir.mkdir(parents=True, exist_ok=True)
+        self.analysis_dir.mkdir(parents=True, exist_ok=True)
 
     async def save_upload(self, file: UploadFile, user_id: int) -> str:
         """Save an uploaded file and return its path"""
@@ -30,17 +35,93 @@ class FileStorage:
 
         return str(file_path)
 
-    def save_processed(self, original_path: str, processed_data, sample_rate: int) -> str:
-        """Save processed audio data and return its path"""
-        import soundfile as sf
-        
+    def save_processed(self, original_path: str, processed_data, sample_rate: int,
+                       profile_name: Optional[str] = None) -> str:
+        """Save processed audio data with the storage codec profile and return its path"""
+        from app.utils.codec import encode_samples, get_storage_profile
+
+        profile = get_storage_profile(profile_name)
         original_name = Path(original_path).stem
-        processed_name = f"{original_name}_processed.wav"
+        processed_name = f"{original_name}_processed{profile['extension']}"
         processed_path = self.processed_dir / processed_name
 
-        sf.write(str(processed_path), processed_data, sample_rate)
+        encode_samples(processed_data, sample_rate, str(processed_path), profile)
         return str(processed_path)
 
+    def save_pcm(self, raw_path: str, sample_rate: int, user_id: int,
+                 profile_name: Optional[str] = None) -> str:
+        """Encode a spooled raw PCM stream into the audio directory and return its path"""
+        from app.utils.codec import encode_pcm_file, get_storage_profile
+
+        profile = get_storage_profile(profile_name)
+        file_path = self.audio_dir / f"{user_id}_{uuid.uuid4()}{profile['extension']}"
+        encode_pcm_file(raw_path, sample_rate, str(file_path), profile)
+        return str(file_path)
+
+    def analysis_path(self, file_path: str) -> Path:
+        """
+        Path of the 16 kHz mono float32 analysis file derived from a stored
+        recording. These are scratch files (about 230 MB per hour of audio):
+        whoever builds one deletes it when done with it.
+        """
+        return self.analysis_dir / f"{Path(file_path).stem}.f32"
+
+    def build_analysis(self, file_path: str) -> str:
+        """
+        Decode a recording once into its analysis representation.
+        Transcription, VAD and speaker labelling in the same job all read
+        this file instead of resampling and downmixing the source again.
+        """
+        from app.utils.codec import decode_to_float_pcm
+
+        analysis_path = self.analysis_path(file_path)
+        temp_path = analysis_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            decode_to_float_pcm(file_path, str(temp_path), ANALYSIS_SAMPLE_RATE)
+            os.replace(temp_path, analysis_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        return str(analysis_path)
+
+    def build_analysis_from_pcm(self, raw_path: str, file_path: str) -> str:
+        """Build the analysis file from a spooled 16 kHz int16 PCM stream"""
+        analysis_path = self.analysis_path(file_path)
+        if os.path.getsize(raw_path) < 2:
+            analysis_path.write_bytes(b"")
+            return str(analysis_path)
+
+        pcm = np.memmap(raw_path, dtype="<i2", mode="r")
+        out = np.memmap(analysis_path, dtype=np.float32, mode="w+", shape=(len(pcm),))
+        block = ANALYSIS_SAMPLE_RATE * 60
+        for start in range(0, len(pcm), block):
+            out[start:start + block] = pcm[start:start + block] / 32768.0
+        out.flush()
+        del out
+        return str(analysis_path)
+
+    def load_analysis(self, file_path: str, build: bool = True) -> Optional[np.memmap]:
+        """
+        Memory-map a recording's analysis samples (float32, 16 kHz, mono),
+        building them first if they don't exist yet and `build` is set.
+        """
+        analysis_path = self.analysis_path(file_path)
+        if not analysis_path.exists():
+            if not build:
+                return None
+            self.build_analysis(file_path)
+        if analysis_path.stat().st_size == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(analysis_path, dtype=np.float32, mode="r")
+
+    def delete_analysis(self, file_path: str) -> bool:
+        """Delete a recording's analysis file"""
+        try:
+            self.analysis_path(file_path).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
     async def get_file(self, file_path: str) -> Optional[Path]:
         """Get a file by its path"""
         path = Path(file_path)
@@ -48,6 +129,34 @@ class FileStorage:
             return None
         return path
 
+    def stat(self, file_path: str) -> Optional[os.stat_result]:
+        """Stat a stored file, returning None if it doesn't exist"""
+        try:
+            result = os.stat(file_path)
+        except OSError:
+            return None
+        if not Path(file_path).is_file():
+            return None
+        return result
+
+    def open_for_send(self, file_path: str):
+        """Open a stored file for zero-copy sending (caller closes it)"""
+        return open(file_path, 'rb', buffering=0)
+
+    async def read_range(
+        self, file_path: str, start: int, end: int, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """Yield the bytes in [start, end] of a stored file in chunks"""
+        remaining = end - start + 1
+        async with aiofiles.open(file_path, 'rb') as in_file:
+            await in_file.seek(start)
+            while remaining > 0:
+                chunk = await in_file.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
     async def delete_file(self, file_path: str) -> bool:
         """Delete a file"""
         path = Path(file_path)
@@ -59,12 +168,41 @@ class FileStorage:
             pass
         return False
 
+    def recording_files(self, file_path: str) -> List[Path]:
+        """
+        A stored recording and the files derived from it: the original upload
+        or its processed copy (whichever `file_path` isn't), and their
+        analysis files.
+        """
+        path = Path(file_path)
+        if path.parent.name == "processed" and path.stem.startswith("processed_"):
+            # Repointed at the processed copy after transcription
+            sources = list(path.parent.parent.glob(f"{path.stem[len('processed_'):]}.*"))
+        else:
+            sources = [
+                *path.parent.glob(f"processed/processed_{path.stem}.*"),
+                *self.processed_dir.glob(f"{path.stem}_processed.*"),
+            ]
+        files = [path, *sources]
+        return [*files, *(self.analysis_path(str(f)) for f in files)]
+
+    def remove_recording_files(self, file_path: str) -> int:
+        """Delete a recording's files (see `recording_files`), returning how many were removed"""
+        removed = 0
+        for path in self.recording_files(file_path):
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
     def cleanup_old_files(self, max_age_days: int = 7):
         """Clean up files older than max_age_days"""
         import time
         current_time = time.time()
         
-        for directory in [self.audio_dir, self.processed_dir]:
+        for directory in [self.audio_dir, self.processed_dir, self.analysis_dir]:
             for file_path in directory.glob("*"):
                 if file_path.is_file():
                     file_age = current_time - file_path.stat().st_mtime
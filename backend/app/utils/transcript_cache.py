@@ -0,0 +1,111 @@
+import os
+import hashlib
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Entries unused for this long are pruned, and then the least recently used
+# until the cache fits in its size limit
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = float(os.getenv("TRANSCRIPT_CACHE_MAX_AGE_DAYS", "30"))
+TRANSCRIPT_CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "256"))
+
+
+def fingerprint_samples(samples: np.ndarray) -> str:
+    """
+    Fingerprint of a chunk's PCM: a hash of its exact mono int16 samples.
+
+    Chunks only get the same fingerprint when they hold the same samples,
+    such as the same upload transcribed again, so a cached transcript is
+    never served for different audio. Hashing runs at memory speed, far
+    below the cost of transcribing the chunk.
+    """
+    pcm = np.ascontiguousarray(samples, dtype="<i2")
+    return hashlib.blake2b(pcm.tobytes(), digest_size=16).hexdigest()
+
+
+def cache_key(fingerprint: str, model: str, prompt_version: str) -> str:
+    """Combine a chunk fingerprint with the model and prompt it was transcribed with"""
+    raw = f"{fingerprint}:{model}:{prompt_version}".encode()
+    return hashlib.blake2b(raw, digest_size=20).hexdigest()
+
+
+class TranscriptCache:
+    def __init__(self, base_dir: str = "uploads"):
+        self.cache_dir = Path(base_dir) / "cache" / "transcripts"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        # Fan out into subdirectories to keep directory listings small
+        return self.cache_dir / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached transcript for a chunk key, if any"""
+        path = self._path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read transcript cache entry {key}: {e}")
+            return None
+        try:
+            # The modification time doubles as the last use, for pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        """Store a chunk transcript atomically"""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            temp_path.write_text(text, encoding="utf-8")
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write transcript cache entry {key}: {e}")
+
+    def prune(self, max_age_days: Optional[float] = None, max_bytes: Optional[int] = None) -> int:
+        """
+        Remove entries unused for `max_age_days`, then the least recently
+        used until the rest fit in `max_bytes`; returns how many were removed.
+        Keys are content hashes shared between recordings, so entries of
+        deleted recordings age out here rather than being removed with them.
+        """
+        max_age_days = TRANSCRIPT_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        max_bytes = int(TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        cutoff = time.time() - max_age_days * 86400
+        entries = []
+        for path in self.cache_dir.glob("*/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        # Oldest first; temp files left by a crash age out like entries
+        entries.sort(key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove transcript cache entry {path.name}: {e}")
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+# Create a global instance
+transcript_cache = TranscriptCache(os.getenv("UPLOADS_DIR", "uploads"))
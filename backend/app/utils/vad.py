@@ -0,0 +1,128 @@
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A closed segment: (start offset in samples, int16 samples)
+Segment = Tuple[int, np.ndarray]
+
+
+def frame_energy(samples: np.ndarray, frame_len: int, block_frames: int = 4096) -> np.ndarray:
+    """
+    RMS energy of consecutive non-overlapping frames (int16 or float input).
+    Works blockwise so memory-mapped recordings are never fully materialized.
+    """
+    n_frames = len(samples) // frame_len
+    energy = np.empty(n_frames, dtype=np.float32)
+    for start in range(0, n_frames, block_frames):
+        end = min(start + block_frames, n_frames)
+        frames = np.asarray(samples[start * frame_len:end * frame_len], dtype=np.float32)
+        energy[start:end] = np.sqrt(np.mean(frames.reshape(end - start, frame_len) ** 2, axis=1))
+    return energy
+
+
+class SpeechSegmenter:
+    """
+    Streaming energy-based VAD that cuts incoming audio into speech segments.
+
+    Audio is fed in arbitrary-sized blocks of 16-bit mono samples. A segment
+    opens at the first speech frame and closes after `silence_ms` of trailing
+    silence, or once it reaches `max_segment_ms`. The speech threshold tracks
+    an adaptive noise floor, so it works across quiet and noisy rooms.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        silence_ms: int = 700,
+        min_segment_ms: int = 1500,
+        max_segment_ms: int = 30000,
+        threshold_ratio: float = 3.0,
+        min_threshold: float = 150.0,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.silence_frames = silence_ms // frame_ms
+        self.min_segment_frames = min_segment_ms // frame_ms
+        self.max_segment_frames = max_segment_ms // frame_ms
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+
+        self.noise_floor = min_threshold / threshold_ratio
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._frames: List[np.ndarray] = []
+        self._segment_start = 0
+        self._trailing_silence = 0
+        self._position = 0  # Samples consumed into whole frames
+
+    @property
+    def in_segment(self) -> bool:
+        return bool(self._frames)
+
+    def _close(self) -> Segment:
+        segment = (self._segment_start, np.concatenate(self._frames))
+        self._frames = []
+        self._trailing_silence = 0
+        return segment
+
+    def feed(self, samples: np.ndarray) -> List[Segment]:
+        """Consume a block of samples and return any segments that closed"""
+        buffer = np.concatenate([self._pending, np.asarray(samples, dtype=np.int16)])
+        n_frames = len(buffer) // self.frame_len
+        self._pending = buffer[n_frames * self.frame_len:]
+        if n_frames == 0:
+            return []
+
+        frames = buffer[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        energies = frame_energy(frames.ravel(), self.frame_len)
+
+        closed = []
+        for frame, energy in zip(frames, energies):
+            threshold = max(self.noise_floor * self.threshold_ratio, self.min_threshold)
+            is_speech = energy > threshold
+            if not is_speech:
+                # Only learn the noise floor from non-speech frames
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * energy
+
+            if self._frames:
+                self._frames.append(frame)
+                self._trailing_silence = 0 if is_speech else self._trailing_silence + 1
+                long_enough = len(self._frames) >= self.min_segment_frames
+                if (long_enough and self._trailing_silence >= self.silence_frames) \
+                        or len(self._frames) >= self.max_segment_frames:
+                    closed.append(self._close())
+            elif is_speech:
+                self._segment_start = self._position
+                self._frames.append(frame)
+
+            self._position += self.frame_len
+
+        return closed
+
+    def flush(self) -> List[Segment]:
+        """Close whatever is buffered at end of stream"""
+        if len(self._pending):
+            if self._frames:
+                self._frames.append(self._pending)
+            self._position += len(self._pending)
+            self._pending = np.zeros(0, dtype=np.int16)
+        return [self._close()] if self._frames else []
+
+
+def segment_samples(samples: np.ndarray, sample_rate: int = 16000,
+                    block_seconds: int = 10, **kwargs) -> List[Segment]:
+    """
+    Run the segmenter over a whole float signal, such as a recording's
+    memory-mapped analysis samples, one block at a time.
+    """
+    segmenter = SpeechSegmenter(sample_rate, **kwargs)
+    block = sample_rate * block_seconds
+    segments: List[Segment] = []
+    for start in range(0, len(samples), block):
+        pcm = np.clip(np.asarray(samples[start:start + block]) * 32768.0, -32768, 32767).astype(np.int16)
+        segments.extend(segmenter.feed(pcm))
+    segments.extend(segmenter.flush())
+    return segments
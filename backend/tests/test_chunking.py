@@ -0,0 +1,79 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import audio as audio_utils
+from app.utils.audio import ChunkBoundaryFinder, find_chunk_boundaries
+from app.utils.storage import storage
+
+SAMPLE_RATE = 16000
+
+
+def _speech(seconds: int, seed: int = 0) -> np.ndarray:
+    """Noise whose loudness changes every 100 ms, so every frame differs"""
+    rng = np.random.default_rng(seed)
+    n = seconds * SAMPLE_RATE
+    envelope = np.repeat(rng.random(n // 1600 + 1), 1600)[:n]
+    return (rng.standard_normal(n) * envelope * 0.1).astype(np.float32)
+
+
+def test_streaming_matches_whole_signal():
+    samples = _speech(150)
+    expected = find_chunk_boundaries(samples, SAMPLE_RATE)
+
+    # Blocks of odd sizes, as denoising yields them
+    finder = ChunkBoundaryFinder(SAMPLE_RATE)
+    rng = np.random.default_rng(1)
+    spans, position = [], 0
+    while position < len(samples):
+        size = int(rng.integers(1, 40000))
+        spans.extend(finder.feed(samples[position:position + size]))
+        position += size
+    spans.extend(finder.flush())
+
+    assert [0] + [end for _, end in spans] == expected
+    assert expected[-1] == 150000
+    assert all(end - start <= 45000 for start, end in spans)
+
+
+def test_long_runs_are_split_evenly():
+    # Silence has no unique quietest frame, so only the length splits it
+    boundaries = find_chunk_boundaries(np.zeros(100 * SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE)
+
+    assert boundaries == [0, 25000, 50000, 75000, 100000]
+
+
+@pytest.mark.asyncio
+async def test_pipelined_ingest_normalizes_from_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "analysis_dir", tmp_path)
+    samples = _speech(70) * 0.5
+    input_path = str(tmp_path / "upload.wav")
+    samples.tofile(storage.analysis_path(input_path))
+
+    async def _transcribe(samples, index=0, temp_dir=None):
+        return f"chunk {index}"
+
+    encoded = {}
+
+    def _encode(raw_path, sample_rate, output_path, profile=None, gain=1.0):
+        encoded.update(samples=np.fromfile(raw_path, dtype=np.float32), gain=gain, output_path=output_path)
+        return output_path
+
+    monkeypatch.setattr(audio_utils, "transcribe_samples", _transcribe)
+    monkeypatch.setattr(audio_utils, "encode_float_pcm_file", _encode)
+    output_path, transcription = await audio_utils.process_and_transcribe(input_path, denoise_preset="off")
+
+    assert output_path == encoded["output_path"]
+    chunks = len(find_chunk_boundaries(samples, SAMPLE_RATE)) - 1
+    assert transcription == " ".join(f"chunk {index}" for index in range(chunks))
+    # The whole cleaned signal went to the encoder with a gain that peaks it at 1.0
+    np.testing.assert_array_equal(encoded["samples"], samples)
+    assert np.max(np.abs(encoded["samples"])) * encoded["gain"] == pytest.approx(1.0)
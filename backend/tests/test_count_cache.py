@@ -0,0 +1,62 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base
+from app.crud import crud_recording  # noqa: F401 (registers the invalidation events)
+from app.models.recording import Recording
+from app.models.user import User
+from app.utils.count_cache import count_cache
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _owner(db):
+    owner = User(email="owner@example.com", full_name="Owner", hashed_password="x")
+    db.add(owner)
+    db.commit()
+    return owner.id
+
+
+def test_writes_invalidate_on_commit(db):
+    owner_id = _owner(db)
+    count_cache.set((owner_id, "recordings"), 0)
+
+    db.add(Recording(title="Lecture", duration="00:10:00", file_path="0.opus", user_id=owner_id))
+    db.flush()
+    # Flushed but uncommitted: a recount now would still see 0 rows
+    assert count_cache.get((owner_id, "recordings")) == 0
+
+    db.commit()
+    assert count_cache.get((owner_id, "recordings")) is None
+
+
+def test_rolled_back_writes_keep_the_total(db):
+    owner_id = _owner(db)
+    count_cache.set((owner_id, "recordings"), 0)
+
+    db.add(Recording(title="Lecture", duration="00:10:00", file_path="0.opus", user_id=owner_id))
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert count_cache.get((owner_id, "recordings")) == 0
@@ -0,0 +1,105 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.deps import get_current_active_user, get_db, get_read_db
+from app.db.base import Base
+from app.main import app
+from app.models.recording import Recording
+from app.models.research import ResearchRecommendation
+from app.models.user import User
+
+
+@pytest.fixture
+def client():
+    """The app on an in-memory database holding one user's recording and recommendation"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    owner = User(id=1, email="owner@example.com", full_name="Owner", hashed_password="x", is_active=True)
+    ready = []
+
+    async def _get_db():
+        # Set up on the client's event loop, where the sessions are used
+        if not ready:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with factory() as db:
+                db.add(owner)
+                db.add(Recording(id=1, title="Lecture", duration="00:10:00", file_path="1.opus", user_id=1,
+                                 transcription="Full text", summary="Short"))
+                db.add(ResearchRecommendation(id=1, recording_id=1, title="Paper", url="https://example.com",
+                                              description="Long abstract", key_takeaways=["one"], relevance=7))
+                await db.commit()
+            ready.append(True)
+        async with factory() as db:
+            yield db
+
+    app.dependency_overrides.update({
+        get_db: _get_db,
+        get_read_db: _get_db,
+        get_current_active_user: lambda: owner,
+    })
+    try:
+        # Without the lifespan: startup checks the configured database
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _items(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response.json()["data"]["items"]
+
+
+def test_recording_list_leaves_large_fields_out(client):
+    [item] = _items(client, "/api/v1/recordings/")
+
+    assert item["title"] == "Lecture"
+    assert "transcription" not in item and "summary" not in item
+    assert "file_path" not in item
+
+
+def test_recording_list_includes_requested_fields(client):
+    [item] = _items(client, "/api/v1/recordings/?fields=transcription")
+
+    assert item["transcription"] == "Full text"
+    assert "summary" not in item
+
+    [item] = _items(client, "/api/v1/recordings/?fields=transcription,summary&cursor=")
+    assert (item["transcription"], item["summary"]) == ("Full text", "Short")
+
+
+def test_recording_detail_has_every_field(client):
+    response = client.get("/api/v1/recordings/1")
+
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert (data["transcription"], data["summary"]) == ("Full text", "Short")
+    assert "file_path" not in data
+
+
+def test_research_list_field_selection(client):
+    [item] = _items(client, "/api/v1/research/")
+    assert item["title"] == "Paper"
+    assert "description" not in item and "key_takeaways" not in item
+
+    [item] = _items(client, "/api/v1/research/?fields=key_takeaways")
+    assert item["key_takeaways"] == ["one"]
+    assert "description" not in item
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/api/v1/recordings/?fields=file_path")
+
+    assert response.status_code == 422
@@ -0,0 +1,125 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from starlette.websockets import WebSocketDisconnect
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.models.user import User
+from app.routers import recordings
+
+
+class Pool:
+    """Connections the test database has checked out right now"""
+    checked_out = 0
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """The recordings router on an in-memory database holding one user (id 1)"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    ready = []
+    Pool.checked_out = 0
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _checkout(*args):
+        Pool.checked_out += 1
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _checkin(*args):
+        Pool.checked_out -= 1
+
+    @asynccontextmanager
+    async def _get_session():
+        # Set up on the client's event loop, where the sessions are used
+        if not ready:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with factory() as db:
+                db.add(User(email="owner@example.com", full_name="Owner", hashed_password="x"))
+                await db.commit()
+            ready.append(True)
+        async with factory() as db:
+            yield db
+
+    # Storing the recording needs ffmpeg; authentication is what's under test
+    monkeypatch.setattr(recordings, "get_session", _get_session)
+    monkeypatch.setattr(recordings.storage, "save_pcm", lambda *args: "live.opus")
+    monkeypatch.setattr(recordings.storage, "build_analysis_from_pcm", lambda *args: None)
+    monkeypatch.setattr(recordings, "save_transcript_segments", lambda *args: 0)
+
+    app = FastAPI()
+    app.include_router(recordings.router, prefix="/recordings")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _closed_with(websocket) -> int:
+    with pytest.raises(WebSocketDisconnect) as disconnect:
+        websocket.receive_json()
+    return disconnect.value.code
+
+
+def test_token_is_read_from_the_first_frame(client):
+    with client.websocket_connect("/recordings/live?title=Lecture") as websocket:
+        websocket.send_text(create_access_token(1))
+        websocket.send_text("stop")
+        message = websocket.receive_json()
+
+    assert message["type"] == "complete"
+
+
+def test_invalid_token_is_rejected(client):
+    with client.websocket_connect("/recordings/live?title=Lecture") as websocket:
+        websocket.send_text("not-a-token")
+        assert _closed_with(websocket) == 1008
+
+
+def test_query_token_is_not_accepted(client, monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_AUTH_TIMEOUT", 0.1)
+    url = f"/recordings/live?title=Lecture&token={create_access_token(1)}"
+    with client.websocket_connect(url) as websocket:
+        # Audio before the token doesn't authenticate either
+        websocket.send_bytes(b"\x00\x00" * 160)
+        assert _closed_with(websocket) == 1008
+
+
+def test_missing_token_times_out(client, monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_AUTH_TIMEOUT", 0.1)
+    with client.websocket_connect("/recordings/live?title=Lecture") as websocket:
+        assert _closed_with(websocket) == 1008
+
+
+def test_no_connection_is_held_while_streaming(client, monkeypatch):
+    held = []
+
+    class Session(recordings.LiveTranscriptionSession):
+        async def feed(self, data):
+            held.append(Pool.checked_out)
+            await super().feed(data)
+
+    monkeypatch.setattr(recordings, "LiveTranscriptionSession", Session)
+    with client.websocket_connect("/recordings/live?title=Lecture") as websocket:
+        websocket.send_text(create_access_token(1))
+        for _ in range(3):
+            websocket.send_bytes(b"\x00\x00" * 1600)
+        websocket.send_text("stop")
+        assert websocket.receive_json()["type"] == "complete"
+
+    assert held == [0, 0, 0]
+    assert Pool.checked_out == 0
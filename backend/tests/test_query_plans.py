@@ -0,0 +1,152 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import re
+import sys
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base
+from app.crud.crud_quiz import async_quiz
+from app.crud.crud_recording import recording as crud_recording, async_recording
+from app.crud.crud_research import async_research
+from app.crud.crud_study import async_study
+from app.models.quiz import Quiz
+from app.models.recording import Recording
+from app.models.research import ResearchRecommendation
+from app.models.study import StudySession
+from app.models.user import User
+
+# Point at a PostgreSQL database (with an async driver, e.g.
+# postgresql+asyncpg://...) to check its plans instead of SQLite's
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite+aiosqlite://")
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        await session.close()
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+@pytest.fixture
+def capture(db):
+    """Record the SQL (and parameters) sent to the database while the block runs"""
+    statements = []
+
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _before_execute)
+
+
+async def _seed(db):
+    owner = User(email="owner@example.com", full_name="Owner", hashed_password="x")
+    db.add(owner)
+    await db.flush()
+    recording = Recording(title="Lecture", duration="00:10:00", file_path="0.opus", user_id=owner.id)
+    db.add(recording)
+    await db.flush()
+    quiz = Quiz(recording_id=recording.id, score=75.0)
+    db.add(quiz)
+    db.add(StudySession(recording_id=recording.id, user_id=owner.id, duration=10.0))
+    db.add(ResearchRecommendation(recording_id=recording.id, title="Paper"))
+    await db.commit()
+    return owner.id, recording.id, quiz.id
+
+
+async def _sequential_scans(db, statement, parameters):
+    """Tables the database would read in full to answer the statement"""
+    connection = await db.connection()
+    tables = set(Base.metadata.tables)
+    if connection.dialect.name == "postgresql":
+        # Tiny test tables make sequential scans look cheapest; forbid them so
+        # any that remain are the only way to run the query
+        await connection.exec_driver_sql("SET enable_seqscan = off")
+        plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar()
+        nodes, scans = [plan[0]["Plan"]], []
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan" and node["Relation Name"] in tables:
+                scans.append(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+        return scans
+
+    rows = (await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+    scans = []
+    for row in rows:
+        # "SCAN quizzes" reads the table; "SCAN ... USING INDEX" / "SEARCH" don't
+        match = re.match(r"SCAN (\w+)", row[-1])
+        if match and match.group(1) in tables and "INDEX" not in row[-1]:
+            scans.append(match.group(1))
+    return scans
+
+
+async def _assert_indexed(db, statements):
+    assert statements
+    for statement, parameters in statements:
+        scans = await _sequential_scans(db, statement, parameters)
+        assert not scans, f"Sequential scan of {', '.join(scans)} in:\n{statement}"
+
+
+@pytest.mark.asyncio
+async def test_listings_use_indexes(db, capture):
+    owner_id, _, _ = await _seed(db)
+    capture.clear()
+
+    for crud in (async_recording, async_quiz, async_research):
+        (await db.execute(crud.get_multi_by_user(user_id=owner_id).limit(10))).all()
+    (await db.execute(async_quiz.get_attempts_by_user(user_id=owner_id).limit(10))).all()
+
+    await _assert_indexed(db, list(capture))
+
+
+@pytest.mark.asyncio
+async def test_per_user_lookups_use_indexes(db, capture):
+    owner_id, recording_id, quiz_id = await _seed(db)
+    capture.clear()
+
+    assert await async_quiz.get_by_user(db, id=quiz_id, user_id=owner_id) is not None
+    await async_study.get_by_recording(db, recording_id=recording_id, user_id=owner_id)
+
+    await _assert_indexed(db, list(capture))
+
+
+@pytest.mark.asyncio
+async def test_study_stats_use_indexes(db, capture):
+    owner_id, recording_id, _ = await _seed(db)
+    capture.clear()
+
+    stats = await async_study.get_recording_stats(db, recording_id=recording_id, user_id=owner_id)
+    await async_study.get_overall_stats(db, user_id=owner_id)
+
+    assert stats.total_sessions == 1
+    await _assert_indexed(db, list(capture))
+
+
+@pytest.mark.asyncio
+async def test_recording_progress_uses_indexes(db, capture):
+    owner_id, _, _ = await _seed(db)
+    capture.clear()
+
+    await db.run_sync(lambda session: crud_recording.with_progress(session, owner_id=owner_id).limit(10).all())
+
+    await _assert_indexed(db, list(capture))
@@ -0,0 +1,120 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base
+from app.crud.crud_quiz import async_quiz
+from app.models.quiz import QuestionAnswer, QuizQuestion
+from app.models.recording import Recording
+from app.models.user import User
+from app.schemas.quiz import QuizCreate, QuizSubmission
+from app.utils import quiz as quiz_utils
+
+# What the model returns: the correct answer is the text of an option
+GENERATED_QUIZ = {
+    "title": "Photosynthesis",
+    "questions": [
+        {
+            "question": "Where does photosynthesis happen?",
+            "options": ["A) Mitochondria", "B) Chloroplasts", "C) Nucleus", "D) Ribosomes"],
+            "correct_answer": "B) Chloroplasts",
+            "explanation": "Chloroplasts hold the chlorophyll.",
+        },
+        {
+            "question": "Which gas is taken in?",
+            "options": ["A) Oxygen", "B) Nitrogen", "C) Carbon dioxide", "D) Helium"],
+            "correct_answer": "C) Carbon dioxide",
+            "explanation": "CO2 is fixed into sugars.",
+        },
+        {
+            "question": "Which gas is released?",
+            "options": ["A) Oxygen", "B) Methane", "C) Argon", "D) Hydrogen"],
+            "correct_answer": "A) Oxygen",
+            "explanation": "Oxygen comes from splitting water.",
+        },
+    ],
+}
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        await session.close()
+        await engine.dispose()
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    monkeypatch.setattr(quiz_utils, "generate_quiz", lambda transcript: GENERATED_QUIZ)
+
+
+async def _recording(db):
+    owner = User(email="owner@example.com", full_name="Owner", hashed_password="x")
+    db.add(owner)
+    await db.flush()
+    recording = Recording(title="Biology", duration="00:10:00", file_path="0.opus",
+                          user_id=owner.id, transcription="Plants make sugar from light.")
+    db.add(recording)
+    await db.commit()
+    return owner.id, recording
+
+
+@pytest.mark.asyncio
+async def test_generated_answers_are_stored_as_option_indexes(db, generated):
+    owner_id, recording = await _recording(db)
+
+    questions = await quiz_utils.generate_quiz_questions(recording.transcription)
+    quiz = await async_quiz.create_with_user(
+        db, obj_in=QuizCreate(recording_id=recording.id, questions=questions), user_id=owner_id
+    )
+
+    stored = (await db.scalars(select(QuizQuestion).where(QuizQuestion.quiz_id == quiz.id)
+                               .order_by(QuizQuestion.id))).all()
+    assert [q.correct_answer for q in stored] == [1, 2, 0]
+    assert stored[0].explanation == "Chloroplasts hold the chlorophyll."
+
+
+@pytest.mark.asyncio
+async def test_generate_submit_score(db, generated):
+    owner_id, recording = await _recording(db)
+    questions = await quiz_utils.generate_quiz_questions(recording.transcription)
+    quiz = await async_quiz.create_with_user(
+        db, obj_in=QuizCreate(recording_id=recording.id, questions=questions), user_id=owner_id
+    )
+    first, second, third = sorted(q.id for q in quiz.questions)
+
+    # Two right, one wrong
+    result = await async_quiz.submit_answers(
+        db, quiz=quiz, user_id=owner_id, answers=QuizSubmission(answers={first: 1, second: 2, third: 3})
+    )
+    assert (result.correct_answers, result.total_questions) == (2, 3)
+    assert result.score == pytest.approx(200 / 3)
+
+    # Unanswered questions count as wrong
+    result = await async_quiz.submit_answers(
+        db, quiz=quiz, user_id=owner_id, answers=QuizSubmission(answers={third: 0})
+    )
+    assert (result.correct_answers, result.total_questions) == (1, 3)
+    assert quiz.score == pytest.approx(100 / 3)
+
+    stats = await async_quiz.get_question_stats(db, quiz_id=quiz.id)
+    assert [(s.answers, s.correct_answers) for s in stats] == [(1, 1), (1, 1), (2, 1)]
+    assert await db.scalar(select(QuestionAnswer.is_correct).where(
+        QuestionAnswer.attempt_id == result.attempt_id, QuestionAnswer.question_id == third
+    ))
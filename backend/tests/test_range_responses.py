@@ -0,0 +1,142 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.streaming import ZERO_COPY_SEND, RangeFileResponse
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+
+@pytest.fixture
+def audio_path(tmp_path):
+    path = tmp_path / "lecture.mp3"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+@pytest.fixture
+def client(audio_path):
+    app = FastAPI()
+
+    @app.api_route("/audio", methods=["GET", "HEAD"])
+    async def audio(request: Request):
+        return RangeFileResponse(audio_path, request)
+
+    return TestClient(app)
+
+
+def test_full_file(client):
+    response = client.get("/audio")
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == "1024"
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_range(client):
+    response = client.get("/audio", headers={"range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[100:200]
+    assert response.headers["content-range"] == "bytes 100-199/1024"
+    assert response.headers["content-length"] == "100"
+
+
+def test_open_ended_range_is_clamped(client):
+    response = client.get("/audio", headers={"range": "bytes=1000-5000"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[1000:]
+    assert response.headers["content-range"] == "bytes 1000-1023/1024"
+
+
+def test_suffix_range(client):
+    response = client.get("/audio", headers={"range": "bytes=-24"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[-24:]
+    assert response.headers["content-range"] == "bytes 1000-1023/1024"
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/audio", headers={"range": "bytes=2048-"})
+
+    assert response.status_code == 416
+    assert response.content == b""
+    assert response.headers["content-range"] == "bytes */1024"
+
+
+def test_multiple_ranges_serve_the_whole_file(client):
+    response = client.get("/audio", headers={"range": "bytes=0-9,20-29"})
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_not_modified(client):
+    validators = client.get("/audio").headers
+
+    for headers in ({"if-none-match": validators["etag"]},
+                    {"if-modified-since": validators["last-modified"]}):
+        response = client.get("/audio", headers={**headers, "range": "bytes=0-9"})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert "content-length" not in response.headers
+
+    response = client.get("/audio", headers={"if-none-match": '"stale"'})
+    assert response.status_code == 200
+
+
+def test_if_range(client):
+    validators = client.get("/audio").headers
+
+    for validator in (validators["etag"], validators["last-modified"]):
+        response = client.get("/audio", headers={"range": "bytes=0-9", "if-range": validator})
+        assert response.status_code == 206
+        assert response.content == CONTENT[:10]
+
+    # The file changed since the client's copy: send all of it
+    response = client.get("/audio", headers={"range": "bytes=0-9", "if-range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_head(client):
+    response = client.head("/audio", headers={"range": "bytes=0-9"})
+
+    assert response.status_code == 206
+    assert response.content == b""
+    assert response.headers["content-length"] == "10"
+
+
+@pytest.mark.asyncio
+async def test_zero_copy_send(audio_path):
+    scope = {
+        "type": "http", "method": "GET", "path": "/audio", "query_string": b"",
+        "headers": [(b"range", b"bytes=10-19")], "extensions": {ZERO_COPY_SEND: {}},
+    }
+    messages = []
+
+    async def _send(message):
+        if message["type"] == ZERO_COPY_SEND:
+            message = {**message, "file": os.pread(message["file"], message["count"], message["offset"])}
+        messages.append(message)
+
+    response = RangeFileResponse(audio_path, Request(scope))
+    await response(scope, None, _send)
+
+    assert messages[0]["status"] == 206
+    assert messages[1] == {
+        "type": ZERO_COPY_SEND, "file": CONTENT[10:20], "offset": 10, "count": 10, "more_body": False,
+    }
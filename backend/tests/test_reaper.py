@@ -0,0 +1,133 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import session as db_session
+from app.db.base import Base
+from app.models.quiz import QuestionAnswer, Quiz, QuizAttempt, QuizQuestion
+from app.models.recording import Recording
+from app.models.research import ResearchRecommendation, SavedPaper
+from app.models.study import RecordingStudyStats, StudySession, UserStudyStats
+from app.models.transcript import TranscriptSegment
+from app.models.user import User
+from app.utils import reaper
+from app.utils.storage import FileStorage
+from app.utils.transcript_cache import TranscriptCache
+
+START = datetime(2026, 10, 1, 9, 0)
+
+DEPENDENTS = {
+    Quiz: Quiz.recording_id,
+    QuizQuestion: QuizQuestion.quiz_id,
+    QuizAttempt: QuizAttempt.quiz_id,
+    QuestionAnswer: QuestionAnswer.attempt_id,
+    ResearchRecommendation: ResearchRecommendation.recording_id,
+    SavedPaper: SavedPaper.recommendation_id,
+    TranscriptSegment: TranscriptSegment.recording_id,
+    StudySession: StudySession.recording_id,
+}
+
+
+@pytest.fixture
+def factory(tmp_path, monkeypatch):
+    """
+    User 1 has a soft-deleted recording (1) and a live one (2); user 2 has a
+    live one (3). Each has a quiz with an answered attempt, a saved
+    recommendation, a transcript segment, a finished study session and its
+    files; every dependent row shares its recording's id.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(engine, expire_on_commit=False)
+    storage = FileStorage(str(tmp_path))
+
+    with factory() as db:
+        for user_id in (1, 2):
+            db.add(User(id=user_id, email=f"user{user_id}@example.com", full_name="User", hashed_password="x"))
+        for id, user_id in ((1, 1), (2, 1), (3, 2)):
+            file_path = storage.audio_dir / f"{user_id}_{id}.opus"
+            for path in (file_path, storage.processed_dir / f"{file_path.stem}_processed.wav",
+                         storage.analysis_path(str(file_path))):
+                path.write_bytes(b"audio")
+            db.add_all([
+                Recording(id=id, title="Lecture", duration="00:10:00", file_path=str(file_path), user_id=user_id,
+                          deleted_at=datetime.now(timezone.utc) if id == 1 else None),
+                Quiz(id=id, recording_id=id),
+                QuizQuestion(id=id, quiz_id=id, question="?", options=["a", "b"], correct_answer=0),
+                QuizAttempt(id=id, quiz_id=id, user_id=user_id, score=100.0),
+                QuestionAnswer(id=id, attempt_id=id, question_id=id, selected_option=0, is_correct=True),
+                ResearchRecommendation(id=id, recording_id=id, title="Paper"),
+                SavedPaper(id=id, user_id=user_id, recommendation_id=id),
+                TranscriptSegment(id=id, recording_id=id, position=0, start_ms=0, end_ms=1000, text="Hello"),
+                StudySession(id=id, user_id=user_id, recording_id=id, start_time=START + timedelta(hours=id),
+                             end_time=START + timedelta(hours=id, minutes=10 * id), duration=10.0 * id),
+            ])
+        db.commit()
+
+    @contextmanager
+    def _get_db_context():
+        with factory() as db:
+            yield db
+            db.commit()
+
+    monkeypatch.setattr(db_session, "get_db_context", _get_db_context)
+    monkeypatch.setattr(reaper, "storage", storage)
+    monkeypatch.setattr(reaper, "transcript_cache", TranscriptCache(str(tmp_path)))
+    factory.storage = storage
+    try:
+        yield factory
+    finally:
+        engine.dispose()
+
+
+def _ids(db, model) -> list:
+    return sorted(db.scalars(select(model.id)))
+
+
+def test_reaping_purges_a_deleted_recording_and_its_dependents(factory):
+    assert reaper.reap_deleted_recordings() == 1
+
+    with factory() as db:
+        assert _ids(db, Recording) == [2, 3]
+        for model in DEPENDENTS:
+            assert _ids(db, model) == [2, 3], model.__name__
+        # Rollups: recording 1's row is gone, user 1's totals keep recording 2 only
+        assert db.execute(
+            select(RecordingStudyStats.user_id, RecordingStudyStats.recording_id, RecordingStudyStats.total_sessions)
+            .order_by(RecordingStudyStats.recording_id)
+        ).all() == [(1, 2, 1), (2, 3, 1)]
+        users = db.execute(
+            select(UserStudyStats.user_id, UserStudyStats.total_sessions, UserStudyStats.total_duration,
+                   UserStudyStats.last_session).order_by(UserStudyStats.user_id)
+        ).all()
+        assert users == [
+            (1, 1, 20.0, START + timedelta(hours=2, minutes=20)),
+            (2, 1, 30.0, START + timedelta(hours=3, minutes=30)),
+        ]
+
+    storage = factory.storage
+    assert sorted(path.name for path in storage.audio_dir.glob("*")) == ["1_2.opus", "2_3.opus"]
+    assert sorted(path.name for path in storage.processed_dir.glob("*")) == [
+        "1_2_processed.wav", "2_3_processed.wav"
+    ]
+    assert sorted(path.name for path in storage.analysis_dir.glob("*")) == ["1_2.f32", "2_3.f32"]
+
+
+def test_reaping_with_nothing_deleted_is_a_no_op(factory):
+    assert reaper.reap_deleted_recordings() == 1
+    assert reaper.reap_deleted_recordings() == 0
+
+    with factory() as db:
+        assert db.scalar(select(func.count()).select_from(Recording)) == 2
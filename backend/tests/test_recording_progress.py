@@ -0,0 +1,114 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base
+from app.crud.crud_recording import recording as crud_recording
+from app.models.quiz import Quiz
+from app.models.recording import Recording
+from app.models.research import ResearchRecommendation
+from app.models.study import StudySession
+from app.models.user import User
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def count_queries(db):
+    """Count SQL statements sent to the database while the block runs"""
+    statements = []
+
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _before_execute)
+
+
+def _seed(db, n_recordings=5):
+    owner = User(email="owner@example.com", full_name="Owner", hashed_password="x")
+    other = User(email="other@example.com", full_name="Other", hashed_password="x")
+    db.add_all([owner, other])
+    db.flush()
+
+    for i in range(n_recordings):
+        rec = Recording(title=f"Lecture {i}", duration="00:10:00", file_path=f"{i}.opus", user_id=owner.id)
+        db.add(rec)
+        db.flush()
+        # Recording i has i quizzes scored 50 and 100 alternately, i study
+        # sessions of 10 minutes and one open session, and i recommendations
+        for j in range(i):
+            db.add(Quiz(recording_id=rec.id, score=50.0 if j % 2 == 0 else 100.0))
+            db.add(StudySession(recording_id=rec.id, user_id=owner.id, duration=10.0))
+            db.add(ResearchRecommendation(recording_id=rec.id, title=f"Paper {j}"))
+        db.add(StudySession(recording_id=rec.id, user_id=owner.id, duration=None))
+
+    # Another user's data must not leak into the owner's aggregates
+    foreign = Recording(title="Foreign", duration="00:01:00", file_path="f.opus", user_id=other.id)
+    db.add(foreign)
+    db.flush()
+    db.add(Quiz(recording_id=foreign.id, score=0.0))
+    db.commit()
+    return owner
+
+
+def test_recording_progress_is_one_query(db, count_queries):
+    owner_id = _seed(db).id
+    db.expire_all()
+    count_queries.clear()
+
+    rows = crud_recording.with_progress(db, owner_id=owner_id).all()
+
+    assert len(count_queries) == 1
+    assert len(rows) == 5
+
+
+def test_query_count_does_not_grow_with_recordings(db, count_queries):
+    owner_id = _seed(db, n_recordings=20).id
+    db.expire_all()
+    count_queries.clear()
+
+    rows = crud_recording.with_progress(db, owner_id=owner_id).limit(20).all()
+    # Reading the aggregates and the loaded recordings issues nothing further
+    [(row.Recording.title, row.quiz_count, row.study_time) for row in rows]
+
+    assert len(count_queries) == 1
+
+
+def test_recording_progress_aggregates(db):
+    owner = _seed(db)
+    rows = crud_recording.with_progress(db, owner_id=owner.id).all()
+    by_title = {row.Recording.title: row for row in rows}
+
+    empty = by_title["Lecture 0"]
+    assert empty.quiz_count == 0
+    assert empty.average_quiz_score is None
+    assert empty.study_time == 0
+    assert empty.research_count == 0
+
+    busy = by_title["Lecture 3"]
+    assert busy.quiz_count == 3
+    assert busy.average_quiz_score == pytest.approx((50 + 100 + 50) / 3)
+    assert busy.study_time == pytest.approx(30.0)
+    assert busy.research_count == 3
@@ -0,0 +1,51 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import asyncio
+import math
+import sys
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.replicas import ReplicaRouter
+
+
+class ProbedRouter(ReplicaRouter):
+    """A router whose lag probes take `delay` seconds and report `reported`"""
+
+    def __init__(self, delay: float, reported: float = 0.0, **kwargs):
+        super().__init__([object()], max_lag=5.0, check_interval=60.0, **kwargs)
+        self.delay = delay
+        self.reported = reported
+        self.probes = 0
+
+    async def _measure(self, replica):
+        self.probes += 1
+        await asyncio.sleep(self.delay)
+        return self.reported
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_probe():
+    router = ProbedRouter(delay=0.05, reported=1.5, probe_timeout=1.0)
+
+    lags = await asyncio.gather(*(router.lag(0) for _ in range(10)))
+
+    assert lags == [1.5] * 10
+    assert router.probes == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_probe_gives_up_after_the_probe_timeout():
+    router = ProbedRouter(delay=5.0, probe_timeout=0.05)
+
+    lag = await asyncio.wait_for(router.lag(0), timeout=1.0)
+
+    assert lag == math.inf
+    assert await router.choose() is None
+    # The failed measurement is cached like any other
+    assert router.probes == 1
@@ -0,0 +1,115 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.pagination import decode_rank_cursor, encode_rank_cursor
+from app.db.base import Base
+from app.crud.crud_search import async_search
+from app.models.recording import Recording
+from app.models.research import ResearchRecommendation, SavedPaper
+from app.models.study import StudySession
+from app.models.user import User
+
+
+@pytest_asyncio.fixture
+async def db():
+    """
+    User 1 has a live recording (1) and a soft-deleted one (2), each with a
+    study session and a saved paper mentioning photosynthesis; user 2 has
+    a recording (3) about it too.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+    for user_id in (1, 2):
+        session.add(User(id=user_id, email=f"user{user_id}@example.com", full_name="User", hashed_password="x"))
+    for recording_id, user_id, deleted_at in ((1, 1, None), (2, 1, datetime.now(timezone.utc)), (3, 2, None)):
+        session.add(Recording(id=recording_id, title=f"Biology {recording_id}", duration="00:10:00",
+                              file_path=f"{recording_id}.opus", user_id=user_id, deleted_at=deleted_at,
+                              transcription="Plants turn light into sugar by photosynthesis."))
+    for recording_id in (1, 2):
+        session.add(StudySession(id=recording_id, user_id=1, recording_id=recording_id,
+                                 notes="Review photosynthesis before the exam."))
+        session.add(ResearchRecommendation(id=recording_id, recording_id=recording_id, title="Paper"))
+        session.add(SavedPaper(id=recording_id, user_id=1, recommendation_id=recording_id,
+                               notes="Photosynthesis rates in shade."))
+    await session.commit()
+    try:
+        yield session
+    finally:
+        await session.close()
+        await engine.dispose()
+
+
+async def _found(db, q, **kwargs):
+    return [(result.type, result.id) for result in await async_search.search(db, user_id=1, q=q, **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_soft_deleted_recordings_and_their_notes_are_left_out(db):
+    found = await _found(db, "photosynthesis")
+
+    assert sorted(found) == [("recording", 1), ("saved_paper", 1), ("study_session", 1)]
+
+
+@pytest.mark.asyncio
+async def test_types_filter(db):
+    assert await _found(db, "photosynthesis", types=["study_session"]) == [("study_session", 1)]
+    assert sorted(await _found(db, "photosynthesis", types=["recording", "saved_paper"])) == [
+        ("recording", 1), ("saved_paper", 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_continue_without_duplicates(db):
+    # Equal notes rank equally, so pages also break ties on (type, id)
+    for study_id in range(10, 17):
+        db.add(StudySession(id=study_id, user_id=1, recording_id=1, notes="Chlorophyll absorbs red light."))
+    await db.commit()
+    everything = await _found(db, "light", limit=100)
+
+    pages, after = [], None
+    while True:
+        page = await async_search.search(db, user_id=1, q="light", limit=3, after=after)
+        pages.extend((result.type, result.id) for result in page)
+        if len(page) < 3:
+            break
+        # Through the cursor clients see
+        after = decode_rank_cursor(encode_rank_cursor(page[-1].rank, page[-1].type, page[-1].id))
+
+    assert pages == everything
+    # The seven notes and recording 1's transcript
+    assert len(set(pages)) == len(pages) == 8
+
+
+@pytest.mark.asyncio
+async def test_matched_text_is_escaped(db):
+    db.add(StudySession(id=20, user_id=1, recording_id=1,
+                        notes="<script>alert(1)</script> & Mitochondria <b>power</b> the cell"))
+    await db.commit()
+
+    [result] = await async_search.search(db, user_id=1, q="mitochondria")
+
+    assert result.snippet.count("<mark>") == 1
+    assert "<mark>Mitochondria</mark>" in result.snippet
+    assert "&lt;script&gt;alert(1)&lt;/script&gt; &amp;" in result.snippet
+    assert "<b>" not in result.snippet and "<script>" not in result.snippet
+    assert result.title == "Biology 1"
+
+
+@pytest.mark.asyncio
+async def test_other_users_rows_are_not_searched(db):
+    found = [(r.type, r.id) for r in await async_search.search(db, user_id=2, q="photosynthesis")]
+
+    assert found == [("recording", 3)]
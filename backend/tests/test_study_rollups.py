@@ -0,0 +1,166 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base
+from app.crud.crud_study import async_study, study
+from app.models.recording import Recording
+from app.models.study import RecordingStudyStats, StudySession, UserStudyStats
+from app.models.user import User
+from app.schemas.study import StudySessionCreate, StudySessionUpdate
+
+START = datetime(2026, 10, 1, 9, 0)
+
+
+@pytest_asyncio.fixture
+async def db():
+    """Two users, each with two recordings (ids 1-2 are user 1's, 3-4 user 2's)"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+    for user_id in (1, 2):
+        session.add(User(id=user_id, email=f"user{user_id}@example.com", full_name="User", hashed_password="x"))
+        for recording_id in (2 * user_id - 1, 2 * user_id):
+            session.add(Recording(id=recording_id, title="Lecture", duration="00:10:00",
+                                  file_path=f"{recording_id}.opus", user_id=user_id))
+    await session.commit()
+    try:
+        yield session
+    finally:
+        await session.close()
+        await engine.dispose()
+
+
+async def _studied(db, *, user_id: int, recording_id: int, start: datetime, minutes: float = None) -> StudySession:
+    """Start a session, and end it after `minutes` if given"""
+    session = await async_study.create_with_owner(
+        db, obj_in=StudySessionCreate(recording_id=recording_id), owner_id=user_id
+    )
+    session = await async_study.update(db, db_obj=session, obj_in={"start_time": start})
+    if minutes is not None:
+        session = await async_study.update(
+            db, db_obj=session, obj_in=StudySessionUpdate(end_time=start + timedelta(minutes=minutes))
+        )
+    return session
+
+
+async def _rollups(db) -> tuple:
+    """Every rollup row, as tuples with durations rounded for comparison"""
+    users = (await db.execute(
+        select(UserStudyStats.user_id, UserStudyStats.total_sessions,
+               UserStudyStats.total_duration, UserStudyStats.last_session)
+        .order_by(UserStudyStats.user_id)
+    )).all()
+    recordings = (await db.execute(
+        select(RecordingStudyStats.user_id, RecordingStudyStats.recording_id, RecordingStudyStats.total_sessions,
+               RecordingStudyStats.total_duration, RecordingStudyStats.last_session)
+        .order_by(RecordingStudyStats.user_id, RecordingStudyStats.recording_id)
+    )).all()
+    return (
+        [(u, n, round(d, 6), last) for u, n, d, last in users],
+        [(u, r, n, round(d, 6), last) for u, r, n, d, last in recordings],
+    )
+
+
+@pytest.mark.asyncio
+async def test_ending_a_session_counts_it(db):
+    session = await _studied(db, user_id=1, recording_id=1, start=START)
+    # Unfinished sessions don't count
+    assert (await async_study.get_overall_stats(db, user_id=1)).total_sessions == 0
+
+    await async_study.update(db, db_obj=session, obj_in=StudySessionUpdate(end_time=START + timedelta(minutes=30)))
+
+    overall = await async_study.get_overall_stats(db, user_id=1)
+    assert (overall.total_sessions, overall.total_duration) == (1, pytest.approx(30.0))
+    assert overall.last_session == START + timedelta(minutes=30)
+    per_recording = await async_study.get_recording_stats(db, recording_id=1, user_id=1)
+    assert (per_recording.total_sessions, per_recording.total_duration) == (1, pytest.approx(30.0))
+
+
+@pytest.mark.asyncio
+async def test_re_ending_replaces_the_duration(db):
+    session = await _studied(db, user_id=1, recording_id=1, start=START, minutes=30)
+    await _studied(db, user_id=1, recording_id=2, start=START + timedelta(hours=1), minutes=10)
+
+    await async_study.update(db, db_obj=session, obj_in=StudySessionUpdate(end_time=START + timedelta(minutes=45)))
+
+    overall = await async_study.get_overall_stats(db, user_id=1)
+    assert (overall.total_sessions, overall.total_duration) == (2, pytest.approx(55.0))
+    assert overall.last_session == START + timedelta(hours=1, minutes=10)
+    per_recording = await async_study.get_recording_stats(db, recording_id=1, user_id=1)
+    assert (per_recording.total_sessions, per_recording.total_duration) == (1, pytest.approx(45.0))
+    assert per_recording.last_session == START + timedelta(minutes=45)
+
+
+@pytest.mark.asyncio
+async def test_deleting_a_session_takes_it_out(db):
+    early = await _studied(db, user_id=1, recording_id=1, start=START, minutes=20)
+    late = await _studied(db, user_id=1, recording_id=1, start=START + timedelta(hours=2), minutes=15)
+
+    await async_study.remove(db, id=late.id)
+
+    overall = await async_study.get_overall_stats(db, user_id=1)
+    assert (overall.total_sessions, overall.total_duration) == (1, pytest.approx(20.0))
+    # The latest session is re-read from those left
+    assert overall.last_session == START + timedelta(minutes=20)
+
+    await async_study.remove(db, id=early.id)
+    overall = await async_study.get_overall_stats(db, user_id=1)
+    assert (overall.total_sessions, overall.total_duration, overall.last_session) == (0, 0.0, None)
+
+
+@pytest.mark.asyncio
+async def test_remove_by_recording(db):
+    await _studied(db, user_id=1, recording_id=1, start=START, minutes=30)
+    await _studied(db, user_id=1, recording_id=1, start=START + timedelta(hours=3), minutes=5)
+    await _studied(db, user_id=1, recording_id=2, start=START + timedelta(hours=1), minutes=10)
+    await _studied(db, user_id=1, recording_id=1, start=START + timedelta(hours=4))  # Unfinished
+    await _studied(db, user_id=2, recording_id=3, start=START, minutes=60)
+    other_user = await _rollups(db)
+
+    await db.run_sync(lambda session: study.remove_by_recording(session, recording_id=1))
+    await db.commit()
+
+    assert await db.scalar(select(StudySession.id).where(StudySession.recording_id == 1)) is None
+    overall = await async_study.get_overall_stats(db, user_id=1)
+    assert (overall.total_sessions, overall.total_duration) == (1, pytest.approx(10.0))
+    assert overall.last_session == START + timedelta(hours=1, minutes=10)
+    assert (await async_study.get_recording_stats(db, recording_id=1, user_id=1)).total_sessions == 0
+    # User 2's rollups are untouched
+    users, recordings = await _rollups(db)
+    assert users[1] == other_user[0][1]
+    assert [row for row in recordings if row[0] == 2] == [row for row in other_user[1] if row[0] == 2]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental_rollups(db):
+    sessions = [
+        await _studied(db, user_id=user_id, recording_id=recording_id,
+                       start=START + timedelta(hours=offset), minutes=minutes)
+        for offset, (user_id, recording_id, minutes) in enumerate([
+            (1, 1, 30), (1, 1, 12.5), (1, 2, 45), (1, 2, None), (2, 3, 20), (2, 4, 90), (2, 4, 5),
+        ])
+    ]
+    await async_study.update(db, db_obj=sessions[0], obj_in=StudySessionUpdate(end_time=START + timedelta(minutes=50)))
+    await async_study.update(db, db_obj=sessions[3], obj_in=StudySessionUpdate(end_time=START + timedelta(hours=3, minutes=7)))
+    await async_study.remove(db, id=sessions[5].id)
+    await db.run_sync(lambda session: study.remove_by_recording(session, recording_id=3))
+    await db.commit()
+    incremental = await _rollups(db)
+
+    rebuilt = await db.run_sync(lambda session: study.rebuild_rollups(session))
+
+    assert rebuilt == 2
+    assert await _rollups(db) == incremental
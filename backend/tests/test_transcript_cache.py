@@ -0,0 +1,63 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import sys
+import time
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.transcript_cache import TranscriptCache
+
+DAY = 86400
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranscriptCache(str(tmp_path))
+
+
+def _last_used(cache, key, seconds_ago):
+    then = time.time() - seconds_ago
+    os.utime(cache._path(key), (then, then))
+
+
+def test_entries_unused_too_long_are_pruned(cache):
+    cache.set("aa01", "old")
+    cache.set("bb02", "recent")
+    _last_used(cache, "aa01", 40 * DAY)
+    _last_used(cache, "bb02", 2 * DAY)
+
+    assert cache.prune(max_age_days=30, max_bytes=1 << 20) == 1
+
+    assert cache.get("aa01") is None
+    assert cache.get("bb02") == "recent"
+
+
+def test_least_recently_used_go_first_over_the_size_limit(cache):
+    for age, key in enumerate(["aa01", "bb02", "cc03", "dd04"]):
+        cache.set(key, "x" * 100)
+        _last_used(cache, key, (10 - age) * DAY)
+    # Reading an entry marks it used
+    assert cache.get("aa01") == "x" * 100
+
+    assert cache.prune(max_age_days=30, max_bytes=250) == 2
+
+    assert [key for key in ["aa01", "bb02", "cc03", "dd04"] if cache.get(key)] == ["aa01", "dd04"]
+
+
+def test_leftover_temp_files_are_pruned(cache):
+    cache.set("aa01", "kept")
+    temp_path = cache._path("ab02").with_suffix(".0123.tmp")
+    temp_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path.write_text("partial")
+    then = time.time() - 40 * DAY
+    os.utime(temp_path, (then, then))
+
+    assert cache.prune(max_age_days=30, max_bytes=1 << 20) == 1
+
+    assert not temp_path.exists()
+    assert cache.get("aa01") == "kept"
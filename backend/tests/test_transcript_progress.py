@@ -0,0 +1,112 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import asyncio
+import sys
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import session as db_session
+from app.db.base import Base
+from app.models.recording import Recording
+from app.models.transcript import TranscriptSegment
+from app.models.user import User
+from app.utils import audio as audio_utils
+from app.utils.progress import _save_chunk, poll_transcript_progress, transcribe_recording
+from app.utils.storage import storage
+
+
+@pytest.fixture
+def recording_id(monkeypatch):
+    """A pending recording, with background jobs' sessions pointed at its database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+
+    @contextmanager
+    def _context():
+        db = factory()
+        try:
+            yield db
+            db.commit()
+        finally:
+            db.close()
+
+    monkeypatch.setattr(db_session, "get_db_context", _context)
+    with _context() as db:
+        owner = User(email="owner@example.com", full_name="Owner", hashed_password="x")
+        db.add(owner)
+        db.flush()
+        recording = Recording(title="Lecture", duration="00:10:00", file_path="0.opus", user_id=owner.id)
+        db.add(recording)
+        db.flush()
+        yield recording.id
+    engine.dispose()
+
+
+async def _events(recording_id, **kwargs):
+    return [event async for event in poll_transcript_progress(recording_id, interval=0.01, **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_stalled_transcription_ends_the_stream(recording_id):
+    events = await _events(recording_id, stall_timeout=0.05)
+
+    assert events == [{"type": "error", "detail": "Transcription stalled"}]
+
+
+@pytest.mark.asyncio
+async def test_progress_keeps_the_stream_open(recording_id):
+    stream = poll_transcript_progress(recording_id, interval=0.01, stall_timeout=0.05)
+    for n in range(3):
+        _save_chunk(recording_id, n, {"start": 30.0 * n, "end": 30.0 * (n + 1), "text": f"part {n}"})
+        event = await stream.__anext__()
+        assert event == {"type": "chunk", "index": n, "start": 30.0 * n, "end": 30.0 * (n + 1), "text": f"part {n}"}
+
+    # Silence moves the transcript on without a segment
+    _save_chunk(recording_id, None, {"start": 90.0, "end": 120.0, "text": ""})
+    await asyncio.sleep(0.03)
+    with db_session.get_db_context() as db:
+        db.execute(update(Recording).where(Recording.id == recording_id).values(transcription_status="completed"))
+    assert [event async for event in stream] == [{"type": "complete"}]
+
+
+@pytest.mark.asyncio
+async def test_transcription_discards_its_analysis_samples(recording_id, monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "analysis_dir", tmp_path)
+
+    def _build(file_path):
+        np.zeros(16000, dtype=np.float32).tofile(storage.analysis_path(file_path))
+
+    async def _transcribe(file_path, on_chunk):
+        assert storage.analysis_path(file_path).exists()
+        await on_chunk({"start": 0.0, "end": 1.0, "text": "hello"})
+        await on_chunk({"start": 1.0, "end": 2.0, "text": ""})
+        await on_chunk({"start": 2.0, "end": 3.0, "text": "world"})
+        # Chunks are stored as segments; the row only tracks how far it got
+        with db_session.get_db_context() as db:
+            recording = db.get(Recording, recording_id)
+            assert (recording.transcription, recording.transcribed_seconds) == (None, 3.0)
+            assert [s.text for s in db.query(TranscriptSegment).order_by(TranscriptSegment.position)] == [
+                "hello", "world"
+            ]
+        return "hello world"
+
+    monkeypatch.setattr(storage, "build_analysis", _build)
+    monkeypatch.setattr(audio_utils, "transcribe_audio", _transcribe)
+    await transcribe_recording(recording_id, "0.opus", pipelined=False)
+
+    with db_session.get_db_context() as db:
+        recording = db.get(Recording, recording_id)
+        assert (recording.transcription, recording.transcription_status) == ("hello world", "completed")
+        assert db.query(TranscriptSegment).count() == 2
+    assert list(tmp_path.iterdir()) == []